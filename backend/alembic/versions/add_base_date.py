@@ -0,0 +1,25 @@
+"""Add base_date column to watering_schedules table"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_base_date'
+down_revision = 'add_weather_adjusted'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Add base_date column holding the date before any weather adjustment
+    op.add_column('watering_schedules',
+        sa.Column('base_date', sa.Date(), nullable=True)
+    )
+
+    # Existing rows start from their current scheduled date
+    op.execute('UPDATE watering_schedules SET base_date = scheduled_date WHERE base_date IS NULL')
+
+    op.create_index('idx_user_base_date', 'watering_schedules', ['user_id', 'base_date'])
+
+def downgrade():
+    op.drop_index('idx_user_base_date', table_name='watering_schedules')
+    op.drop_column('watering_schedules', 'base_date')
@@ -0,0 +1,37 @@
+"""Add idempotency_keys table and base_date uniqueness for watering_schedules"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_completion_idempotency'
+down_revision = 'add_base_date'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # One occurrence per plant and base date, so next-occurrence inserts can
+    # rely on ON CONFLICT DO NOTHING instead of a check-then-insert
+    op.create_unique_constraint(
+        'watering_schedule_user_id_plant_id_base_date_key',
+        'watering_schedules',
+        ['user_id', 'plant_id', 'base_date']
+    )
+
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('key', sa.String(255), primary_key=True),
+        sa.Column('scope', sa.String(255), nullable=False),
+        sa.Column('response', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_idempotency_keys_created_at', 'idempotency_keys', ['created_at'])
+
+def downgrade():
+    op.drop_index('ix_idempotency_keys_created_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+    op.drop_constraint(
+        'watering_schedule_user_id_plant_id_base_date_key',
+        'watering_schedules',
+        type_='unique'
+    )
@@ -0,0 +1,82 @@
+"""Add per-user change sequence and change_log for delta sync"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_delta_sync'
+down_revision = 'add_watering_history'
+branch_labels = None
+depends_on = None
+
+TRACKED_TABLES = ("user_plants", "sections", "watering_schedules", "watering_recurrences")
+
+def upgrade():
+    op.create_table(
+        'sync_versions',
+        sa.Column('user_id', sa.Integer(), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('truncated_through', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('last_txid', sa.BigInteger(), nullable=True),
+    )
+    op.create_table(
+        'change_log',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('entity', sa.String(64), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('user_id', 'version', 'entity', 'entity_id', name='change_log_user_version_entity_key'),
+    )
+    op.create_index('idx_change_log_user_version', 'change_log', ['user_id', 'version'])
+    op.create_index('ix_change_log_created_at', 'change_log', ['created_at'])
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION record_sync_change() RETURNS trigger AS $$
+        DECLARE
+            row_user integer;
+            row_id integer;
+            new_version bigint;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                row_user := OLD.user_id;
+                row_id := OLD.id;
+            ELSE
+                row_user := NEW.user_id;
+                row_id := NEW.id;
+            END IF;
+            IF row_user IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            INSERT INTO sync_versions (user_id, version, truncated_through, last_txid)
+            VALUES (row_user, 1, 0, txid_current())
+            ON CONFLICT (user_id) DO UPDATE
+            SET version = CASE WHEN sync_versions.last_txid = txid_current()
+                               THEN sync_versions.version
+                               ELSE sync_versions.version + 1 END,
+                last_txid = txid_current()
+            RETURNING version INTO new_version;
+
+            INSERT INTO change_log (user_id, version, entity, entity_id, created_at)
+            VALUES (row_user, new_version, TG_ARGV[0], row_id, timezone('utc', now()))
+            ON CONFLICT DO NOTHING;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TRACKED_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_sync_change AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION record_sync_change('{table}')"
+        )
+
+def downgrade():
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_sync_change ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS record_sync_change()")
+    op.drop_index('ix_change_log_created_at', table_name='change_log')
+    op.drop_index('idx_change_log_user_version', table_name='change_log')
+    op.drop_table('change_log')
+    op.drop_table('sync_versions')
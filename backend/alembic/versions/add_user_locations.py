@@ -0,0 +1,22 @@
+"""Add garden coordinates and forecast grid cell to users"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_user_locations'
+down_revision = 'add_delta_sync'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('users', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('weather_location', sa.String(64), nullable=True))
+    op.create_index('ix_users_weather_location', 'users', ['weather_location'])
+
+def downgrade():
+    op.drop_index('ix_users_weather_location', table_name='users')
+    op.drop_column('users', 'weather_location')
+    op.drop_column('users', 'longitude')
+    op.drop_column('users', 'latitude')
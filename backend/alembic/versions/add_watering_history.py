@@ -0,0 +1,54 @@
+"""Add watering_history rollup table"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_watering_history'
+down_revision = 'partition_watering_schedules'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'watering_history',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('plant_id', sa.Integer(), sa.ForeignKey('plants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('section', sa.String(), nullable=True),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('planned', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('volume', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('weather_adjusted', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('user_id', 'plant_id', 'day', name='watering_history_user_id_plant_id_day_key'),
+    )
+    op.create_index('ix_watering_history_id', 'watering_history', ['id'])
+    op.create_index('idx_watering_history_user_day', 'watering_history', ['user_id', 'day'])
+
+    # Backfill from the stored occurrences
+    op.execute("""
+        INSERT INTO watering_history
+            (user_id, plant_id, section, day, planned, completed, volume, weather_adjusted, updated_at)
+        SELECT ws.user_id,
+               ws.plant_id,
+               (SELECT MIN(up.section) FROM user_plants AS up
+                WHERE up.user_id = ws.user_id AND up.plant_id = ws.plant_id),
+               ws.scheduled_date,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE ws.completed),
+               COALESCE(SUM(COALESCE(ws.volume_needed, w.volume_feet, 0)) FILTER (WHERE ws.completed), 0),
+               COUNT(*) FILTER (WHERE ws.weather_adjusted),
+               now()
+        FROM watering_schedules AS ws
+        LEFT JOIN LATERAL (
+            SELECT volume_feet FROM watering WHERE watering.plant_id = ws.plant_id LIMIT 1
+        ) AS w ON true
+        GROUP BY ws.user_id, ws.plant_id, ws.scheduled_date
+    """)
+
+def downgrade():
+    op.drop_index('idx_watering_history_user_day', table_name='watering_history')
+    op.drop_index('ix_watering_history_id', table_name='watering_history')
+    op.drop_table('watering_history')
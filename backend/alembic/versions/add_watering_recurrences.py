@@ -0,0 +1,56 @@
+"""Add watering_recurrences table and stop materializing pending occurrences"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_watering_recurrences'
+down_revision = 'add_completion_idempotency'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'watering_recurrences',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('plant_id', sa.Integer(), sa.ForeignKey('plants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('anchor_date', sa.Date(), nullable=False),
+        sa.Column('interval_days', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('user_id', 'plant_id', name='watering_recurrence_user_id_plant_id_key'),
+    )
+    op.create_index('ix_watering_recurrences_id', 'watering_recurrences', ['id'])
+    op.create_index('ix_watering_recurrences_user_id', 'watering_recurrences', ['user_id'])
+
+    # One recurrence per garden plant, anchored at its earliest pending occurrence
+    op.execute("""
+        INSERT INTO watering_recurrences (user_id, plant_id, anchor_date, created_at, updated_at)
+        SELECT up.user_id,
+               up.plant_id,
+               COALESCE(MIN(COALESCE(ws.base_date, ws.scheduled_date)) FILTER (WHERE ws.completed = false), CURRENT_DATE),
+               now(),
+               now()
+        FROM user_plants AS up
+        LEFT JOIN watering_schedules AS ws
+            ON ws.user_id = up.user_id AND ws.plant_id = up.plant_id
+        WHERE up.user_id IS NOT NULL AND up.plant_id IS NOT NULL
+        GROUP BY up.user_id, up.plant_id
+        ON CONFLICT DO NOTHING
+    """)
+
+    # Pending occurrences are now generated from the recurrences
+    op.execute('DELETE FROM watering_schedules WHERE completed = false')
+
+def downgrade():
+    # Re-materialize the next pending occurrence of every recurrence
+    op.execute("""
+        INSERT INTO watering_schedules (user_id, plant_id, scheduled_date, base_date, completed, water_needed, weather_adjusted)
+        SELECT user_id, plant_id, anchor_date, anchor_date, false, true, false
+        FROM watering_recurrences
+        ON CONFLICT DO NOTHING
+    """)
+    op.drop_index('ix_watering_recurrences_user_id', table_name='watering_recurrences')
+    op.drop_index('ix_watering_recurrences_id', table_name='watering_recurrences')
+    op.drop_table('watering_recurrences')
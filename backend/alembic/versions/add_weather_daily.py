@@ -0,0 +1,148 @@
+"""Add weather_daily rollup maintained by triggers on weather_forecast"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_weather_daily'
+down_revision = 'add_user_locations'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'weather_daily',
+        sa.Column('location', sa.String(255), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('hours', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('temperature_mean', sa.Float(), nullable=True),
+        sa.Column('temperature_min', sa.Float(), nullable=True),
+        sa.Column('temperature_max', sa.Float(), nullable=True),
+        sa.Column('precipitation_mean', sa.Float(), nullable=True),
+        sa.Column('precipitation_sum', sa.Float(), nullable=True),
+        sa.Column('wind_speed_mean', sa.Float(), nullable=True),
+        sa.Column('wind_speed_max', sa.Float(), nullable=True),
+        sa.Column('icon', sa.String(16), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('location', 'day', name='weather_daily_pkey'),
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_weather_daily() RETURNS trigger AS $$
+        DECLARE
+            key_locations text[];
+            key_days date[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(location), array_agg(day) INTO key_locations, key_days
+                FROM (SELECT DISTINCT location, CAST(timestamp AS DATE) AS day FROM new_rows) AS k;
+            ELSIF TG_OP = 'UPDATE' THEN
+                SELECT array_agg(location), array_agg(day) INTO key_locations, key_days
+                FROM (
+                    SELECT location, CAST(timestamp AS DATE) AS day FROM new_rows
+                    UNION
+                    SELECT location, CAST(timestamp AS DATE) AS day FROM old_rows
+                ) AS k;
+            ELSE
+                SELECT array_agg(location), array_agg(day) INTO key_locations, key_days
+                FROM (SELECT DISTINCT location, CAST(timestamp AS DATE) AS day FROM old_rows) AS k;
+            END IF;
+            IF key_locations IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            INSERT INTO weather_daily
+                (location, day, hours, temperature_mean, temperature_min, temperature_max,
+                 precipitation_mean, precipitation_sum, wind_speed_mean, wind_speed_max, icon, updated_at)
+            SELECT k.location,
+                   k.day,
+                   COUNT(*),
+                   AVG(wf.temperature),
+                   MIN(wf.temperature),
+                   MAX(wf.temperature),
+                   AVG(wf.precipitation),
+                   SUM(wf.precipitation),
+                   AVG(wf.wind_speed),
+                   MAX(wf.wind_speed),
+                   CASE WHEN AVG(wf.precipitation) > 0 THEN 'rainy'
+                        WHEN AVG(wf.temperature) > 25 THEN 'hot'
+                        WHEN AVG(wf.temperature) < 10 THEN 'cold'
+                        WHEN AVG(wf.wind_speed) > 15 THEN 'windy'
+                        ELSE 'sunny' END,
+                   timezone('utc', now())
+            FROM unnest(key_locations, key_days) AS k(location, day)
+            JOIN weather_forecast AS wf
+                ON wf.location = k.location AND wf.timestamp >= k.day AND wf.timestamp < k.day + 1
+            GROUP BY k.location, k.day
+            ON CONFLICT (location, day) DO UPDATE
+            SET hours = EXCLUDED.hours,
+                temperature_mean = EXCLUDED.temperature_mean,
+                temperature_min = EXCLUDED.temperature_min,
+                temperature_max = EXCLUDED.temperature_max,
+                precipitation_mean = EXCLUDED.precipitation_mean,
+                precipitation_sum = EXCLUDED.precipitation_sum,
+                wind_speed_mean = EXCLUDED.wind_speed_mean,
+                wind_speed_max = EXCLUDED.wind_speed_max,
+                icon = EXCLUDED.icon,
+                updated_at = EXCLUDED.updated_at;
+
+            DELETE FROM weather_daily AS d
+            USING unnest(key_locations, key_days) AS k(location, day)
+            WHERE d.location = k.location AND d.day = k.day
+              AND NOT EXISTS (
+                  SELECT 1 FROM weather_forecast AS wf
+                  WHERE wf.location = k.location AND wf.timestamp >= k.day AND wf.timestamp < k.day + 1
+              );
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    # Transition tables allow a single event per trigger
+    op.execute("""
+        CREATE TRIGGER weather_daily_insert AFTER INSERT ON weather_forecast
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION refresh_weather_daily()
+    """)
+    op.execute("""
+        CREATE TRIGGER weather_daily_update AFTER UPDATE ON weather_forecast
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION refresh_weather_daily()
+    """)
+    op.execute("""
+        CREATE TRIGGER weather_daily_delete AFTER DELETE ON weather_forecast
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION refresh_weather_daily()
+    """)
+
+    # Backfill from the stored forecast hours
+    op.execute("""
+        INSERT INTO weather_daily
+            (location, day, hours, temperature_mean, temperature_min, temperature_max,
+             precipitation_mean, precipitation_sum, wind_speed_mean, wind_speed_max, icon, updated_at)
+        SELECT location,
+               CAST(timestamp AS DATE),
+               COUNT(*),
+               AVG(temperature),
+               MIN(temperature),
+               MAX(temperature),
+               AVG(precipitation),
+               SUM(precipitation),
+               AVG(wind_speed),
+               MAX(wind_speed),
+               CASE WHEN AVG(precipitation) > 0 THEN 'rainy'
+                    WHEN AVG(temperature) > 25 THEN 'hot'
+                    WHEN AVG(temperature) < 10 THEN 'cold'
+                    WHEN AVG(wind_speed) > 15 THEN 'windy'
+                    ELSE 'sunny' END,
+               timezone('utc', now())
+        FROM weather_forecast
+        WHERE location IS NOT NULL AND timestamp IS NOT NULL
+        GROUP BY location, CAST(timestamp AS DATE)
+    """)
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS weather_daily_delete ON weather_forecast")
+    op.execute("DROP TRIGGER IF EXISTS weather_daily_update ON weather_forecast")
+    op.execute("DROP TRIGGER IF EXISTS weather_daily_insert ON weather_forecast")
+    op.execute("DROP FUNCTION IF EXISTS refresh_weather_daily()")
+    op.drop_table('weather_daily')
@@ -0,0 +1,89 @@
+"""Add compact forecast storage (weather_locations, weather_hourly)"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic
+revision = 'add_weather_hourly'
+down_revision = 'add_weather_daily'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'weather_locations',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('location', sa.String(255), nullable=False, unique=True),
+    )
+    op.create_table(
+        'weather_hourly',
+        sa.Column('location_id', sa.Integer(), sa.ForeignKey('weather_locations.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('temperature', postgresql.ARRAY(postgresql.REAL()), nullable=False),
+        sa.Column('precipitation', postgresql.ARRAY(postgresql.REAL()), nullable=False),
+        sa.Column('wind_speed', postgresql.ARRAY(postgresql.REAL()), nullable=False),
+        sa.PrimaryKeyConstraint('location_id', 'day', name='weather_hourly_pkey'),
+    )
+
+    # Keep weather_daily current from compact rows as well
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_weather_daily_compact() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM weather_daily AS d
+                USING weather_locations AS l
+                WHERE l.id = OLD.location_id AND d.location = l.location AND d.day = OLD.day;
+                RETURN NULL;
+            END IF;
+
+            INSERT INTO weather_daily
+                (location, day, hours, temperature_mean, temperature_min, temperature_max,
+                 precipitation_mean, precipitation_sum, wind_speed_mean, wind_speed_max, icon, updated_at)
+            SELECT l.location,
+                   NEW.day,
+                   COUNT(*) FILTER (
+                       WHERE h.temperature IS NOT NULL OR h.precipitation IS NOT NULL OR h.wind_speed IS NOT NULL
+                   ),
+                   AVG(h.temperature),
+                   MIN(h.temperature),
+                   MAX(h.temperature),
+                   AVG(h.precipitation),
+                   SUM(h.precipitation),
+                   AVG(h.wind_speed),
+                   MAX(h.wind_speed),
+                   CASE WHEN AVG(h.precipitation) > 0 THEN 'rainy'
+                        WHEN AVG(h.temperature) > 25 THEN 'hot'
+                        WHEN AVG(h.temperature) < 10 THEN 'cold'
+                        WHEN AVG(h.wind_speed) > 15 THEN 'windy'
+                        ELSE 'sunny' END,
+                   timezone('utc', now())
+            FROM weather_locations AS l,
+                 unnest(NEW.temperature, NEW.precipitation, NEW.wind_speed) AS h(temperature, precipitation, wind_speed)
+            WHERE l.id = NEW.location_id
+            GROUP BY l.location
+            ON CONFLICT (location, day) DO UPDATE
+            SET hours = EXCLUDED.hours,
+                temperature_mean = EXCLUDED.temperature_mean,
+                temperature_min = EXCLUDED.temperature_min,
+                temperature_max = EXCLUDED.temperature_max,
+                precipitation_mean = EXCLUDED.precipitation_mean,
+                precipitation_sum = EXCLUDED.precipitation_sum,
+                wind_speed_mean = EXCLUDED.wind_speed_mean,
+                wind_speed_max = EXCLUDED.wind_speed_max,
+                icon = EXCLUDED.icon,
+                updated_at = EXCLUDED.updated_at;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER weather_hourly_daily AFTER INSERT OR UPDATE OR DELETE ON weather_hourly
+            FOR EACH ROW EXECUTE FUNCTION refresh_weather_daily_compact()
+    """)
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS weather_hourly_daily ON weather_hourly")
+    op.execute("DROP FUNCTION IF EXISTS refresh_weather_daily_compact()")
+    op.drop_table('weather_hourly')
+    op.drop_table('weather_locations')
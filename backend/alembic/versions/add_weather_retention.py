@@ -0,0 +1,159 @@
+"""Add weather forecast retention: (location, timestamp) index, ingest marker,
+and rollup triggers that keep daily rows for downsampled hours"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_weather_retention'
+down_revision = 'add_weather_hourly'
+branch_labels = None
+depends_on = None
+
+REFRESH_WEATHER_DAILY = """
+CREATE OR REPLACE FUNCTION refresh_weather_daily() RETURNS trigger AS $$
+DECLARE
+    key_locations text[];
+    key_days date[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(location), array_agg(day) INTO key_locations, key_days
+        FROM (SELECT DISTINCT location, CAST(timestamp AS DATE) AS day FROM new_rows) AS k;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(location), array_agg(day) INTO key_locations, key_days
+        FROM (
+            SELECT location, CAST(timestamp AS DATE) AS day FROM new_rows
+            UNION
+            SELECT location, CAST(timestamp AS DATE) AS day FROM old_rows
+        ) AS k;
+    ELSE{keep_daily}
+        SELECT array_agg(location), array_agg(day) INTO key_locations, key_days
+        FROM (SELECT DISTINCT location, CAST(timestamp AS DATE) AS day FROM old_rows) AS k;
+    END IF;
+    IF key_locations IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO weather_daily
+        (location, day, hours, temperature_mean, temperature_min, temperature_max,
+         precipitation_mean, precipitation_sum, wind_speed_mean, wind_speed_max, icon, updated_at)
+    SELECT k.location,
+           k.day,
+           COUNT(*),
+           AVG(wf.temperature),
+           MIN(wf.temperature),
+           MAX(wf.temperature),
+           AVG(wf.precipitation),
+           SUM(wf.precipitation),
+           AVG(wf.wind_speed),
+           MAX(wf.wind_speed),
+           CASE WHEN AVG(wf.precipitation) > 0 THEN 'rainy'
+                WHEN AVG(wf.temperature) > 25 THEN 'hot'
+                WHEN AVG(wf.temperature) < 10 THEN 'cold'
+                WHEN AVG(wf.wind_speed) > 15 THEN 'windy'
+                ELSE 'sunny' END,
+           timezone('utc', now())
+    FROM unnest(key_locations, key_days) AS k(location, day)
+    JOIN weather_forecast AS wf
+        ON wf.location = k.location AND wf.timestamp >= k.day AND wf.timestamp < k.day + 1
+    GROUP BY k.location, k.day
+    ON CONFLICT (location, day) DO UPDATE
+    SET hours = EXCLUDED.hours,
+        temperature_mean = EXCLUDED.temperature_mean,
+        temperature_min = EXCLUDED.temperature_min,
+        temperature_max = EXCLUDED.temperature_max,
+        precipitation_mean = EXCLUDED.precipitation_mean,
+        precipitation_sum = EXCLUDED.precipitation_sum,
+        wind_speed_mean = EXCLUDED.wind_speed_mean,
+        wind_speed_max = EXCLUDED.wind_speed_max,
+        icon = EXCLUDED.icon,
+        updated_at = EXCLUDED.updated_at;
+
+    DELETE FROM weather_daily AS d
+    USING unnest(key_locations, key_days) AS k(location, day)
+    WHERE d.location = k.location AND d.day = k.day
+      AND NOT EXISTS (
+          SELECT 1 FROM weather_forecast AS wf
+          WHERE wf.location = k.location AND wf.timestamp >= k.day AND wf.timestamp < k.day + 1
+      );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+REFRESH_WEATHER_DAILY_COMPACT = """
+CREATE OR REPLACE FUNCTION refresh_weather_daily_compact() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN{keep_daily}
+        DELETE FROM weather_daily AS d
+        USING weather_locations AS l
+        WHERE l.id = OLD.location_id AND d.location = l.location AND d.day = OLD.day;
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO weather_daily
+        (location, day, hours, temperature_mean, temperature_min, temperature_max,
+         precipitation_mean, precipitation_sum, wind_speed_mean, wind_speed_max, icon, updated_at)
+    SELECT l.location,
+           NEW.day,
+           COUNT(*) FILTER (
+               WHERE h.temperature IS NOT NULL OR h.precipitation IS NOT NULL OR h.wind_speed IS NOT NULL
+           ),
+           AVG(h.temperature),
+           MIN(h.temperature),
+           MAX(h.temperature),
+           AVG(h.precipitation),
+           SUM(h.precipitation),
+           AVG(h.wind_speed),
+           MAX(h.wind_speed),
+           CASE WHEN AVG(h.precipitation) > 0 THEN 'rainy'
+                WHEN AVG(h.temperature) > 25 THEN 'hot'
+                WHEN AVG(h.temperature) < 10 THEN 'cold'
+                WHEN AVG(h.wind_speed) > 15 THEN 'windy'
+                ELSE 'sunny' END,
+           timezone('utc', now())
+    FROM weather_locations AS l,
+         unnest(NEW.temperature, NEW.precipitation, NEW.wind_speed) AS h(temperature, precipitation, wind_speed)
+    WHERE l.id = NEW.location_id
+    GROUP BY l.location
+    ON CONFLICT (location, day) DO UPDATE
+    SET hours = EXCLUDED.hours,
+        temperature_mean = EXCLUDED.temperature_mean,
+        temperature_min = EXCLUDED.temperature_min,
+        temperature_max = EXCLUDED.temperature_max,
+        precipitation_mean = EXCLUDED.precipitation_mean,
+        precipitation_sum = EXCLUDED.precipitation_sum,
+        wind_speed_mean = EXCLUDED.wind_speed_mean,
+        wind_speed_max = EXCLUDED.wind_speed_max,
+        icon = EXCLUDED.icon,
+        updated_at = EXCLUDED.updated_at;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Retention deletes in downsample mode leave weather_daily untouched
+KEEP_DAILY = """
+        IF current_setting('weather.retention', true) = 'downsample' THEN
+            RETURN NULL;
+        END IF;"""
+
+def upgrade():
+    op.create_index(
+        'idx_weather_forecast_location_timestamp',
+        'weather_forecast',
+        ['location', 'timestamp']
+    )
+    op.create_table(
+        'weather_ingest',
+        sa.Column('location', sa.String(255), primary_key=True),
+        sa.Column('ingested_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.execute(REFRESH_WEATHER_DAILY.format(keep_daily=KEEP_DAILY))
+    op.execute(REFRESH_WEATHER_DAILY_COMPACT.format(keep_daily=KEEP_DAILY))
+
+def downgrade():
+    op.execute(REFRESH_WEATHER_DAILY_COMPACT.format(keep_daily=""))
+    op.execute(REFRESH_WEATHER_DAILY.format(keep_daily=""))
+    op.drop_table('weather_ingest')
+    op.drop_index('idx_weather_forecast_location_timestamp', table_name='weather_forecast')
@@ -0,0 +1,132 @@
+"""Partition watering_schedules by month on scheduled_date"""
+
+from alembic import op
+import sqlalchemy as sa
+from datetime import date
+
+# revision identifiers, used by Alembic
+revision = 'partition_watering_schedules'
+down_revision = 'add_watering_recurrences'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = """
+    id integer NOT NULL DEFAULT nextval('watering_schedules_id_seq'),
+    user_id integer NOT NULL REFERENCES users (id),
+    plant_id integer NOT NULL REFERENCES plants (id),
+    scheduled_date date NOT NULL,
+    base_date date,
+    completion_timestamp timestamp without time zone,
+    water_needed boolean,
+    volume_needed double precision,
+    completed boolean,
+    next_scheduled_date date,
+    day varchar,
+    amount double precision,
+    weather_dependent boolean,
+    frequency_days integer,
+    depth_mm double precision,
+    volume_feet double precision,
+    weather_adjusted boolean DEFAULT false
+"""
+
+COLUMN_NAMES = (
+    "id, user_id, plant_id, scheduled_date, base_date, completion_timestamp, water_needed, "
+    "volume_needed, completed, next_scheduled_date, day, amount, weather_dependent, "
+    "frequency_days, depth_mm, volume_feet, weather_adjusted"
+)
+
+INDEXES = (
+    ("ix_watering_schedules_id", "id"),
+    ("ix_watering_schedules_user_id", "user_id"),
+    ("ix_watering_schedules_plant_id", "plant_id"),
+    ("ix_watering_schedules_scheduled_date", "scheduled_date"),
+    ("idx_user_scheduled_date", "user_id, scheduled_date"),
+    ("idx_user_plant_scheduled", "user_id, plant_id, scheduled_date"),
+    ("idx_completion_status", "user_id, scheduled_date, water_needed"),
+    ("idx_user_base_date", "user_id, base_date"),
+)
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+# Views and foreign keys that point at watering_schedules; nothing in this
+# schema has any, so the old table is dropped without CASCADE and anything
+# added outside the migrations stops the upgrade instead of vanishing
+DEPENDENTS_SQL = """
+    SELECT DISTINCT 'view ' || CAST(r.ev_class AS regclass)
+    FROM pg_depend AS d
+    JOIN pg_rewrite AS r ON r.oid = d.objid
+    WHERE d.refobjid = CAST('watering_schedules' AS regclass)
+      AND r.ev_class <> d.refobjid
+    UNION
+    SELECT 'constraint ' || conname || ' on ' || CAST(conrelid AS regclass)
+    FROM pg_constraint
+    WHERE confrelid = CAST('watering_schedules' AS regclass)
+"""
+
+def _check_dependents():
+    dependents = [row[0] for row in op.get_bind().execute(sa.text(DEPENDENTS_SQL))]
+    if dependents:
+        raise RuntimeError(
+            "watering_schedules has dependents that would be lost; drop or migrate them first: "
+            + ", ".join(dependents)
+        )
+
+def _replace_table(keys_sql, partition_by_sql, partitions):
+    """Copy watering_schedules into a new table that takes over its name, indexes and sequence"""
+    op.execute(f"CREATE TABLE watering_schedules_new ({COLUMNS}) {partition_by_sql}")
+    for name, start, end in partitions:
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF watering_schedules_new "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    if partition_by_sql:
+        op.execute("CREATE TABLE watering_schedules_default PARTITION OF watering_schedules_new DEFAULT")
+
+    op.execute(f"INSERT INTO watering_schedules_new ({COLUMN_NAMES}) SELECT {COLUMN_NAMES} FROM watering_schedules")
+    op.execute("ALTER SEQUENCE watering_schedules_id_seq OWNED BY watering_schedules_new.id")
+    _check_dependents()
+    op.execute("DROP TABLE watering_schedules")
+    op.execute("ALTER TABLE watering_schedules_new RENAME TO watering_schedules")
+
+    # Keys and indexes are added once the old table's names are free
+    op.execute(f"ALTER TABLE watering_schedules {keys_sql}")
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name} ON watering_schedules ({columns})")
+
+def upgrade():
+    # One partition per month from the oldest row to a few months ahead;
+    # anything later lands in the DEFAULT partition until the maintenance
+    # job creates its month
+    first = op.get_bind().execute(sa.text("SELECT MIN(scheduled_date) FROM watering_schedules")).scalar()
+    current = date.today().replace(day=1)
+    month = min(first or current, current).replace(day=1)
+
+    partitions = []
+    while month <= _add_months(current, MONTHS_AHEAD):
+        partitions.append((f"watering_schedules_p{month:%Y_%m}", month, _add_months(month, 1)))
+        month = _add_months(month, 1)
+
+    # Unique constraints on a partitioned table must include the partition
+    # key, so the base_date key gains scheduled_date
+    _replace_table(
+        "ADD CONSTRAINT watering_schedules_pkey PRIMARY KEY (id, scheduled_date), "
+        "ADD CONSTRAINT watering_schedule_user_id_plant_id_scheduled_date_key UNIQUE (user_id, plant_id, scheduled_date), "
+        "ADD CONSTRAINT watering_schedule_user_id_plant_id_base_date_key UNIQUE (user_id, plant_id, base_date, scheduled_date)",
+        "PARTITION BY RANGE (scheduled_date)",
+        partitions
+    )
+
+def downgrade():
+    # Archived partitions are not brought back
+    _replace_table(
+        "ADD CONSTRAINT watering_schedules_pkey PRIMARY KEY (id), "
+        "ADD CONSTRAINT watering_schedule_user_id_plant_id_scheduled_date_key UNIQUE (user_id, plant_id, scheduled_date), "
+        "ADD CONSTRAINT watering_schedule_user_id_plant_id_base_date_key UNIQUE (user_id, plant_id, base_date)",
+        "",
+        []
+    )
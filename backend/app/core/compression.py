@@ -0,0 +1,162 @@
+"""Response compression middleware.
+
+Compresses buffered responses with the best encoding the client accepts:
+brotli or zstd when their optional packages are installed, gzip otherwise.
+Only textual content types are compressed; images, archives and other
+binary bodies are usually compressed already. Small bodies are sent as is,
+and large bodies are compressed in the threadpool so a big overview
+response does not stall the event loop. Streaming responses (server-sent
+events, NDJSON) pass through untouched. Every compressible response carries
+Vary: Accept-Encoding, compressed or not, so caches keep the variants apart.
+"""
+import gzip
+import logging
+from typing import Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+def available_encodings() -> List[str]:
+    """Supported encodings in order of preference"""
+    encodings = []
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with the configured level for the encoding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+# Content types worth compressing; everything else passes through
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+def is_compressible(content_type: str) -> bool:
+    """Whether a Content-Type is textual (json, text/*, js, svg)"""
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return (
+        media_type in COMPRESSIBLE_TYPES
+        or media_type.startswith("text/")
+        or media_type.endswith("+json")
+    )
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map of encoding -> q value from an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+def choose_encoding(header: str, encodings: Optional[List[str]] = None) -> Optional[str]:
+    """Best supported encoding the client accepts, or None"""
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in encodings or available_encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        offload_size: Optional[int] = None
+    ):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.offload_size = settings.COMPRESSION_OFFLOAD_SIZE if offload_size is None else offload_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or not is_compressible(headers.get("content-type", "")):
+                    passthrough = True
+                    await send(message)
+                    return
+                MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+                if encoding is None:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streaming or small responses are sent uncompressed
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= self.offload_size:
+                compressed = await run_in_threadpool(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -31,6 +31,49 @@ class Settings(BaseSettings):
     WEATHER_LON: float = 12.568337  # Copenhagen longitude
     WEATHER_API_URL: str = "https://api.open-meteo.com/v1/forecast"
     WEATHER_UPDATE_INTERVAL: int = 21600  # 6 hours in seconds
+    WEATHER_RULES_REGION: str = "default"  # Key into adjustment_rules.ADJUSTMENT_RULES
+    WEATHER_GRID_DEGREES: float = 0.1  # Forecast grid cell size; users in one cell share a fetch
+    WEATHER_FETCH_CONCURRENCY: int = 8  # Cells fetched from the provider at the same time
+    WEATHER_STORAGE: str = "rows"  # "rows" (weather_forecast, one row per hour) or "compact" (weather_hourly, one row per day)
+    WEATHER_REFRESH_WAIT_SECONDS: float = 10.0  # How long a read with no stored forecast waits for the refresh
+    WEATHER_RETENTION_DAYS: int = 90  # Hourly forecasts older than this are removed by the retention job
+    WEATHER_RETENTION_MODE: str = "downsample"  # "downsample" keeps weather_daily rows for removed hours, "delete" drops them too
+    WEATHER_RETENTION_BATCH_SIZE: int = 5000  # Rows removed per transaction, so the job never holds long locks
+
+    # Outbound HTTP client settings
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_RETRIES: int = 3  # Retries after the first attempt
+    HTTP_RETRY_BASE_DELAY: float = 0.5  # Seconds; doubled per retry, with full jitter
+    HTTP_RETRY_MAX_DELAY: float = 30.0  # Seconds; also caps Retry-After
+
+    # Background scheduler settings
+    SCHEDULER_LEADER_RETRY_SECONDS: int = 60  # How often standby workers try to become the leader
+    SCHEDULER_LOCK_CHECK_SECONDS: int = 30  # How often the leader checks it still holds the lock
+
+    # Watering schedule settings
+    SCHEDULE_DEFAULT_DAYS: int = 21  # Three weeks covers the highest watering interval
+    SCHEDULE_MAX_DAYS: int = 60  # Upper bound for a single schedule request
+    SCHEDULE_PARTITION_MONTHS_AHEAD: int = 3  # Monthly partitions created ahead of time
+    SCHEDULE_RETENTION_MONTHS: int = 24  # Completed history kept attached before archiving
+    SIMULATION_MAX_SCENARIOS: int = 500  # Weather scenarios per simulation request
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 48  # Retries with an older Idempotency-Key are treated as new requests
+
+    # Response compression settings
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Bytes; smaller bodies are sent uncompressed
+    COMPRESSION_OFFLOAD_SIZE: int = 65536  # Bytes; larger bodies are compressed in the threadpool
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Server-sent events settings
+    SSE_KEEPALIVE_SECONDS: int = 15  # Comment line sent on idle streams to keep proxies from closing them
+    EVENTS_LISTEN_CHECK_SECONDS: int = 30  # How often a worker checks its LISTEN connection for events from other workers
+
+    # Delta sync settings
+    SYNC_LOG_RETENTION_DAYS: int = 30  # Clients offline longer than this get a full resync
+    SYNC_MAX_CHANGES: int = 5000  # Changed rows above which a full resync is cheaper
 
     # API settings
     API_V1_STR: str = "/api"
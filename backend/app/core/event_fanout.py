@@ -0,0 +1,109 @@
+"""Fan schedule events out to every worker with Postgres LISTEN/NOTIFY.
+
+Each worker keeps one asyncpg connection listening on EVENTS_CHANNEL and
+sends the events it publishes with NOTIFY over that same connection, so an
+SSE client connected to any worker sees events published by any other, such
+as the scheduler leader's weather adjustments. Publishing only queues the
+event on the event loop, so neither sync routes nor async handlers wait on
+the database. Events are best effort like the in-process bus: when events
+are lost in either direction, the subscribers concerned are told to resync
+instead of silently missing them.
+"""
+import asyncio
+import logging
+from typing import Optional
+import asyncpg
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+from app.core.events import schedule_events, RESYNC
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "schedule_events"
+
+# NOTIFY payloads must stay below 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+
+# Events waiting for the connection, e.g. while it reconnects
+MAX_PENDING_EVENTS = 1000
+
+def _on_notification(connection, pid, channel, payload):
+    schedule_events.receive(payload)
+
+class EventFanout:
+    """Sends this worker's events to the others and delivers theirs"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.pending: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+        # Set when events were lost before reaching the other workers
+        self.dropped = False
+
+    def notify(self, user_id: Optional[int], event: dict):
+        """Queue an event for the other workers; safe to call from any thread"""
+        payload = schedule_events.encode(user_id, event)
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+            payload = schedule_events.encode(user_id, {"id": event["id"], "type": RESYNC})
+        try:
+            self.loop.call_soon_threadsafe(self._queue, payload)
+        except RuntimeError:
+            # The fanout's loop has shut down
+            logger.debug("Dropping event for a closed event loop")
+
+    def _queue(self, payload: str):
+        if self.pending.full():
+            if not self.dropped:
+                logger.warning("Schedule event queue is full, other workers will resync")
+            self.dropped = True
+        else:
+            self.pending.put_nowait(payload)
+
+    async def _next_payload(self) -> Optional[str]:
+        """Next message to send, None when nothing came within the check interval"""
+        if self.dropped:
+            self.dropped = False
+            return schedule_events.encode(None, {"id": 0, "type": RESYNC})
+        try:
+            return await asyncio.wait_for(self.pending.get(), timeout=settings.EVENTS_LISTEN_CHECK_SECONDS)
+        except asyncio.TimeoutError:
+            return None
+
+    async def run(self):
+        """Send and receive events until cancelled, reconnecting on failure"""
+        # asyncpg takes libpq-style DSNs, sslmode included
+        dsn = make_url(settings.get_database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        reconnecting = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(EVENTS_CHANNEL, _on_notification)
+                logger.info(f"Listening for schedule events on {EVENTS_CHANNEL}")
+                if reconnecting:
+                    # Events sent while we were away are lost
+                    schedule_events.deliver(None, {"id": 0, "type": RESYNC})
+                reconnecting = True
+                while True:
+                    payload = await self._next_payload()
+                    if payload is None:
+                        await connection.execute("SELECT 1")
+                        continue
+                    try:
+                        await connection.execute("SELECT pg_notify($1, $2)", EVENTS_CHANNEL, payload)
+                    except Exception:
+                        self.dropped = True
+                        raise
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Schedule event fanout failed, reconnecting: {str(e)}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(settings.EVENTS_LISTEN_CHECK_SECONDS)
+
+def start_event_fanout() -> asyncio.Task:
+    """Forward this worker's events and start listening for the others'"""
+    fanout = EventFanout(asyncio.get_running_loop())
+    schedule_events.forward = fanout.notify
+    return asyncio.create_task(fanout.run())
@@ -0,0 +1,121 @@
+"""In-process pub/sub for schedule change events.
+
+The service layer publishes small events per user after it commits, and the
+server-sent events endpoint subscribes per user. Sync routes run in the
+threadpool, so events reach each subscriber through its own event loop with
+call_soon_threadsafe. Events published in one worker reach the other
+workers' subscribers through the bus's forward hook, which
+app.core.event_fanout points at Postgres NOTIFY; events received back from
+other workers are delivered with receive().
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Event types
+SCHEDULE_COMPLETED = "completed"
+SCHEDULE_UNCOMPLETED = "uncompleted"
+PLANT_ADDED = "plant_added"
+PLANT_REMOVED = "plant_removed"
+PLANT_MOVED = "plant_moved"
+WEATHER_ADJUSTED = "weather_adjusted"
+RESYNC = "resync"  # The client missed events and should refetch everything
+
+def _put(queue: asyncio.Queue, event: dict):
+    """Queue an event on the subscriber's loop; a full queue collapses into a resync"""
+    if queue.full():
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({"id": event["id"], "type": RESYNC})
+    else:
+        queue.put_nowait(event)
+
+class ScheduleEventBus:
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        # Identifies this process's events when they come back from other workers
+        self.origin = uuid.uuid4().hex
+        # Called with (user_id, event) after local delivery, to reach other workers
+        self.forward: Optional[Callable[[Optional[int], dict], None]] = None
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[asyncio.Queue]:
+        """Queue receiving the events of one user for the lifetime of the context"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.max_queue_size))
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(user_id, set())
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id: Optional[int], event_type: str, **data) -> dict:
+        """Send an event to one user's subscribers, or to everyone when user_id is None"""
+        event = {"id": next(self._sequence), "type": event_type, **data}
+        self.deliver(user_id, event)
+        if self.forward is not None:
+            try:
+                self.forward(user_id, event)
+            except Exception as e:
+                logger.error(f"Error forwarding event to other workers: {str(e)}")
+        return event
+
+    def deliver(self, user_id: Optional[int], event: dict):
+        """Hand an event to this process's subscribers"""
+        with self._lock:
+            if user_id is None:
+                subscribers = [s for user_subscribers in self._subscribers.values() for s in user_subscribers]
+            else:
+                subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_put, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                logger.debug("Dropping event for a closed event loop")
+
+    def encode(self, user_id: Optional[int], event: dict) -> str:
+        """Message for other workers"""
+        return json.dumps(
+            {"origin": self.origin, "user_id": user_id, "event": event},
+            separators=(",", ":"),
+            default=str
+        )
+
+    def receive(self, message: str):
+        """Deliver an event published by another worker; our own are skipped"""
+        try:
+            message = json.loads(message)
+        except ValueError:
+            logger.warning("Ignoring malformed event message")
+            return
+        if message.get("origin") == self.origin:
+            return
+        self.deliver(message.get("user_id"), message["event"])
+
+    def subscriber_count(self, user_id: Optional[int] = None) -> int:
+        with self._lock:
+            if user_id is None:
+                return sum(len(s) for s in self._subscribers.values())
+            return len(self._subscribers.get(user_id, ()))
+
+def format_sse(event: dict) -> str:
+    """Encode an event as a server-sent events message"""
+    data = json.dumps(event, separators=(",", ":"), default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+schedule_events = ScheduleEventBus()
@@ -0,0 +1,89 @@
+"""Shared outbound HTTP client.
+
+One pooled httpx.AsyncClient is opened at application startup and closed at
+shutdown, so calls to weather providers reuse keep-alive connections instead
+of paying a TCP and TLS handshake per fetch. request_with_retries retries
+transport errors and retryable statuses with jittered exponential backoff,
+honoring Retry-After when the server sends one.
+"""
+import asyncio
+import logging
+import random
+from typing import Optional
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_client: Optional[httpx.AsyncClient] = None
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=settings.HTTP_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        headers={"User-Agent": settings.PROJECT_NAME}
+    )
+
+async def start_http_client():
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client, created on first use outside the app (scripts)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+def backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Seconds to wait before retry number attempt + 1"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), settings.HTTP_RETRY_MAX_DELAY)
+    # Full jitter keeps workers from retrying in lockstep
+    return random.uniform(0, min(settings.HTTP_RETRY_MAX_DELAY, settings.HTTP_RETRY_BASE_DELAY * 2 ** attempt))
+
+async def request_with_retries(
+    method: str,
+    url: str,
+    client: Optional[httpx.AsyncClient] = None,
+    retries: Optional[int] = None,
+    **kwargs
+) -> httpx.Response:
+    """Send a request, retrying transport errors and retryable statuses.
+
+    The last response is returned when retries run out, so callers still
+    see the final status; the last transport error is raised.
+    """
+    client = client or get_http_client()
+    retries = settings.HTTP_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"{method} {url} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            continue
+
+        if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+            return response
+        delay = backoff_delay(attempt, response)
+        logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.2f}s")
+        await response.aclose()
+        await asyncio.sleep(delay)
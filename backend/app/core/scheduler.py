@@ -1,54 +1,218 @@
+"""Background jobs: weather ingest, schedule adjustment and maintenance.
+
+Every gunicorn worker starts the scheduler, but only the worker holding the
+scheduler advisory lock runs the jobs; the others keep trying to take the
+lock so one of them takes over when the leader's process or connection
+dies. Workers that are not the leader read the shared results from the
+database like any other request.
+"""
 import asyncio
 import logging
+from typing import Optional
+from sqlalchemy import text
 from app.core.config import settings
-from app.services.weather_service import update_weather_forecasts
-from app.database import SessionLocal
+from app.services.weather_service import update_weather_cells
+from app.services.watering_schedule import adjust_all_schedules_for_weather, prune_idempotency_keys
+from app.services.schedule_partitions import ensure_partitions
+from app.services.sync import truncate_change_log
+from app.services.weather_retention import prune_weather_history
+from app.database import SessionLocal, engine
 
 logger = logging.getLogger(__name__)
 
-async def update_weather_periodic():
-    """Periodically update weather forecasts"""
+# Advisory lock key of the scheduler leader (schedule partitions use 728_403_001)
+SCHEDULER_LOCK_ID = 728_403_002
+
+# Whether this session holds the advisory lock (single bigint keys below
+# 2^32 are stored with classid 0 and objsubid 1)
+HELD_LOCK_SQL = """
+    SELECT EXISTS (
+        SELECT 1 FROM pg_locks
+        WHERE locktype = 'advisory'
+          AND classid = 0 AND objid = :lock_id AND objsubid = 1
+          AND pid = pg_backend_pid()
+          AND granted
+    )
+"""
+
+class LeaderLock:
+    """Session-level advisory lock held on a dedicated connection.
+
+    The connection is detached from the pool, so closing it (or the process
+    dying) always ends the session and releases the lock.
+    """
+
+    def __init__(self, lock_id: int = SCHEDULER_LOCK_ID, bind=None):
+        self.lock_id = lock_id
+        self.bind = bind or engine
+        self.connection = None
+
+    @property
+    def held(self) -> bool:
+        return self.connection is not None
+
+    def try_acquire(self) -> bool:
+        """Take the lock if no other session holds it"""
+        if self.held:
+            return True
+        connection = self.bind.connect()
+        connection.detach()
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": self.lock_id}
+            ).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if acquired:
+            self.connection = connection
+        else:
+            connection.close()
+        return bool(acquired)
+
+    def check(self) -> bool:
+        """Whether the lock is still held; a broken connection means it was lost"""
+        if not self.held:
+            return False
+        try:
+            held = self.connection.execute(text(HELD_LOCK_SQL), {"lock_id": self.lock_id}).scalar()
+            self.connection.commit()
+        except Exception as e:
+            logger.warning(f"Lost the scheduler lock connection: {str(e)}")
+            held = False
+        if not held:
+            self._close()
+        return bool(held)
+
+    def release(self):
+        if not self.held:
+            return
+        try:
+            self.connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": self.lock_id})
+            self.connection.commit()
+        except Exception as e:
+            logger.warning(f"Error releasing the scheduler lock: {str(e)}")
+        finally:
+            self._close()
+
+    def _close(self):
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self.connection = None
+
+def _run_job(job, description: str):
+    """Run a blocking database job on its own session, logging failures"""
+    db = SessionLocal()
+    try:
+        job(db)
+    except Exception as e:
+        logger.error(f"Error {description}: {str(e)}")
+    finally:
+        db.close()
+
+def run_startup_jobs():
+    """Jobs the leader runs once when it takes over"""
+    # Make sure the upcoming monthly schedule partitions exist
+    _run_job(ensure_partitions, "creating schedule partitions")
+
+async def run_periodic_jobs():
+    """One round of the weather update and maintenance jobs.
+
+    The database jobs block, so they run in worker threads; the event loop
+    keeps serving requests and SSE streams meanwhile.
+    """
+    # A long-lived leader would otherwise run past the pre-created months
+    # and send every new row to the DEFAULT partition
+    await asyncio.to_thread(_run_job, ensure_partitions, "creating schedule partitions")
+
+    logger.info("Starting weather update")
+    db = SessionLocal()
+    try:
+        changed = await update_weather_cells(db)
+        logger.info("Weather update completed successfully")
+        # Generated occurrences shift with the new forecast on read; clients
+        # are told to refetch only when fresh forecasts arrived
+        if changed:
+            adjust_all_schedules_for_weather(db)
+            logger.info("Weather schedule adjustment completed")
+    except Exception as e:
+        logger.error(f"Error updating weather forecasts: {str(e)}")
+    finally:
+        db.close()
+
+    await asyncio.to_thread(_run_job, truncate_change_log, "truncating the sync change log")
+    await asyncio.to_thread(_run_job, prune_idempotency_keys, "pruning idempotency keys")
+    await asyncio.to_thread(_run_job, prune_weather_history, "pruning weather history")
+
+async def _sleep_while_leader(seconds: float, lock: Optional[LeaderLock]) -> bool:
+    """Sleep, checking the lock in between; False once leadership is lost"""
+    remaining = seconds
+    while remaining > 0:
+        step = min(remaining, settings.SCHEDULER_LOCK_CHECK_SECONDS)
+        await asyncio.sleep(step)
+        remaining -= step
+        if lock is not None and not await asyncio.to_thread(lock.check):
+            return False
+    return True
+
+async def update_weather_periodic(lock: Optional[LeaderLock] = None):
+    """Run the periodic jobs every WEATHER_UPDATE_INTERVAL seconds.
+
+    With a lock, returns as soon as the lock is lost.
+    """
     while True:
         try:
-            logger.info("Starting weather update")
-            db = SessionLocal()
-            try:
-                await update_weather_forecasts(db, settings.WEATHER_LOCATION)
-                logger.info("Weather update completed successfully")
-            except Exception as e:
-                logger.error(f"Error updating weather forecasts: {str(e)}")
-            finally:
-                db.close()
-            
-            # Sleep with cancellation handling
-            try:
-                await asyncio.sleep(settings.WEATHER_UPDATE_INTERVAL * 3600)  # Convert hours to seconds
-            except asyncio.CancelledError:
-                logger.info("Weather update task was cancelled")
-                raise
+            await run_periodic_jobs()
+            interval = settings.WEATHER_UPDATE_INTERVAL
         except asyncio.CancelledError:
             logger.info("Weather update task was cancelled")
             raise
         except Exception as e:
             logger.error(f"Unexpected error in weather update task: {str(e)}")
-            # Sleep for a shorter time on error
+            # Retry sooner on error
+            interval = 300
+
+        try:
+            if not await _sleep_while_leader(interval, lock):
+                logger.warning("Scheduler lock lost, stepping down")
+                return
+        except asyncio.CancelledError:
+            logger.info("Weather update task was cancelled")
+            raise
+
+async def run_scheduler():
+    """Elect a leader among the workers and run the jobs while leading"""
+    lock = LeaderLock()
+    try:
+        while True:
             try:
-                await asyncio.sleep(300)  # 5 minutes
+                if await asyncio.to_thread(lock.try_acquire):
+                    logger.info("This worker is now the scheduler leader")
+                    await asyncio.to_thread(run_startup_jobs)
+                    await update_weather_periodic(lock)
             except asyncio.CancelledError:
-                logger.info("Weather update task was cancelled")
                 raise
+            except Exception as e:
+                logger.error(f"Error in scheduler leader election: {str(e)}")
+                await asyncio.to_thread(lock.release)
+            await asyncio.sleep(settings.SCHEDULER_LEADER_RETRY_SECONDS)
+    finally:
+        lock.release()
 
 async def start_scheduler():
     """Start the background tasks"""
     try:
         # Add initial delay to ensure database is ready
         await asyncio.sleep(5)
-        
-        # Create and start the weather update task
-        weather_task = asyncio.create_task(update_weather_periodic())
+
+        # Every worker competes for leadership; only the leader runs the jobs
+        scheduler_task = asyncio.create_task(run_scheduler())
         logger.info("Scheduler started successfully")
-        return weather_task
+        return scheduler_task
     except Exception as e:
         logger.error(f"Error starting scheduler: {str(e)}")
         # Don't raise the error, just log it and return None
-        return None 
\ No newline at end of file
+        return None
@@ -11,7 +11,12 @@ import os
 import asyncio
 import logging
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.http_client import start_http_client, close_http_client
+from app.core.event_fanout import start_event_fanout
+from app.database import async_engine
 from app.routes.sections import router as sections_router
+from app.routes.sync import router as sync_router
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
@@ -36,6 +41,9 @@ ALLOWED_ORIGINS = [
     "http://localhost:10000",  # Render serve
 ]
 
+# Compress large JSON responses (gzip, or brotli/zstd when installed)
+app.add_middleware(CompressionMiddleware)
+
 # Add CORS middleware with explicit configuration
 app.add_middleware(
     CORSMiddleware,
@@ -48,6 +56,7 @@ app.add_middleware(
         "Authorization",
         "X-Requested-With",
         "ngrok-skip-browser-warning",
+        "Idempotency-Key",
         "Access-Control-Allow-Origin",
         "Access-Control-Allow-Headers",
         "Access-Control-Allow-Methods",
@@ -96,21 +105,27 @@ app.include_router(attracts.router, prefix="/api/attracts", tags=["attracts"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(weather_forecast.router, prefix="/api/weather", tags=["weather"])
 app.include_router(sections_router, prefix="/api/sections", tags=["sections"])
+app.include_router(sync_router, prefix="/api/sync", tags=["sync"])
 
 # Add root path handler
 @app.get("/")
 async def root():
     return {"message": "Plant Management API", "status": "healthy"}
 
-# Global variable to store the scheduler task
+# Global variables to store the background tasks
 scheduler_task = None
+event_fanout_task = None
 
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks on startup"""
-    global scheduler_task
+    global scheduler_task, event_fanout_task
     try:
         logger.info("Starting application...")
+        # Pooled client for weather provider calls, shared for the app's lifetime
+        await start_http_client()
+        # Schedule events reach SSE clients on every worker, not just the publisher's
+        event_fanout_task = start_event_fanout()
         # Start the scheduler and await the task
         scheduler_task = await start_scheduler()
         if scheduler_task:
@@ -136,7 +151,13 @@ async def health_check():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up background tasks on shutdown"""
-    global scheduler_task
+    global scheduler_task, event_fanout_task
+    if event_fanout_task:
+        event_fanout_task.cancel()
+        try:
+            await event_fanout_task
+        except asyncio.CancelledError:
+            pass
     if scheduler_task:
         try:
             # Cancel the task
@@ -147,5 +168,7 @@ async def shutdown_event():
             logger.info("Scheduler task cancelled successfully")
         except Exception as e:
             logger.error(f"Error cancelling scheduler task: {str(e)}")
+    await close_http_client()
+    await async_engine.dispose()
 
 #uvicorn app.main:app --reload
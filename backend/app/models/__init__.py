@@ -4,12 +4,19 @@ from app.models.plants import Plant
 from app.models.user_plants import UserPlant
 from app.models.watering import Watering
 from app.models.watering_schedule import WateringSchedule
+from app.models.watering_recurrence import WateringRecurrence
+from app.models.watering_history import WateringHistory
 from app.models.plant_guides import PlantGuide
 from app.models.pruning import Pruning
 from app.models.sunlight import Sunlight
 from app.models.attracts import Attracts
 from app.models.weather_forecast import WeatherForecast
+from app.models.weather_daily import WeatherDaily
+from app.models.weather_hourly import WeatherLocation, WeatherHourly
+from app.models.weather_ingest import WeatherIngest
 from app.models.sections import Section
+from app.models.idempotency_keys import IdempotencyKey
+from app.models.sync import SyncVersion, ChangeLogEntry
 
 # Export all models
 __all__ = [
@@ -19,10 +26,19 @@ __all__ = [
     "UserPlant",
     "Watering",
     "WateringSchedule",
+    "WateringRecurrence",
+    "WateringHistory",
     "PlantGuide",
     "Pruning",
     "Sunlight",
     "Attracts",
     "WeatherForecast",
-    "Section"
+    "WeatherDaily",
+    "WeatherLocation",
+    "WeatherHourly",
+    "WeatherIngest",
+    "Section",
+    "IdempotencyKey",
+    "SyncVersion",
+    "ChangeLogEntry"
 ]
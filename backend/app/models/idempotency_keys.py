@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime, JSON
+from app.database import Base
+from datetime import datetime
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)
+    scope = Column(String(255), nullable=False)  # e.g. "schedule:42" or "complete:batch"
+    response = Column(JSON, nullable=True)  # Stored result replayed on retries
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,82 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, UniqueConstraint, Index, DDL, event
+from app.database import Base
+from datetime import datetime
+
+# Tables whose row changes are recorded in the change log
+SYNC_TRACKED_TABLES = ("user_plants", "sections", "watering_schedules", "watering_recurrences")
+
+# Row trigger: bump the user's version once per transaction and log the row.
+# Tables without a user (or rows with user_id NULL) are not tracked.
+SYNC_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION record_sync_change() RETURNS trigger AS $$
+DECLARE
+    row_user integer;
+    row_id integer;
+    new_version bigint;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_user := OLD.user_id;
+        row_id := OLD.id;
+    ELSE
+        row_user := NEW.user_id;
+        row_id := NEW.id;
+    END IF;
+    IF row_user IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO sync_versions (user_id, version, truncated_through, last_txid)
+    VALUES (row_user, 1, 0, txid_current())
+    ON CONFLICT (user_id) DO UPDATE
+    SET version = CASE WHEN sync_versions.last_txid = txid_current()
+                       THEN sync_versions.version
+                       ELSE sync_versions.version + 1 END,
+        last_txid = txid_current()
+    RETURNING version INTO new_version;
+
+    INSERT INTO change_log (user_id, version, entity, entity_id, created_at)
+    VALUES (row_user, new_version, TG_ARGV[0], row_id, timezone('utc', now()))
+    ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+def sync_trigger_ddl(table: str) -> str:
+    """(Re)create the change trigger of a tracked table; create_all may run more than once"""
+    return (
+        f"DROP TRIGGER IF EXISTS {table}_sync_change ON {table}; "
+        f"CREATE TRIGGER {table}_sync_change AFTER INSERT OR UPDATE OR DELETE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION record_sync_change('{table}')"
+    )
+
+class SyncVersion(Base):
+    """Per-user change sequence for delta sync"""
+    __tablename__ = "sync_versions"
+
+    user_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    truncated_through = Column(BigInteger, nullable=False, default=0)  # Highest version removed from change_log
+    last_txid = Column(BigInteger, nullable=True)  # Transaction that last bumped the version
+
+class ChangeLogEntry(Base):
+    """A row of a tracked table that changed at a user's version"""
+    __tablename__ = "change_log"
+
+    id = Column(BigInteger, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    version = Column(BigInteger, nullable=False)
+    entity = Column(String(64), nullable=False)  # Table name
+    entity_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'version', 'entity', 'entity_id', name='change_log_user_version_entity_key'),
+        Index('idx_change_log_user_version', 'user_id', 'version'),
+    )
+
+# Install the triggers once every table exists (create_all in tests and
+# local setups; production gets them from the add_delta_sync migration)
+event.listen(Base.metadata, "after_create", DDL(SYNC_TRIGGER_FUNCTION))
+for _table in SYNC_TRACKED_TABLES:
+    event.listen(Base.metadata, "after_create", DDL(sync_trigger_ddl(_table)))
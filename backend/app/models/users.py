@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -10,6 +10,9 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
+    latitude = Column(Float, nullable=True)  # Garden coordinates
+    longitude = Column(Float, nullable=True)
+    weather_location = Column(String(64), nullable=True, index=True)  # Forecast grid cell key, see weather_locations
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Date, Float, DateTime, ForeignKey, UniqueConstraint, Index
+from app.database import Base
+from datetime import datetime
+
+class WateringHistory(Base):
+    """Daily watering totals per plant, kept up to date on completion.
+
+    History queries read this table instead of scanning watering_schedules,
+    and it outlives archived schedule partitions.
+    """
+    __tablename__ = "watering_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    plant_id = Column(Integer, ForeignKey("plants.id", ondelete="CASCADE"), nullable=False)
+    section = Column(String, nullable=True)  # Garden section at the time of the last update
+    day = Column(Date, nullable=False)
+    planned = Column(Integer, nullable=False, default=0)  # Occurrences recorded for the day
+    completed = Column(Integer, nullable=False, default=0)
+    volume = Column(Float, nullable=False, default=0)  # Volume watered, in the plant's volume unit
+    weather_adjusted = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'plant_id', 'day', name='watering_history_user_id_plant_id_day_key'),
+        Index('idx_watering_history_user_day', 'user_id', 'day'),
+    )
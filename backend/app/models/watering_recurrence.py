@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, UniqueConstraint
+from app.database import Base
+from datetime import datetime
+
+class WateringRecurrence(Base):
+    """Recurring watering rule for one plant in a user's garden.
+
+    Occurrences are expanded on read: anchor_date, anchor_date + interval, ...
+    Only completions and exceptions are stored in watering_schedules.
+    """
+    __tablename__ = "watering_recurrences"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    plant_id = Column(Integer, ForeignKey("plants.id", ondelete="CASCADE"), nullable=False)
+    anchor_date = Column(Date, nullable=False)  # Base date of the next due occurrence
+    interval_days = Column(Integer, nullable=True)  # Overrides the plant's watering frequency
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'plant_id', name='watering_recurrence_user_id_plant_id_key'),
+    )
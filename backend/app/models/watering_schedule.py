@@ -1,15 +1,25 @@
-from sqlalchemy import Column, Integer, Date, Boolean, Float, DateTime, ForeignKey, UniqueConstraint, String, Index
+from sqlalchemy import Column, Integer, Date, Boolean, Float, DateTime, ForeignKey, UniqueConstraint, String, Index, DDL, event
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import date, datetime
 
+def _default_base_date(context):
+    """Default the unadjusted base date to the scheduled date on insert"""
+    return context.get_current_parameters().get("scheduled_date")
+
 class WateringSchedule(Base):
+    """A completed or explicitly stored watering occurrence.
+
+    The table is range partitioned by month on scheduled_date (see
+    app.services.schedule_partitions), so the primary key includes it.
+    """
     __tablename__ = "watering_schedules"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     plant_id = Column(Integer, ForeignKey("plants.id"), nullable=False, index=True)
-    scheduled_date = Column(Date, nullable=False, index=True)
+    scheduled_date = Column(Date, primary_key=True, nullable=False, index=True)
+    base_date = Column(Date, nullable=True, default=_default_base_date)  # Date before any weather adjustment
     completion_timestamp = Column(DateTime, nullable=True)
     water_needed = Column(Boolean, default=True)
     volume_needed = Column(Float, nullable=True)
@@ -28,10 +38,26 @@ class WateringSchedule(Base):
         Index('idx_user_scheduled_date', 'user_id', 'scheduled_date'),
         Index('idx_user_plant_scheduled', 'user_id', 'plant_id', 'scheduled_date'),
         Index('idx_completion_status', 'user_id', 'scheduled_date', 'water_needed'),
+        Index('idx_user_base_date', 'user_id', 'base_date'),
         UniqueConstraint('user_id', 'plant_id', 'scheduled_date', 
                         name='watering_schedule_user_id_plant_id_scheduled_date_key'),
+        # Partitioned tables need the partition key in every unique constraint
+        UniqueConstraint('user_id', 'plant_id', 'base_date', 'scheduled_date',
+                        name='watering_schedule_user_id_plant_id_base_date_key'),
+        {"postgresql_partition_by": "RANGE (scheduled_date)"},
     )
 
+    # Rows are identified by id alone; scheduled_date is only part of the
+    # database key because partitioned tables require it
+    __mapper_args__ = {"primary_key": [id]}
+
     # Relationships
     user = relationship("User", back_populates="watering_schedules")
     plant = relationship("Plant", back_populates="watering_schedules")
+
+# Rows outside the monthly partitions land here until a partition is created
+event.listen(
+    WateringSchedule.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS watering_schedules_default PARTITION OF watering_schedules DEFAULT")
+)
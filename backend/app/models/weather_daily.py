@@ -0,0 +1,143 @@
+from sqlalchemy import Column, Integer, String, Date, Float, DateTime, PrimaryKeyConstraint, DDL, event
+from app.database import Base
+from datetime import datetime
+
+# Shared pieces of the rollup upserts. The aggregates read hours from a
+# relation aliased h (temperature, precipitation, wind_speed) and follow
+# the location, day and hours columns.
+WEATHER_DAILY_COLUMNS = """
+    (location, day, hours, temperature_mean, temperature_min, temperature_max,
+     precipitation_mean, precipitation_sum, wind_speed_mean, wind_speed_max, icon, updated_at)
+"""
+
+WEATHER_DAILY_AGGREGATES = """
+           AVG(h.temperature),
+           MIN(h.temperature),
+           MAX(h.temperature),
+           AVG(h.precipitation),
+           SUM(h.precipitation),
+           AVG(h.wind_speed),
+           MAX(h.wind_speed),
+           CASE WHEN AVG(h.precipitation) > 0 THEN 'rainy'
+                WHEN AVG(h.temperature) > 25 THEN 'hot'
+                WHEN AVG(h.temperature) < 10 THEN 'cold'
+                WHEN AVG(h.wind_speed) > 15 THEN 'windy'
+                ELSE 'sunny' END,
+           timezone('utc', now())
+"""
+
+WEATHER_DAILY_CONFLICT = """
+    ON CONFLICT (location, day) DO UPDATE
+    SET hours = EXCLUDED.hours,
+        temperature_mean = EXCLUDED.temperature_mean,
+        temperature_min = EXCLUDED.temperature_min,
+        temperature_max = EXCLUDED.temperature_max,
+        precipitation_mean = EXCLUDED.precipitation_mean,
+        precipitation_sum = EXCLUDED.precipitation_sum,
+        wind_speed_mean = EXCLUDED.wind_speed_mean,
+        wind_speed_max = EXCLUDED.wind_speed_max,
+        icon = EXCLUDED.icon,
+        updated_at = EXCLUDED.updated_at
+"""
+
+# Statement trigger: recompute the daily rows of every (location, day) the
+# statement touched, in the writer's transaction. One bulk upsert of a
+# week of hours refreshes its seven days once, not once per hour. Days
+# whose hours were all deleted drop out of the rollup, unless the retention
+# job deletes them in downsample mode.
+WEATHER_DAILY_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION refresh_weather_daily() RETURNS trigger AS $$
+DECLARE
+    key_locations text[];
+    key_days date[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(location), array_agg(day) INTO key_locations, key_days
+        FROM (SELECT DISTINCT location, CAST(timestamp AS DATE) AS day FROM new_rows) AS k;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(location), array_agg(day) INTO key_locations, key_days
+        FROM (
+            SELECT location, CAST(timestamp AS DATE) AS day FROM new_rows
+            UNION
+            SELECT location, CAST(timestamp AS DATE) AS day FROM old_rows
+        ) AS k;
+    ELSE
+        -- Retention in downsample mode keeps the days of the removed hours
+        IF current_setting('weather.retention', true) = 'downsample' THEN
+            RETURN NULL;
+        END IF;
+        SELECT array_agg(location), array_agg(day) INTO key_locations, key_days
+        FROM (SELECT DISTINCT location, CAST(timestamp AS DATE) AS day FROM old_rows) AS k;
+    END IF;
+    IF key_locations IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO weather_daily {WEATHER_DAILY_COLUMNS.strip()}
+    SELECT k.location,
+           k.day,
+           COUNT(*),
+           {WEATHER_DAILY_AGGREGATES.strip()}
+    FROM unnest(key_locations, key_days) AS k(location, day)
+    JOIN weather_forecast AS h
+        ON h.location = k.location AND h.timestamp >= k.day AND h.timestamp < k.day + 1
+    GROUP BY k.location, k.day
+    {WEATHER_DAILY_CONFLICT.strip()};
+
+    DELETE FROM weather_daily AS d
+    USING unnest(key_locations, key_days) AS k(location, day)
+    WHERE d.location = k.location AND d.day = k.day
+      AND NOT EXISTS (
+          SELECT 1 FROM weather_forecast AS h
+          WHERE h.location = k.location AND h.timestamp >= k.day AND h.timestamp < k.day + 1
+      );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Transition tables allow a single event per trigger
+WEATHER_DAILY_TRIGGERS = """
+DROP TRIGGER IF EXISTS weather_daily_insert ON weather_forecast;
+DROP TRIGGER IF EXISTS weather_daily_update ON weather_forecast;
+DROP TRIGGER IF EXISTS weather_daily_delete ON weather_forecast;
+CREATE TRIGGER weather_daily_insert AFTER INSERT ON weather_forecast
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_weather_daily();
+CREATE TRIGGER weather_daily_update AFTER UPDATE ON weather_forecast
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_weather_daily();
+CREATE TRIGGER weather_daily_delete AFTER DELETE ON weather_forecast
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_weather_daily();
+"""
+
+class WeatherDaily(Base):
+    """Daily weather per forecast location, kept up to date by the hourly writes.
+
+    Schedule logic reads this table instead of averaging weather_forecast
+    hours on every request.
+    """
+    __tablename__ = "weather_daily"
+
+    location = Column(String(255), nullable=False)
+    day = Column(Date, nullable=False)
+    hours = Column(Integer, nullable=False, default=0)  # Forecast hours behind the aggregate
+    temperature_mean = Column(Float)
+    temperature_min = Column(Float)
+    temperature_max = Column(Float)
+    precipitation_mean = Column(Float)  # Hourly mean, the scale the adjustment rules use
+    precipitation_sum = Column(Float)
+    wind_speed_mean = Column(Float)
+    wind_speed_max = Column(Float)
+    icon = Column(String(16))  # rainy, hot, cold, windy or sunny
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('location', 'day', name='weather_daily_pkey'),
+    )
+
+# Install the triggers once every table exists (create_all in tests and
+# local setups; production gets them from the add_weather_daily migration)
+event.listen(Base.metadata, "after_create", DDL(WEATHER_DAILY_FUNCTION))
+event.listen(Base.metadata, "after_create", DDL(WEATHER_DAILY_TRIGGERS))
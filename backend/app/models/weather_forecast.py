@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, Float, String, DateTime, UniqueConstraint, Index
 from app.database import Base
 
 class WeatherForecast(Base):
@@ -13,4 +13,5 @@ class WeatherForecast(Base):
 
     __table_args__ = (
         UniqueConstraint('timestamp', 'location', name='unique_weather'),
+        Index('idx_weather_forecast_location_timestamp', 'location', 'timestamp'),
     ) 
\ No newline at end of file
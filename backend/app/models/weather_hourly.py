@@ -0,0 +1,76 @@
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, PrimaryKeyConstraint, DDL, event
+from sqlalchemy.dialects.postgresql import ARRAY, REAL
+from app.database import Base
+from app.models.weather_daily import WEATHER_DAILY_COLUMNS, WEATHER_DAILY_AGGREGATES, WEATHER_DAILY_CONFLICT
+
+HOURS_PER_DAY = 24
+
+# Row trigger: a compact row is a whole location-day, so its rollup row is
+# recomputed from the row's own arrays (and kept when the retention job
+# deletes it in downsample mode)
+WEATHER_HOURLY_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION refresh_weather_daily_compact() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        IF current_setting('weather.retention', true) = 'downsample' THEN
+            RETURN NULL;
+        END IF;
+        DELETE FROM weather_daily AS d
+        USING weather_locations AS l
+        WHERE l.id = OLD.location_id AND d.location = l.location AND d.day = OLD.day;
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO weather_daily {WEATHER_DAILY_COLUMNS.strip()}
+    SELECT l.location,
+           NEW.day,
+           COUNT(*) FILTER (
+               WHERE h.temperature IS NOT NULL OR h.precipitation IS NOT NULL OR h.wind_speed IS NOT NULL
+           ),
+           {WEATHER_DAILY_AGGREGATES.strip()}
+    FROM weather_locations AS l,
+         unnest(NEW.temperature, NEW.precipitation, NEW.wind_speed) AS h(temperature, precipitation, wind_speed)
+    WHERE l.id = NEW.location_id
+    GROUP BY l.location
+    {WEATHER_DAILY_CONFLICT.strip()};
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+WEATHER_HOURLY_TRIGGER = """
+DROP TRIGGER IF EXISTS weather_hourly_daily ON weather_hourly;
+CREATE TRIGGER weather_hourly_daily AFTER INSERT OR UPDATE OR DELETE ON weather_hourly
+    FOR EACH ROW EXECUTE FUNCTION refresh_weather_daily_compact();
+"""
+
+class WeatherLocation(Base):
+    """Forecast location key, referenced by id from compact forecast rows"""
+    __tablename__ = "weather_locations"
+
+    id = Column(Integer, primary_key=True)
+    location = Column(String(255), nullable=False, unique=True)
+
+class WeatherHourly(Base):
+    """Compact forecast storage: one row per location and day.
+
+    Each array holds HOURS_PER_DAY values indexed by the hour of the day,
+    NULL where the provider sent nothing. Used instead of weather_forecast
+    rows when WEATHER_STORAGE is "compact".
+    """
+    __tablename__ = "weather_hourly"
+
+    location_id = Column(Integer, ForeignKey("weather_locations.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    temperature = Column(ARRAY(REAL), nullable=False)
+    precipitation = Column(ARRAY(REAL), nullable=False)
+    wind_speed = Column(ARRAY(REAL), nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('location_id', 'day', name='weather_hourly_pkey'),
+    )
+
+# Install the trigger once every table exists (create_all in tests and
+# local setups; production gets it from the add_weather_hourly migration)
+event.listen(Base.metadata, "after_create", DDL(WEATHER_HOURLY_FUNCTION))
+event.listen(Base.metadata, "after_create", DDL(WEATHER_HOURLY_TRIGGER))
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+
+class WeatherIngest(Base):
+    """Last successful provider check per forecast location.
+
+    Written on every successful fetch, including ones that found nothing
+    new, so freshness checks read one row instead of scanning forecasts.
+    """
+    __tablename__ = "weather_ingest"
+
+    location = Column(String(255), primary_key=True)
+    ingested_at = Column(DateTime(timezone=True), nullable=False)
@@ -2,12 +2,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.plants import Plant as DBPlant
 from app.models.attracts import Attracts
 from app.models.sunlight import Sunlight
-from sqlalchemy import or_, func, Index, text
+from sqlalchemy import or_, func, Index, text, select
 from app.services import plant_service
 from app.schemas.plants import (
     Plant, 
@@ -22,6 +23,8 @@ from app.models.user_plants import UserPlant
 from sqlalchemy import Text
 import threading
 from app.scripts.initialize_watering_schedules import sync_watering_schedules
+from app.core import events
+from app.core.events import schedule_events
 from functools import lru_cache
 from datetime import datetime, timedelta
 from pydantic import BaseModel
@@ -54,12 +57,12 @@ def set_cached_user_plants(user_id: int, plants: set):
 async def search_plants(
     query: Optional[str] = Query(None),
     user_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Search endpoint that checks common_name, scientific_name, other_names, and type"""
     try:
         # Start with a base query that includes only necessary columns
-        search_query = db.query(
+        search_query = select(
             DBPlant.id,
             DBPlant.common_name,
             DBPlant.scientific_name,
@@ -71,7 +74,7 @@ async def search_plants(
         if query:
             search_term = f"%{query}%"
             # Use ILIKE for string fields and proper ANY syntax for array fields
-            search_query = search_query.filter(
+            search_query = search_query.where(
                 or_(
                     DBPlant.common_name.ilike(search_term),
                     DBPlant.type.ilike(search_term),
@@ -85,16 +88,13 @@ async def search_plants(
         if user_id:
             user_plants = get_cached_user_plants(user_id)
             if user_plants is None:
-                user_plants = {
-                    plant_id[0] for plant_id in 
-                    db.query(UserPlant.plant_id)
-                    .filter(UserPlant.user_id == user_id)
-                    .all()
-                }
+                user_plants = set((await db.execute(
+                    select(UserPlant.plant_id).where(UserPlant.user_id == user_id)
+                )).scalars().all())
                 set_cached_user_plants(user_id, user_plants)
         
         # Execute the query with a limit
-        plants = search_query.limit(20).all()
+        plants = (await db.execute(search_query.limit(20))).all()
         
         print(f"Query: {query}")
         print(f"Number of plants found: {len(plants)}")
@@ -238,6 +238,7 @@ def add_plant_to_garden(
     
         # Trigger watering schedule sync in background
         threading.Thread(target=sync_watering_schedules).start()
+        schedule_events.publish(user_id, events.PLANT_ADDED, plant_ids=[plant_id])
 
         return {
             "id": plant.id,
@@ -365,18 +366,18 @@ def remove_plant_from_garden(
 
     # Trigger watering schedule sync in background
     threading.Thread(target=sync_watering_schedules).start()
+    schedule_events.publish(user_id, events.PLANT_REMOVED, plant_ids=[plant_id])
 
     return {"status": "success"}
 
 @router.get("/basic-search")  # New URL path
 async def basic_search(
     query: str = Query(...),  # Make query required
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        search_query = db.query(DBPlant)
-        search_query = search_query.filter(DBPlant.common_name.ilike(f"%{query}%"))
-        plants = search_query.all()
+        search_query = select(DBPlant).where(DBPlant.common_name.ilike(f"%{query}%"))
+        plants = (await db.execute(search_query)).scalars().all()
         
         return {
             "items": [
@@ -399,15 +400,17 @@ async def update_plant_section(
     user_id: int,
     plant_id: int,
     section: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update the section of a plant in user's garden"""
     print(f"Updating section for plant {plant_id} to {section}")  # Debug log
     
-    user_plant = db.query(UserPlant).filter(
-        UserPlant.user_id == user_id,
-        UserPlant.plant_id == plant_id
-    ).first()
+    user_plant = (await db.execute(
+        select(UserPlant).where(
+            UserPlant.user_id == user_id,
+            UserPlant.plant_id == plant_id
+        ).limit(1)
+    )).scalars().first()
     
     if not user_plant:
         raise HTTPException(status_code=404, detail="Plant not found in garden")
@@ -420,12 +423,13 @@ async def update_plant_section(
     user_plant.section = section_value
     
     try:
-        db.commit()
-        db.refresh(user_plant)
+        await db.commit()
+        await db.refresh(user_plant)
         print(f"Updated section in DB: {user_plant.section}")  # Debug log
+        schedule_events.publish(user_id, events.PLANT_MOVED, plant_ids=[plant_id], section=user_plant.section)
         return {"status": "success", "section": user_plant.section}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error updating section: {str(e)}")  # Debug log
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -443,13 +447,13 @@ class PlantFilter(BaseModel):
 @router.post("/filtered")
 async def get_filtered_plants(
     filter: PlantFilter,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get plants filtered by various criteria"""
     try:
         print(f"Received filter parameters: {filter.dict()}")
         
-        query = db.query(DBPlant).options(
+        query = select(DBPlant).options(
             joinedload(DBPlant.attracts),
             joinedload(DBPlant.sunlight_info)
         )
@@ -457,33 +461,34 @@ async def get_filtered_plants(
         # Apply filters
         if filter.attracts:
             print(f"Filtering by attracts: {filter.attracts}")
-            query = query.filter(DBPlant.attracts.any(Attracts.species.in_(filter.attracts)))
+            query = query.where(DBPlant.attracts.any(Attracts.species.in_(filter.attracts)))
         if filter.type:
             print(f"Filtering by type: {filter.type}")
-            query = query.filter(DBPlant.type == filter.type)
+            query = query.where(DBPlant.type == filter.type)
         if filter.growth_rate:
             print(f"Filtering by growth_rate: {filter.growth_rate}")
-            query = query.filter(DBPlant.growth_rate == filter.growth_rate)
+            query = query.where(DBPlant.growth_rate == filter.growth_rate)
         if filter.maintenance:
             print(f"Filtering by maintenance: {filter.maintenance}")
-            query = query.filter(DBPlant.maintenance == filter.maintenance)
+            query = query.where(DBPlant.maintenance == filter.maintenance)
         if filter.cycle:
             print(f"Filtering by cycle: {filter.cycle}")
-            query = query.filter(DBPlant.cycle == filter.cycle)
+            query = query.where(DBPlant.cycle == filter.cycle)
         if filter.watering:
             print(f"Filtering by watering: {filter.watering}")
-            query = query.filter(DBPlant.watering == filter.watering)
+            query = query.where(DBPlant.watering == filter.watering)
         if filter.sunlight:
             print(f"Filtering by sunlight: {filter.sunlight}")
-            query = query.filter(DBPlant.sunlight_info.any(Sunlight.condition.in_(filter.sunlight)))
+            query = query.where(DBPlant.sunlight_info.any(Sunlight.condition.in_(filter.sunlight)))
         if filter.is_evergreen is not None:
             print(f"Filtering by is_evergreen: {filter.is_evergreen}")
-            query = query.filter(DBPlant.is_evergreen == filter.is_evergreen)
+            query = query.where(DBPlant.is_evergreen == filter.is_evergreen)
         if filter.edible_fruit is not None:
             print(f"Filtering by edible_fruit: {filter.edible_fruit}")
-            query = query.filter(DBPlant.edible_fruit == filter.edible_fruit)
+            query = query.where(DBPlant.edible_fruit == filter.edible_fruit)
 
-        plants = query.all()
+        # Joined eager loads of collections repeat the parent rows
+        plants = (await db.execute(query)).unique().scalars().all()
         print(f"Found {len(plants)} plants matching the criteria")
         
         # Serialize the plants with their relationships
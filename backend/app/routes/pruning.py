@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.services import pruning as pruning_service
 from app.schemas.pruning import Pruning as PruningSchema, PruningCreate
-from app.database import get_db
-from sqlalchemy import and_
+from app.database import get_db, get_async_db
+from sqlalchemy import and_, select
 from app.models.user_plants import UserPlant
 from app.models.plants import Plant
 from app.models.pruning import Pruning
@@ -70,7 +71,7 @@ def delete_pruning(pruning_id: int, db: Session = Depends(get_db)):
     return {"message": "Pruning deleted successfully"}
 
 @router.get("/schedule/{user_id}")
-async def get_pruning_schedule(user_id: int, db: Session = Depends(get_db)):
+async def get_pruning_schedule(user_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
         print("\n=== DEBUG: Pruning Schedule Data Flow ===")
         
@@ -91,11 +92,9 @@ async def get_pruning_schedule(user_id: int, db: Session = Depends(get_db)):
         }
 
         # 1. Get ALL user plants (including unassigned)
-        user_plants = (
-            db.query(UserPlant)
-            .filter(UserPlant.user_id == user_id)
-            .all()
-        )
+        user_plants = (await db.execute(
+            select(UserPlant).where(UserPlant.user_id == user_id)
+        )).scalars().all()
         print(f"\n1. All user plants: {[{'plant_id': up.plant_id, 'section': up.section} for up in user_plants]}")
 
         if not user_plants:
@@ -104,19 +103,15 @@ async def get_pruning_schedule(user_id: int, db: Session = Depends(get_db)):
 
         # 2. Get pruning data for all plants
         plant_ids = [up.plant_id for up in user_plants]
-        pruning_records = (
-            db.query(Pruning)
-            .filter(Pruning.plant_id.in_(plant_ids))
-            .all()
-        )
+        pruning_records = (await db.execute(
+            select(Pruning).where(Pruning.plant_id.in_(plant_ids))
+        )).scalars().all()
         print(f"\n2. Pruning records found: {[{'plant_id': p.plant_id, 'months': p.months} for p in pruning_records]}")
 
         # 3. Get plant names
-        plants = (
-            db.query(Plant)
-            .filter(Plant.id.in_(plant_ids))
-            .all()
-        )
+        plants = (await db.execute(
+            select(Plant).where(Plant.id.in_(plant_ids))
+        )).scalars().all()
         plant_names = {p.id: p.common_name for p in plants}
         plant_images = {p.id: p.image_url for p in plants}
         print(f"\n3. Plant names: {plant_names}")
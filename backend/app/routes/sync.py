@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.schemas.sync import SyncResponse
+from app.services.sync import get_changes_since
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/{user_id}", response_model=SyncResponse)
+def sync_changes(
+    user_id: int,
+    since: int = Query(0, ge=0, description="Version returned by the previous sync"),
+    db: Session = Depends(get_db)
+):
+    """Garden and schedule rows changed since a version, or a full resync marker"""
+    try:
+        result = get_changes_since(db, user_id, since)
+        logger.info(f"Sync for user {user_id} from version {since} to {result['version']} (resync={result['resync']})")
+        return result
+    except Exception as e:
+        logger.error(f"Error syncing changes for user {user_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from app.services import users as user_service
-from app.schemas.users import User, UserCreate, UserWithPlants, UserPlantAdd
+from app.schemas.users import User, UserCreate, UserWithPlants, UserPlantAdd, UserLocation
 from app.schemas.plants import Plant
 from app.database import get_db
 from fastapi.exceptions import ResponseValidationError
@@ -26,6 +26,13 @@ def read_user(user_id: int, db: Session = Depends(get_db)):
     except ResponseValidationError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.put("/{user_id}/location", response_model=User)
+def set_user_location(user_id: int, location: UserLocation, db: Session = Depends(get_db)):
+    db_user = user_service.set_user_location(db, user_id, location.latitude, location.longitude)
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return db_user
+
 @router.post("/{user_id}/plants")
 def add_plant_to_user(user_id: int, plant: UserPlantAdd, db: Session = Depends(get_db)):
     return user_service.add_plant_to_user(db, user_id, plant.plant_id)
@@ -1,18 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, timedelta, datetime
 from app.services import watering_schedule as schedule_service
+from app.services import watering_history as history_service
+from app.services import schedule_simulation as simulation_service
 from app.schemas.watering_schedule import (
     WateringSchedule as WateringScheduleSchema,
     WateringScheduleCreate,
     WateringScheduleUpdate,
+    WateringScheduleBatchComplete,
+    WateringScheduleBatchResult,
+    WateringHistoryResponse,
     WateringScheduleResponse,
-    WateringScheduleOverview
+    WateringScheduleOverview,
+    WateringScheduleOverviewV2,
+    SimulationRequest,
+    SimulationResponse
 )
 from app.database import get_db
+from app.core.config import settings
+from app.core.events import schedule_events, format_sse
+import asyncio
 import logging
-from app.models.watering_schedule import WateringSchedule
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -61,13 +72,88 @@ def read_upcoming_schedules(
 ):
     return schedule_service.get_upcoming_schedules(db, user_id, days)
 
+@router.get("/user/{user_id}/events")
+async def stream_schedule_events(user_id: int, request: Request):
+    """Server-sent events announcing changes to a user's schedule.
+
+    Events are small ({"id", "type", "plant_ids", ...}); clients refetch or
+    patch their local copy when one arrives instead of polling.
+    """
+    async def event_stream():
+        async with schedule_events.subscribe(user_id) as queue:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/user/{user_id}/history", response_model=WateringHistoryResponse)
+def read_watering_history(
+    user_id: int,
+    granularity: str = Query(default="week", pattern="^(day|week|month)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    section: Optional[str] = None,
+    plant_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Planned vs completed waterings per day, ISO week or month (defaults to the last 90 days)"""
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=90)
+    try:
+        periods = history_service.get_watering_history(
+            db, user_id, date_from, date_to, granularity, section, plant_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting watering history: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting watering history: {str(e)}"
+        )
+    return {
+        "granularity": granularity,
+        "date_from": date_from,
+        "date_to": date_to,
+        "periods": periods
+    }
+
+@router.post("/complete:batch", response_model=WateringScheduleBatchResult)
+def complete_schedules_batch(
+    batch: WateringScheduleBatchComplete,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
+    """Mark several schedules as watered in one request (e.g. a whole section)"""
+    try:
+        return schedule_service.complete_schedules_batch(db, batch, idempotency_key)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error completing schedules in batch: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error completing schedules: {str(e)}"
+        )
+
 @router.put("/{schedule_id}", response_model=WateringScheduleSchema)
 def update_schedule(
     schedule_id: int,
     schedule_update: WateringScheduleUpdate,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
     db: Session = Depends(get_db)
 ):
-    db_schedule = schedule_service.update_schedule(db, schedule_id, schedule_update)
+    db_schedule = schedule_service.update_schedule(db, schedule_id, schedule_update, idempotency_key)
     if not db_schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
     return db_schedule
@@ -79,11 +165,27 @@ def delete_schedule(schedule_id: int, db: Session = Depends(get_db)):
     return {"message": "Schedule deleted successfully"}
 
 @router.get("/watering-schedule/user/{user_id}", response_model=WateringScheduleOverview)
-def get_watering_schedule_overview(user_id: int, db: Session = Depends(get_db)):
-    """Get watering schedule overview with weather adjustments"""
+def get_watering_schedule_overview(
+    user_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    days: Optional[int] = Query(default=None, ge=1, le=settings.SCHEDULE_MAX_DAYS),
+    db: Session = Depends(get_db)
+):
+    """Get watering schedule overview with weather adjustments.
+
+    The window defaults to SCHEDULE_DEFAULT_DAYS from today; pass `days=1` for a
+    today-only view or `date_from`/`date_to` for an explicit range.
+    """
     try:
         logger.info(f"Getting watering schedule for user {user_id}")
-        schedule = schedule_service.get_watering_schedule(db, user_id)
+        _, window_days = schedule_service.resolve_schedule_window(date_from, date_to, days)
+        schedule = schedule_service.get_watering_schedule(
+            db,
+            user_id,
+            date_from.isoformat() if date_from else None,
+            window_days
+        )
         if not schedule:
             return {
                 "schedule": [],
@@ -100,6 +202,28 @@ def get_watering_schedule_overview(user_id: int, db: Session = Depends(get_db)):
             detail={"error": "Internal server error", "message": str(e)}
         )
 
+@router.get("/v2/user/{user_id}", response_model=WateringScheduleOverviewV2)
+def get_watering_schedule_overview_v2(
+    user_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    days: Optional[int] = Query(default=None, ge=1, le=settings.SCHEDULE_MAX_DAYS),
+    db: Session = Depends(get_db)
+):
+    """Compact schedule overview: plant details once, then [plant_id, flags] per day and section"""
+    try:
+        start_date, window_days = schedule_service.resolve_schedule_window(date_from, date_to, days)
+        return schedule_service.get_compact_watering_schedule(db, user_id, start_date, window_days)
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting compact watering schedule: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Internal server error", "message": str(e)}
+        )
+
 @router.post("/watering/schedule/{user_id}/plant/{plant_id}", response_model=WateringScheduleResponse)
 def create_plant_schedule(user_id: int, plant_id: int, db: Session = Depends(get_db)):
     """Create a new watering schedule for a plant"""
@@ -111,221 +235,27 @@ def create_plant_schedule(user_id: int, plant_id: int, db: Session = Depends(get
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/user/{user_id}/test", response_model=WateringScheduleOverview)
-def get_watering_schedule_test(user_id: int, db: Session = Depends(get_db)):
-    """Get watering schedule with mock weather data for testing weather adjustments"""
+@router.post("/user/{user_id}/simulate", response_model=SimulationResponse)
+def simulate_watering_schedule(user_id: int, request: SimulationRequest, db: Session = Depends(get_db)):
+    """Adjusted schedules for synthetic weather scenarios, computed without writing anything"""
     try:
-        logger.info(f"Getting test watering schedule for user {user_id}")
-        schedule = schedule_service.get_watering_schedule(db, user_id)
-        if not schedule:
-            return {
-                "schedule": [],
-                "last_updated": datetime.utcnow().isoformat()
-            }
-
-        # Add mock weather data for the next day (high temperature)
-        tomorrow = (datetime.utcnow() + timedelta(days=1)).date().isoformat()
-        
-        # First, add weather data to all days
-        for day in schedule["schedule"]:
-            if day["date"] == tomorrow:
-                # Add hot weather data for tomorrow
-                day["weather"] = {
-                    "temperature": 35.0,  # High temperature
-                    "precipitation": 0.0,
-                    "wind_speed": 5.0,
-                    "weather_icons": ["hot"]  # Include weather icons in the weather object
-                }
-            else:
-                # Add normal weather data for other days
-                day["weather"] = {
-                    "temperature": 20.0,
-                    "precipitation": 0.0,
-                    "wind_speed": 5.0,
-                    "weather_icons": ["sunny"]  # Include weather icons in the weather object
-                }
-            # Remove the separate weather_icons field
-            if "weather_icons" in day:
-                del day["weather_icons"]
-
-        # Then, adjust all future schedules
-        adjusted_plants = []  # Keep track of adjusted plants
-        for day in schedule["schedule"]:
-            current_date = datetime.fromisoformat(day["date"]).date()
-            if current_date >= datetime.fromisoformat(tomorrow).date():
-                for section in day["sections"]:
-                    for group in section["groups"]:
-                        for plant in group["plants"]:
-                            # Get the actual schedule from the database
-                            db_schedule = db.query(WateringSchedule).filter(
-                                WateringSchedule.user_id == user_id,
-                                WateringSchedule.plant_id == plant["plant_id"],
-                                WateringSchedule.scheduled_date == current_date
-                            ).first()
-                            
-                            if db_schedule and not db_schedule.weather_adjusted:  # Only adjust if not already adjusted
-                                # Calculate adjusted date (one day earlier)
-                                original_date = db_schedule.scheduled_date
-                                adjusted_date = db_schedule.scheduled_date - timedelta(days=1)
-                                
-                                # Check if a schedule already exists for the adjusted date
-                                existing_schedule = db.query(WateringSchedule).filter(
-                                    WateringSchedule.user_id == user_id,
-                                    WateringSchedule.plant_id == plant["plant_id"],
-                                    WateringSchedule.scheduled_date == adjusted_date
-                                ).first()
-                                
-                                if not existing_schedule:
-                                    # Create a new schedule for the adjusted date
-                                    new_schedule = WateringSchedule(
-                                        user_id=user_id,
-                                        plant_id=plant["plant_id"],
-                                        scheduled_date=adjusted_date,
-                                        water_needed=True,
-                                        volume_needed=db_schedule.volume_needed,
-                                        weather_dependent=True,
-                                        completed=False,
-                                        weather_adjusted=True,
-                                        frequency_days=db_schedule.frequency_days,
-                                        depth_mm=db_schedule.depth_mm,
-                                        volume_feet=db_schedule.volume_feet
-                                    )
-                                    
-                                    # Delete the original schedule
-                                    db.delete(db_schedule)
-                                    db.add(new_schedule)
-                                    db.commit()
-                                    
-                                    # Update the plant data to reflect the adjustment
-                                    plant["weather_adjusted"] = True
-                                    plant["weather_info"] = {
-                                        "is_adjusted": True,
-                                        "original_date": original_date.isoformat()
-                                    }
-                                    plant["next_watering"] = adjusted_date.isoformat()
-
-        # Override any weather data from the database with our mock data
-        for day in schedule["schedule"]:
-            if day["date"] == tomorrow:
-                day["weather"] = {
-                    "temperature": 35.0,
-                    "precipitation": 0.0,
-                    "wind_speed": 5.0,
-                    "weather_icons": ["hot"]
-                }
-            else:
-                day["weather"] = {
-                    "temperature": 20.0,
-                    "precipitation": 0.0,
-                    "wind_speed": 5.0,
-                    "weather_icons": ["sunny"]
-                }
-
-        return schedule
-    except Exception as e:
-        logger.error(f"Error in test endpoint: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error getting test watering schedule: {str(e)}"
+        if not request.scenarios:
+            raise ValueError("At least one scenario is required")
+        if len(request.scenarios) > settings.SIMULATION_MAX_SCENARIOS:
+            raise ValueError(f"At most {settings.SIMULATION_MAX_SCENARIOS} scenarios per request")
+        start_date, days = schedule_service.resolve_schedule_window(request.date_from, days=request.days)
+        garden = simulation_service.load_garden(db, user_id, start_date, days)
+        results = simulation_service.simulate(
+            garden,
+            [scenario.model_dump() for scenario in request.scenarios],
+            request.region,
+            request.include_entries
         )
-
-@router.get("/user/{user_id}/test-weather", response_model=WateringScheduleOverview)
-def get_watering_schedule_test_weather(user_id: int, db: Session = Depends(get_db)):
-    """Test endpoint specifically for testing weather display with mock data"""
-    try:
-        logger.info(f"Getting test weather schedule for user {user_id}")
-        schedule = schedule_service.get_watering_schedule(db, user_id)
-        if not schedule:
-            return {
-                "schedule": [],
-                "last_updated": datetime.utcnow().isoformat()
-            }
-
-        # Add mock weather data for the next day (high temperature)
-        tomorrow = (datetime.utcnow() + timedelta(days=1)).date().isoformat()
-        next_week = (datetime.utcnow() + timedelta(days=7)).date().isoformat()
-        
-        # Override weather data for all days and set weather adjustment flags
-        for day in schedule["schedule"]:
-            current_date = datetime.fromisoformat(day["date"]).date()
-            
-            # Set weather data based on the day
-            if day["date"] == tomorrow:
-                # Hot weather for tomorrow (35°C)
-                day["weather"] = {
-                    "temperature": 35.0,
-                    "precipitation": 0.0,
-                    "wind_speed": 5.0,
-                    "weather_icons": ["hot"]
-                }
-            elif day["date"] == next_week:
-                # Rainy weather for next week (15mm)
-                day["weather"] = {
-                    "temperature": 18.0,
-                    "precipitation": 15.0,
-                    "wind_speed": 8.0,
-                    "weather_icons": ["rainy"]
-                }
-            else:
-                # Normal weather for other days
-                day["weather"] = {
-                    "temperature": 20.0,
-                    "precipitation": 0.0,
-                    "wind_speed": 5.0,
-                    "weather_icons": ["sunny"]
-                }
-            
-            # Mark plants as weather adjusted based on conditions
-            for section in day["sections"]:
-                for group in section["groups"]:
-                    for plant in group["plants"]:
-                        # Reset weather adjustment flags
-                        plant["weather_adjusted"] = False
-                        plant["weather_info"] = {
-                            "is_adjusted": False,
-                            "original_date": None
-                        }
-                        
-                        # Calculate weather impact
-                        if day["date"] == tomorrow:
-                            # Hot weather (35°C) - this takes precedence for all future schedules
-                            temp_impact = (35 - 25) / 5  # = 2.0
-                            rain_impact = 0
-                            total_impact = temp_impact - rain_impact  # = 2.0
-                            days_to_adjust = 3  # Since 2.0 > 1.2
-                            
-                            original_date = current_date
-                            adjusted_date = original_date - timedelta(days=days_to_adjust)
-                            plant["weather_adjusted"] = True
-                            plant["weather_info"] = {
-                                "is_adjusted": True,
-                                "original_date": original_date.isoformat()
-                            }
-                            plant["next_watering"] = adjusted_date.isoformat()
-                        elif day["date"] == next_week:
-                            # Only apply rain adjustment if the plant is scheduled for after next week
-                            # AND if it hasn't already been adjusted by hot weather
-                            scheduled_date = datetime.fromisoformat(plant["next_watering"]).date()
-                            if scheduled_date > current_date and not plant["weather_adjusted"]:
-                                # Rainy weather (15mm)
-                                temp_impact = 0
-                                rain_impact = (15 - 10) / 5  # = 1.0
-                                total_impact = temp_impact - rain_impact  # = -1.0
-                                days_to_adjust = -2  # Since -1.0 < -0.8
-                                
-                                original_date = current_date
-                                adjusted_date = original_date + timedelta(days=abs(days_to_adjust))
-                                plant["weather_adjusted"] = True
-                                plant["weather_info"] = {
-                                    "is_adjusted": True,
-                                    "original_date": original_date.isoformat()
-                                }
-                                plant["next_watering"] = adjusted_date.isoformat()
-
-        return schedule
+        logger.info(f"Simulated {len(results)} scenarios for user {user_id}")
+        return {"start_date": start_date, "days": days, "plants": garden.plants, "results": results}
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error in test weather endpoint: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error getting test weather schedule: {str(e)}"
-        )
+        logger.error(f"Error simulating watering schedule: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
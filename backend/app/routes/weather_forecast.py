@@ -1,43 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
+import json
 from app.services import weather_service
-from app.schemas.weather_forecast import WeatherForecast
-from app.database import get_db
+from app.services import weather_history
+from app.services.weather_locations import cell_for_location
+from app.schemas.weather_forecast import WeatherForecast, WeatherBucket
+from app.database import get_async_db
 
 router = APIRouter()
 
+async def _next_week(db: AsyncSession, location: str):
+    # Aware, so asyncpg does not read a naive local time as UTC
+    now = datetime.now().astimezone()
+    return await weather_service.get_weather_forecast_async(db, location, now, now + timedelta(days=7))
+
 @router.get("/{location}", response_model=List[WeatherForecast])
 async def get_weather_forecast(
     location: str,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Check if we need to update the forecast
-    if weather_service.should_update_forecast(db, location):
-        # Update forecasts in the background
-        background_tasks.add_task(weather_service.update_weather_forecasts, db, location)
-    
-    # Return current forecasts from database
-    forecasts = weather_service.get_weather_forecast(
-        db,
-        location,
-        datetime.now(),
-        datetime.now() + timedelta(days=7)
-    )
-    
+    # Forecasts are stored under the location's grid cell
+    location = cell_for_location(location).location
+    forecasts = await _next_week(db, location)
+
     if not forecasts:
-        # If no forecasts available, fetch them immediately
-        forecasts = await weather_service.update_weather_forecasts(db, location)
-    
+        # Nothing to serve yet: wait for the (shared) refresh, then read what it stored
+        if await weather_service.wait_for_refresh(location):
+            forecasts = await _next_week(db, location)
+    elif await weather_service.should_update_forecast_async(db, location):
+        # Serve the stored forecast and refresh in the background
+        weather_service.refresh_weather_forecast(location)
+
     return forecasts
 
-@router.get("/{location}/historical", response_model=List[WeatherForecast])
-def get_historical_weather(
+def _ndjson_line(row: dict) -> str:
+    row["bucket"] = row["bucket"].isoformat()
+    return json.dumps(row, separators=(",", ":")) + "\n"
+
+@router.get("/{location}/historical", response_model=Union[List[WeatherForecast], List[WeatherBucket]])
+async def get_historical_weather(
     location: str,
     start_date: datetime,
     end_date: datetime,
-    db: Session = Depends(get_db)
+    bucket: Optional[str] = Query(default=None, pattern="^(hour|day|week)$"),
+    format: str = Query(default="json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return weather_service.get_weather_forecast(db, location, start_date, end_date) 
\ No newline at end of file
+    """Stored weather between start_date and end_date.
+
+    Without bucket, the stored hours as a JSON list. With bucket, aggregates
+    per hour, day or week. format=ndjson streams buckets (hourly by default)
+    one JSON object per line, so memory stays flat for long ranges.
+    """
+    # Forecasts are stored under the location's grid cell
+    location = cell_for_location(location).location
+    # Aware, so asyncpg does not read a naive local time as UTC
+    start_date, end_date = start_date.astimezone(), end_date.astimezone()
+
+    if format == "ndjson":
+        async def lines():
+            async for row in weather_history.stream_weather_buckets(
+                db, location, bucket or "hour", start_date, end_date
+            ):
+                yield _ndjson_line(row)
+
+        # The session stays open until the response is sent (dependency
+        # teardown runs after the response on this FastAPI version)
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    if bucket:
+        rows = await weather_history.get_weather_buckets(db, location, bucket, start_date, end_date)
+        return [WeatherBucket(**row) for row in rows]
+
+    return await weather_service.get_weather_forecast_async(db, location, start_date, end_date)
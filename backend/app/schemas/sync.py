@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List
+
+class SyncResponse(BaseModel):
+    version: int  # Pass as `since` on the next sync
+    resync: bool  # The client must discard its copy and fetch everything again
+    changes: Dict[str, List[Dict[str, Any]]]  # Table -> current values of changed rows
+    deleted: Dict[str, List[int]]  # Table -> ids of removed rows
@@ -1,4 +1,4 @@
-from pydantic import EmailStr
+from pydantic import EmailStr, Field
 from typing import List, Optional
 from datetime import datetime
 from app.schemas.base import BaseSchema
@@ -13,6 +13,13 @@ class UserCreate(UserBase):
 class User(UserBase):
     id: int
     created_at: Optional[datetime] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    weather_location: Optional[str] = None
+
+class UserLocation(BaseSchema):
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
 
 class UserPlantAdd(BaseSchema):
     plant_id: int
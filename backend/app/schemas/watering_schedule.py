@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, model_validator
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import date, datetime
 from app.schemas.base import BaseSchema
 
@@ -17,7 +17,7 @@ class WateringScheduleCreate(WateringScheduleBase):
     pass
 
 class WateringSchedule(WateringScheduleBase):
-    id: int
+    id: Optional[int] = None  # None for occurrences generated from a recurrence
     completion_timestamp: Optional[datetime] = None
 
 class WateringScheduleUpdate(BaseSchema):
@@ -26,6 +26,41 @@ class WateringScheduleUpdate(BaseSchema):
     next_scheduled_date: Optional[date] = None
     batch_update: Optional[bool] = None
 
+class WateringScheduleBatchComplete(BaseSchema):
+    """Complete schedules either by id or by a (user, date, section, plants) selector"""
+    schedule_ids: Optional[List[int]] = None
+    user_id: Optional[int] = None
+    scheduled_date: Optional[date] = None
+    section: Optional[str] = None
+    plant_ids: Optional[List[int]] = None
+
+    @model_validator(mode="after")
+    def check_selector(self):
+        if self.schedule_ids:
+            return self
+        if self.user_id is None or self.scheduled_date is None:
+            raise ValueError("Provide schedule_ids or both user_id and scheduled_date")
+        return self
+
+class WateringScheduleBatchResult(BaseModel):
+    completed_ids: List[int]
+    completed: int
+    advanced: int  # Recurrences moved to their next occurrence
+
+class WateringHistoryPeriod(BaseModel):
+    period: date  # First day of the day, ISO week or month
+    section: str
+    planned: int
+    completed: int
+    volume: float
+    weather_adjusted: int
+
+class WateringHistoryResponse(BaseModel):
+    granularity: str
+    date_from: date
+    date_to: date
+    periods: List[WateringHistoryPeriod]
+
 # New schemas for weather-based adjustments
 class WeatherData(BaseModel):
     temperature: float
@@ -57,6 +92,72 @@ class WateringScheduleOverview(BaseModel):
     schedule: List[DaySchedule]
     last_updated: str
 
+class CompactPlant(BaseModel):
+    name: str
+    image_url: Optional[str] = None
+    section: int  # Index into WateringScheduleOverviewV2.sections
+    frequency_days: Optional[int] = None
+    depth_mm: Optional[float] = None
+    volume_feet: Optional[float] = None
+
+class CompactDay(BaseModel):
+    date: date
+    weather: Optional[List[float]] = None  # [temperature, precipitation, wind_speed]
+    # [section index, [[plant_id, status flags(, original date offset)], ...]]
+    sections: List[Tuple[int, List[List[int]]]]
+
+class WateringScheduleOverviewV2(BaseModel):
+    """Overview with plant details sent once instead of per scheduled day"""
+    version: int = 2
+    start_date: date
+    sections: List[str]
+    plants: Dict[int, CompactPlant]
+    flags: Dict[str, int]
+    schedule: List[CompactDay]
+    last_updated: str
+
+class SimulationScenario(BaseModel):
+    """Synthetic daily weather starting at the simulated window's first day"""
+    name: Optional[str] = None
+    temperature: List[Optional[float]] = []  # Celsius
+    precipitation: List[Optional[float]] = []  # mm
+    wind_speed: List[Optional[float]] = []  # km/h
+
+class SimulationRequest(BaseModel):
+    date_from: Optional[date] = None
+    days: Optional[int] = None
+    region: Optional[str] = None  # Adjustment rules region, defaults to WEATHER_RULES_REGION
+    include_entries: bool = True  # False returns only the summary of each scenario
+    scenarios: List[SimulationScenario]
+
+class SimulatedEntry(BaseModel):
+    plant_id: int
+    base_date: date
+    scheduled_date: date
+    completed: bool
+    weather_adjusted: bool
+    skip: bool
+    volume_adjustment: float
+
+class SimulationSummary(BaseModel):
+    occurrences: int
+    completed: int
+    weather_adjusted: int
+    moved_earlier: int
+    moved_later: int
+    skipped: int
+
+class SimulationResult(BaseModel):
+    name: str
+    summary: SimulationSummary
+    entries: Optional[List[SimulatedEntry]] = None
+
+class SimulationResponse(BaseModel):
+    start_date: date
+    days: int
+    plants: Dict[int, Dict[str, Any]]
+    results: List[SimulationResult]
+
 # New response model for weather-adjusted schedules
 class WateringScheduleResponse(BaseModel):
     id: int
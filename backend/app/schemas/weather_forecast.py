@@ -13,6 +13,18 @@ class WeatherForecastCreate(WeatherForecastBase):
     pass
 
 class WeatherForecast(WeatherForecastBase):
-    id: int
+    id: Optional[int] = None  # Compact storage has no per-hour rows
     
-    model_config = ConfigDict(from_attributes=True) 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class WeatherBucket(BaseModel):
+    """Weather aggregated over an hour, day or week starting at bucket"""
+    bucket: datetime
+    hours: int
+    temperature: Optional[float] = None
+    temperature_min: Optional[float] = None
+    temperature_max: Optional[float] = None
+    precipitation: Optional[float] = None
+    precipitation_sum: Optional[float] = None
+    wind_speed: Optional[float] = None
+    wind_speed_max: Optional[float] = None
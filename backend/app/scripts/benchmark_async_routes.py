@@ -0,0 +1,68 @@
+"""Measure API throughput and latency under mixed concurrent load.
+
+Runs --concurrency clients against a running server for --seconds. Each
+client picks requests from a weighted mix of the async read routes (plant
+search, filtered plants, pruning schedule, weather forecast) and /health.
+/health does no database work, so its latency shows how long requests wait
+for the event loop. Under sync sessions in async routes, one slow query
+inflates it for every request on the worker.
+
+    python -m app.scripts.benchmark_async_routes --base-url http://localhost:8000 --concurrency 50 --seconds 30
+"""
+from collections import defaultdict
+import argparse
+import asyncio
+import random
+import time
+import httpx
+import numpy as np
+
+# (name, method, path, json body, weight)
+REQUEST_MIX = [
+    ("search", "GET", "/api/plants/search?query=a&user_id=1", None, 4),
+    ("filtered", "POST", "/api/plants/filtered", {}, 1),
+    ("pruning", "GET", "/api/pruning/schedule/1", None, 2),
+    ("weather", "GET", "/api/weather/Copenhagen", None, 2),
+    ("health", "GET", "/health", None, 1),
+]
+
+async def client_loop(client: httpx.AsyncClient, deadline: float, latencies: dict, errors: dict):
+    weights = [weight for *_, weight in REQUEST_MIX]
+    while time.perf_counter() < deadline:
+        name, method, path, body, _ = random.choices(REQUEST_MIX, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+            if response.status_code >= 400:
+                errors[name] += 1
+        except httpx.HTTPError:
+            errors[name] += 1
+        latencies[name].append(time.perf_counter() - start)
+
+async def run(base_url: str, concurrency: int, seconds: float):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(client_loop(client, deadline, latencies, errors) for _ in range(concurrency)))
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{concurrency} clients, {seconds:.0f}s: {total} requests, {total / seconds:.1f} req/s")
+    for name, *_ in REQUEST_MIX:
+        values = np.array(latencies[name]) * 1000
+        if not len(values):
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        print(
+            f"  {name:<9} {len(values) / seconds:7.1f} req/s  "
+            f"p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  p99 {p99:7.1f} ms  errors {errors[name]}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API throughput under mixed load")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.concurrency, args.seconds))
@@ -0,0 +1,52 @@
+"""Report bytes on the wire and compression CPU cost for the large endpoints.
+
+Fetches each endpoint uncompressed from a running server, then compresses
+the body with every available encoding at the configured levels.
+
+    python -m app.scripts.benchmark_compression --base-url http://localhost:8000 --user-id 1
+"""
+from app.core.compression import available_encodings, compress
+import argparse
+import httpx
+import time
+
+def endpoints(user_id: int):
+    """(label, method, path, json body) of the endpoints to measure"""
+    return [
+        ("overview", "GET", f"/api/watering-schedule/watering-schedule/user/{user_id}", None),
+        ("overview v2", "GET", f"/api/watering-schedule/v2/user/{user_id}", None),
+        ("plants", "GET", "/api/plants/", None),
+        ("plants filtered", "POST", "/api/plants/filtered", {}),
+        ("plant guides", "GET", "/api/plant_guides/", None),
+    ]
+
+def measure(body: bytes, encoding: str, rounds: int) -> tuple:
+    """(compressed size, CPU milliseconds per compression)"""
+    start = time.process_time()
+    for _ in range(rounds):
+        compressed = compress(body, encoding)
+    return len(compressed), (time.process_time() - start) * 1000 / rounds
+
+def run(base_url: str, user_id: int, rounds: int):
+    encodings = available_encodings()
+    print(f"{'endpoint':<18}{'identity':>12}" + "".join(f"{e:>12}{e + ' ms':>10}" for e in encodings))
+    with httpx.Client(base_url=base_url, timeout=60, headers={"Accept-Encoding": "identity"}) as client:
+        for label, method, path, payload in endpoints(user_id):
+            response = client.request(method, path, json=payload)
+            if response.status_code != 200:
+                print(f"{label:<18}HTTP {response.status_code}")
+                continue
+            body = response.content
+            row = f"{label:<18}{len(body):>12}"
+            for encoding in encodings:
+                size, cpu_ms = measure(body, encoding, rounds)
+                row += f"{size:>12}{cpu_ms:>10.2f}"
+            print(row)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark response compression")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=20, help="Compressions per measurement")
+    args = parser.parse_args()
+    run(args.base_url, args.user_id, args.rounds)
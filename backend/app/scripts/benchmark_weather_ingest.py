@@ -0,0 +1,75 @@
+"""Compare the per-row weather ingest with the bulk upsert.
+
+Writes a synthetic week of hourly forecasts for a throwaway location, first
+row by row through create_weather_forecast and then in one upsert (fresh
+hours, then the same hours with new values), and removes them afterwards.
+
+    python -m app.scripts.benchmark_weather_ingest --hours 168 --rounds 5
+"""
+from app.database import SessionLocal
+from app.models.weather_forecast import WeatherForecast
+from app.schemas.weather_forecast import WeatherForecastCreate
+from app.services.weather_service import create_weather_forecast, upsert_weather_forecasts
+from datetime import datetime, timedelta, timezone
+import argparse
+import random
+import time
+
+BENCHMARK_LOCATION = "__benchmark__"
+
+def synthetic_forecasts(hours: int, start: datetime) -> list:
+    return [
+        {
+            "timestamp": start + timedelta(hours=i),
+            "location": BENCHMARK_LOCATION,
+            "temperature": round(random.uniform(0, 35), 1),
+            "precipitation": round(random.uniform(0, 5), 1),
+            "wind_speed": round(random.uniform(0, 30), 1),
+        }
+        for i in range(hours)
+    ]
+
+def clear(db):
+    db.query(WeatherForecast).filter(WeatherForecast.location == BENCHMARK_LOCATION).delete()
+    db.commit()
+
+def per_row(db, forecasts: list) -> float:
+    start = time.perf_counter()
+    for forecast in forecasts:
+        create_weather_forecast(db, WeatherForecastCreate(**forecast))
+    return time.perf_counter() - start
+
+def bulk(db, forecasts: list) -> tuple:
+    start = time.perf_counter()
+    counts = upsert_weather_forecasts(db, forecasts)
+    return time.perf_counter() - start, counts
+
+def run(hours: int, rounds: int):
+    db = SessionLocal()
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    try:
+        clear(db)
+        for round_number in range(1, rounds + 1):
+            forecasts = synthetic_forecasts(hours, start)
+            row_seconds = per_row(db, forecasts)
+            clear(db)
+
+            insert_seconds, inserted = bulk(db, forecasts)
+            update_seconds, updated = bulk(db, synthetic_forecasts(hours, start))
+            clear(db)
+
+            print(
+                f"round {round_number}: per-row {row_seconds * 1000:.1f} ms, "
+                f"upsert insert {insert_seconds * 1000:.1f} ms {inserted}, "
+                f"upsert refresh {update_seconds * 1000:.1f} ms {updated}"
+            )
+    finally:
+        clear(db)
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark weather forecast ingest")
+    parser.add_argument("--hours", type=int, default=168, help="Forecast hours per ingest")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    run(args.hours, args.rounds)
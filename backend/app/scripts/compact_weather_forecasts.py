@@ -0,0 +1,58 @@
+"""Move stored hourly forecasts into compact storage.
+
+Copies weather_forecast rows into weather_hourly day rows one location at a
+time, optionally deleting the copied rows, and prints the table sizes
+before and after. Run it before switching WEATHER_STORAGE to "compact".
+
+    python -m app.scripts.compact_weather_forecasts --delete
+"""
+from sqlalchemy import text
+from app.database import SessionLocal
+from app.models.weather_forecast import WeatherForecast
+from app.services.weather_hourly import upsert_compact_forecasts
+import argparse
+
+TABLES = ("weather_forecast", "weather_hourly")
+
+def table_sizes(db) -> dict:
+    return {
+        table: db.execute(text("SELECT pg_total_relation_size(:table)"), {"table": table}).scalar()
+        for table in TABLES
+    }
+
+def print_sizes(label: str, sizes: dict):
+    print(label + ", ".join(f"{table} {size / 1024:.0f} kB" for table, size in sizes.items()))
+
+def run(delete: bool):
+    db = SessionLocal()
+    try:
+        print_sizes("before: ", table_sizes(db))
+        locations = [location for (location,) in db.query(WeatherForecast.location).distinct()]
+        for location in locations:
+            query = db.query(WeatherForecast).filter(WeatherForecast.location == location)
+            forecasts = [
+                {
+                    "timestamp": row.timestamp,
+                    "location": row.location,
+                    "temperature": row.temperature,
+                    "precipitation": row.precipitation,
+                    "wind_speed": row.wind_speed
+                }
+                for row in query.all()
+            ]
+            # Delete before the compact upsert (which commits both), so the
+            # weather_forecast trigger does not prune the refreshed daily rows
+            if delete:
+                query.delete()
+            counts = upsert_compact_forecasts(db, forecasts)
+            print(f"{location}: {len(forecasts)} hours -> {counts}")
+        # Deleted rows are only reclaimed by VACUUM FULL
+        print_sizes("after: ", table_sizes(db))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy hourly forecasts into compact storage")
+    parser.add_argument("--delete", action="store_true", help="Delete the copied weather_forecast rows")
+    args = parser.parse_args()
+    run(args.delete)
@@ -0,0 +1,40 @@
+from app.database import SessionLocal
+from app.services.schedule_partitions import ensure_partitions, archive_partitions
+from app.core.config import settings
+import argparse
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def maintain_schedule_partitions(retention_months: int = None, drop: bool = False):
+    """Create upcoming monthly partitions and detach the ones past retention"""
+    db = SessionLocal()
+    try:
+        created = ensure_partitions(db)
+        logger.info(f"Created {len(created)} partitions: {created}")
+
+        archived = archive_partitions(db, retention_months, drop)
+        logger.info(f"{'Dropped' if drop else 'Archived'} {len(archived)} partitions: {archived}")
+    except Exception as e:
+        logger.error(f"Error maintaining schedule partitions: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain watering_schedules partitions")
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=settings.SCHEDULE_RETENTION_MONTHS,
+        help="Months of history to keep attached"
+    )
+    parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="Drop expired partitions instead of moving them to the archive schema"
+    )
+    args = parser.parse_args()
+    maintain_schedule_partitions(args.retention_months, args.drop)
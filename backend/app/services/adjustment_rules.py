@@ -0,0 +1,126 @@
+"""Weather adjustment rules.
+
+All weather thresholds live in ADJUSTMENT_RULES. Each region lists bins per
+weather dimension by lower bound, with the effect of that bin on watering
+volume, watering frequency, the scheduled date and whether to skip. At load
+the table is compiled into a lookup indexed by
+(temperature bin, rain bin, wind bin), so evaluating a (plant, day) cell is a
+constant-time array lookup and every code path applies the same rules.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from app.core.config import settings
+
+# Bin effects default to "no adjustment" when a key is omitted
+NEUTRAL_EFFECT = {
+    "volume": 1.0,       # Multiplier for watering volume
+    "frequency": 0.0,    # Days added to the watering interval
+    "shift_days": 0,     # Days the scheduled date moves
+    "skip": False,       # Skip watering entirely
+    "reason": None,
+}
+
+ADJUSTMENT_RULES: Dict[str, Dict[str, List[dict]]] = {
+    "default": {
+        # Celsius
+        "temperature": [
+            {"min": None, "volume": 0.8, "shift_days": 1, "reason": "Low temperature"},
+            {"min": 10},
+            {"min": 25, "volume": 1.25, "frequency": -0.5, "reason": "High temperature"},
+            {"min": 30, "volume": 1.5, "frequency": -1, "shift_days": -1, "reason": "Very high temperature"},
+        ],
+        # mm
+        "precipitation": [
+            {"min": None},
+            {"min": 2, "volume": 0.75, "reason": "Light rain expected"},
+            {"min": 5, "volume": 0.5, "reason": "Moderate rain expected"},
+            {"min": 10, "skip": True, "shift_days": 1, "reason": "Heavy rain expected"},
+        ],
+        # km/h
+        "wind_speed": [
+            {"min": None},
+            {"min": 20, "volume": 1.25, "frequency": -0.5, "reason": "High winds"},
+            {"min": 30, "volume": 1.5, "frequency": -1, "reason": "Very high winds"},
+        ],
+    },
+}
+
+# Per plant type modifiers applied on top of the weather lookup
+PLANT_MODIFIERS: Dict[str, dict] = {
+    "drought_tolerant": {"volume": 0.75, "frequency": 1, "reason": "Drought tolerant plant"},
+}
+
+DIMENSIONS = ("temperature", "precipitation", "wind_speed")
+
+class RuleLookup:
+    """A rule table compiled into (temperature x rain x wind) lookup arrays"""
+
+    def __init__(self, rules: Dict[str, List[dict]]):
+        self.bins = {dim: [{**NEUTRAL_EFFECT, **b} for b in rules[dim]] for dim in DIMENSIONS}
+        self.edges = {dim: np.array([b["min"] for b in self.bins[dim][1:]], dtype=float) for dim in DIMENSIONS}
+        # Missing weather values fall into the first bin without any effect
+        self.neutral = {
+            dim: next(
+                i for i, b in enumerate(self.bins[dim])
+                if all(b[key] == NEUTRAL_EFFECT[key] for key in ("volume", "frequency", "shift_days", "skip"))
+            )
+            for dim in DIMENSIONS
+        }
+
+        temp, rain, wind = (self._axis(dim) for dim in DIMENSIONS)
+        self.volume = temp["volume"] * rain["volume"] * wind["volume"]
+        self.frequency = temp["frequency"] + rain["frequency"] + wind["frequency"]
+        self.shift_days = temp["shift_days"] + rain["shift_days"] + wind["shift_days"]
+        self.skip = temp["skip"] | rain["skip"] | wind["skip"]
+
+    def _axis(self, dim: str) -> Dict[str, np.ndarray]:
+        """Effects of one dimension's bins, shaped to broadcast along its lookup axis"""
+        shape = [1, 1, 1]
+        shape[DIMENSIONS.index(dim)] = -1
+        return {
+            key: np.array([b[key] for b in self.bins[dim]], dtype=dtype).reshape(shape)
+            for key, dtype in (("volume", float), ("frequency", float), ("shift_days", int), ("skip", bool))
+        }
+
+    def bin_index(self, dim: str, values: Sequence[float]) -> np.ndarray:
+        """Bin index per value; NaN maps to the neutral bin"""
+        values = np.asarray(values, dtype=float)
+        index = np.digitize(np.nan_to_num(values, nan=-np.inf), self.edges[dim])
+        return np.where(np.isnan(values), self.neutral[dim], index)
+
+    def lookup(
+        self,
+        temperatures: Sequence[float],
+        precipitation: Sequence[float],
+        wind_speeds: Sequence[float]
+    ) -> Dict[str, np.ndarray]:
+        """Adjustments for every cell of (broadcastable) weather arrays"""
+        index = (
+            self.bin_index("temperature", temperatures),
+            self.bin_index("precipitation", precipitation),
+            self.bin_index("wind_speed", wind_speeds),
+        )
+        return {
+            "volume_adjustment": self.volume[index],
+            "frequency_adjustment": self.frequency[index],
+            "shift_days": self.shift_days[index],
+            "skip_watering": self.skip[index],
+        }
+
+    def reasons(self, temperature: float, precipitation: float, wind_speed: float) -> List[str]:
+        """Human readable reasons for a single day's weather"""
+        reasons = []
+        for dim, value in zip(DIMENSIONS, (temperature, precipitation, wind_speed)):
+            if value is None:
+                continue
+            reason = self.bins[dim][int(self.bin_index(dim, [value])[0])]["reason"]
+            if reason:
+                reasons.append(reason)
+        return reasons
+
+@lru_cache(maxsize=None)
+def get_rule_lookup(region: Optional[str] = None) -> RuleLookup:
+    """Compiled lookup for a region, falling back to the default rules"""
+    region = region or settings.WEATHER_RULES_REGION
+    return RuleLookup(ADJUSTMENT_RULES.get(region, ADJUSTMENT_RULES["default"]))
@@ -0,0 +1,135 @@
+"""Monthly range partitions of watering_schedules.
+
+watering_schedules is partitioned by scheduled_date with one partition per
+calendar month plus a DEFAULT partition that catches rows outside the
+created range. Queries filtered on scheduled_date >= today only touch the
+current and upcoming months.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+import logging
+import re
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "watering_schedules"
+DEFAULT_PARTITION = "watering_schedules_default"
+ARCHIVE_SCHEMA = "archive"
+
+# Serializes partition DDL across workers
+PARTITION_LOCK_ID = 728_403_001
+
+PARTITIONS_SQL = """
+    SELECT child.relname AS name, pg_get_expr(child.relpartbound, child.oid) AS bound
+    FROM pg_inherits
+    JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+    JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+    WHERE parent.relname = :parent
+    ORDER BY child.relname
+"""
+
+BOUND_PATTERN = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})'\) TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` after the month of `month`"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y_%m}"
+
+def list_partitions(db: Session) -> List[Tuple[str, Optional[date], Optional[date]]]:
+    """(name, start, end) of every attached partition; the DEFAULT partition has no bounds"""
+    partitions = []
+    for row in db.execute(text(PARTITIONS_SQL), {"parent": PARENT_TABLE}):
+        match = BOUND_PATTERN.search(row.bound or "")
+        if match:
+            partitions.append((row.name, date.fromisoformat(match.group(1)), date.fromisoformat(match.group(2))))
+        else:
+            partitions.append((row.name, None, None))
+    return partitions
+
+def create_month_partition(db: Session, month: date) -> bool:
+    """Create the partition for one month; returns False if it already exists.
+
+    Rows for that month that already landed in the DEFAULT partition are
+    moved into the new table before it is attached.
+    """
+    month = month_start(month)
+    name = partition_name(month)
+    if any(existing == name for existing, _, _ in list_partitions(db)):
+        return False
+
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    db.execute(text(
+        f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE scheduled_date >= '{start}' AND scheduled_date < '{end}'
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """))
+    db.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"
+    ))
+    logger.info(f"Created partition {name}")
+    return True
+
+def ensure_partitions(db: Session, months_ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+    """Create partitions for the current month and the next `months_ahead` months"""
+    months_ahead = settings.SCHEDULE_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(today or datetime.now().date())
+    try:
+        db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": PARTITION_LOCK_ID})
+        created = [
+            partition_name(add_months(current, offset))
+            for offset in range(months_ahead + 1)
+            if create_month_partition(db, add_months(current, offset))
+        ]
+        db.commit()
+        return created
+    except Exception as e:
+        logger.error(f"Error creating schedule partitions: {str(e)}")
+        db.rollback()
+        raise
+
+def archive_partitions(
+    db: Session,
+    retention_months: Optional[int] = None,
+    drop: bool = False,
+    today: Optional[date] = None
+) -> List[str]:
+    """Detach monthly partitions older than the retention window.
+
+    Detached partitions are moved to the archive schema, where they can be
+    dumped or queried separately, or dropped when `drop` is set.
+    """
+    retention_months = settings.SCHEDULE_RETENTION_MONTHS if retention_months is None else retention_months
+    cutoff = add_months(month_start(today or datetime.now().date()), -retention_months)
+    try:
+        db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": PARTITION_LOCK_ID})
+        expired = [name for name, _, end in list_partitions(db) if end is not None and end <= cutoff]
+        if expired and not drop:
+            db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        for name in expired:
+            db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            if drop:
+                db.execute(text(f"DROP TABLE {name}"))
+            else:
+                db.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            logger.info(f"{'Dropped' if drop else 'Archived'} partition {name}")
+        db.commit()
+        return expired
+    except Exception as e:
+        logger.error(f"Error archiving schedule partitions: {str(e)}")
+        db.rollback()
+        raise
@@ -0,0 +1,178 @@
+"""What-if watering schedules for synthetic weather.
+
+A user's garden is read once into a GardenSnapshot (recurrences expanded
+into pending occurrences, plus the completed ones), then any number of
+scenarios are evaluated against it in memory: every scenario's daily
+weather goes through the rule lookup in a single call and the date shifts
+are applied to all pending occurrences at once. Nothing is written.
+"""
+from sqlalchemy.orm import Session, joinedload
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from app.models.user_plants import UserPlant
+from app.models.plants import Plant
+from app.models.watering_schedule import WateringSchedule
+from app.services.adjustment_rules import get_rule_lookup
+from app.services.watering_recurrence import expand_recurrences
+from app.services.watering_schedule import MAX_WEATHER_SHIFT_DAYS
+import logging
+
+logger = logging.getLogger(__name__)
+
+class GardenSnapshot:
+    """Read-only copy of the occurrences of a user's garden around a window"""
+
+    def __init__(
+        self,
+        start_date: date,
+        days: int,
+        today: date,
+        plants: Dict[int, dict],
+        pending: Sequence[tuple],
+        completed: Sequence[dict]
+    ):
+        self.start_date = start_date
+        self.days = days
+        self.today = today
+        self.plants = plants
+        # Pending occurrences as parallel arrays; base dates are day offsets from start_date
+        self.plant_ids = np.array([plant_id for plant_id, _ in pending], dtype=np.int64)
+        self.base_offsets = np.array([(base - start_date).days for _, base in pending], dtype=np.int64)
+        self.completed = list(completed)
+
+def load_garden(db: Session, user_id: int, start_date: date, days: int, today: Optional[date] = None) -> GardenSnapshot:
+    """Read a user's plants, recurrences and stored occurrences for simulation"""
+    today = today or datetime.now().date()
+    end_date = start_date + timedelta(days=days)
+    margin = timedelta(days=MAX_WEATHER_SHIFT_DAYS)
+
+    user_plants = db.query(UserPlant).filter(UserPlant.user_id == user_id).options(
+        joinedload(UserPlant.plant).joinedload(Plant.watering_info)
+    ).all()
+    plants = {}
+    for user_plant in user_plants:
+        plant = user_plant.plant
+        if not plant:
+            continue
+        watering_info = plant.watering_info
+        plants[plant.id] = {
+            "name": plant.common_name,
+            "section": user_plant.section or "Unassigned",
+            "frequency_days": watering_info.frequency_days if watering_info else 7
+        }
+
+    stored = db.query(WateringSchedule).filter(
+        WateringSchedule.user_id == user_id,
+        WateringSchedule.scheduled_date >= start_date - margin,
+        WateringSchedule.scheduled_date < end_date + margin
+    ).all()
+
+    # Completed rows are history and keep their date; stored pending rows
+    # move with the weather like generated occurrences
+    pending = set()
+    completed = []
+    stored_keys = set()
+    for schedule in stored:
+        if schedule.plant_id not in plants:
+            continue
+        base_date = schedule.base_date or schedule.scheduled_date
+        stored_keys.add((schedule.plant_id, base_date))
+        if schedule.completed:
+            if start_date <= schedule.scheduled_date < end_date:
+                completed.append({
+                    "plant_id": schedule.plant_id,
+                    "base_date": base_date,
+                    "scheduled_date": schedule.scheduled_date
+                })
+        elif base_date >= today:
+            pending.add((schedule.plant_id, base_date))
+
+    for plant_id, base_date in expand_recurrences(
+        db, user_id, start_date - margin, end_date + margin, today, list(plants)
+    ):
+        if (plant_id, base_date) not in stored_keys:
+            pending.add((plant_id, base_date))
+
+    return GardenSnapshot(start_date, days, today, plants, sorted(pending), completed)
+
+def _weather_matrix(scenarios: Sequence[dict], key: str, days: int) -> np.ndarray:
+    """(scenarios x days) array of one weather dimension, NaN where a scenario has no value"""
+    matrix = np.full((len(scenarios), days), np.nan)
+    for row, scenario in enumerate(scenarios):
+        values = [np.nan if v is None else v for v in (scenario.get(key) or [])][:days]
+        matrix[row, :len(values)] = values
+    return matrix
+
+def simulate(
+    garden: GardenSnapshot,
+    scenarios: Sequence[dict],
+    region: Optional[str] = None,
+    include_entries: bool = True
+) -> List[dict]:
+    """Adjusted schedule of the garden under each scenario.
+
+    A scenario has `name` and daily `temperature`, `precipitation` and
+    `wind_speed` arrays starting at the garden's start date; missing days
+    have no weather effect. Set include_entries=False to get only the
+    summary counts (bulk runs).
+    """
+    margin = MAX_WEATHER_SHIFT_DAYS
+    # Columns cover start_date - margin .. end_date + margin, so occurrences
+    # just outside the window can be shifted into it
+    horizon = garden.days + 2 * margin
+    weather = {
+        key: np.pad(
+            _weather_matrix(scenarios, key, garden.days + margin),
+            ((0, 0), (margin, 0)),
+            constant_values=np.nan
+        )
+        for key in ("temperature", "precipitation", "wind_speed")
+    }
+    impact = get_rule_lookup(region).lookup(weather["temperature"], weather["precipitation"], weather["wind_speed"])
+
+    columns = garden.base_offsets + margin
+    valid = (columns >= 0) & (columns < horizon)
+    columns = np.clip(columns, 0, horizon - 1)
+    shifts = np.where(valid, impact["shift_days"][:, columns], 0)
+    skip = np.where(valid, impact["skip_watering"][:, columns], False)
+    volume = np.where(valid, impact["volume_adjustment"][:, columns], 1.0)
+
+    today_offset = (garden.today - garden.start_date).days
+    scheduled = np.maximum(garden.base_offsets + shifts, today_offset)
+    in_window = (scheduled >= 0) & (scheduled < garden.days)
+    adjusted = in_window & (scheduled != garden.base_offsets)
+
+    results = []
+    for row, scenario in enumerate(scenarios):
+        mask = in_window[row]
+        result = {
+            "name": scenario.get("name") or f"scenario {row + 1}",
+            "summary": {
+                "occurrences": int(mask.sum()) + len(garden.completed),
+                "completed": len(garden.completed),
+                "weather_adjusted": int(adjusted[row].sum()),
+                "moved_earlier": int((mask & (scheduled[row] < garden.base_offsets)).sum()),
+                "moved_later": int((mask & (scheduled[row] > garden.base_offsets)).sum()),
+                "skipped": int((mask & skip[row]).sum()),
+            },
+        }
+        if include_entries:
+            entries = [
+                {**entry, "completed": True, "weather_adjusted": False, "skip": False, "volume_adjustment": 1.0}
+                for entry in garden.completed
+            ]
+            for i in np.flatnonzero(mask):
+                entries.append({
+                    "plant_id": int(garden.plant_ids[i]),
+                    "base_date": garden.start_date + timedelta(days=int(garden.base_offsets[i])),
+                    "scheduled_date": garden.start_date + timedelta(days=int(scheduled[row, i])),
+                    "completed": False,
+                    "weather_adjusted": bool(adjusted[row, i]),
+                    "skip": bool(skip[row, i]),
+                    "volume_adjustment": float(volume[row, i])
+                })
+            entries.sort(key=lambda entry: (entry["scheduled_date"], entry["plant_id"]))
+            result["entries"] = entries
+        results.append(result)
+    return results
@@ -0,0 +1,107 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.models.sync import SyncVersion, ChangeLogEntry
+from app.models.user_plants import UserPlant
+from app.models.sections import Section
+from app.models.watering_schedule import WateringSchedule
+from app.models.watering_recurrence import WateringRecurrence
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tracked table -> model used to load the current rows
+SYNC_ENTITIES = {
+    "user_plants": UserPlant,
+    "sections": Section,
+    "watering_schedules": WateringSchedule,
+    "watering_recurrences": WateringRecurrence,
+}
+
+# Delete old change_log entries and remember the highest version removed per
+# user, so clients that synced before it know they must resync
+TRUNCATE_CHANGE_LOG_SQL = """
+    WITH removed AS (
+        DELETE FROM change_log WHERE created_at < :cutoff
+        RETURNING user_id, version
+    ), marked AS (
+        UPDATE sync_versions AS sv
+        SET truncated_through = GREATEST(sv.truncated_through, r.max_version)
+        FROM (SELECT user_id, MAX(version) AS max_version FROM removed GROUP BY user_id) AS r
+        WHERE sv.user_id = r.user_id
+    )
+    SELECT COUNT(*) FROM removed
+"""
+
+def _row_to_dict(row) -> dict:
+    return {column.name: getattr(row, column.name) for column in row.__table__.columns}
+
+def get_changes_since(db: Session, user_id: int, since: int, max_changes: Optional[int] = None) -> dict:
+    """Rows of the user's garden and schedule that changed after version `since`.
+
+    Changed rows are returned with their current values; rows that no longer
+    exist are listed under `deleted`. `resync` is set (and nothing else
+    returned) when the changes can no longer be computed from the log.
+    """
+    max_changes = settings.SYNC_MAX_CHANGES if max_changes is None else max_changes
+    state = db.get(SyncVersion, user_id)
+    version = state.version if state else 0
+    truncated_through = state.truncated_through if state else 0
+    result = {
+        "version": version,
+        "resync": False,
+        "changes": {entity: [] for entity in SYNC_ENTITIES},
+        "deleted": {entity: [] for entity in SYNC_ENTITIES},
+    }
+
+    # Version 0 is a client without a copy yet; a client ahead of the server
+    # (e.g. after a restore) must resync too
+    if since == 0 or since < truncated_through or since > version:
+        logger.info(f"User {user_id} sync from version {since} requires a full resync")
+        result["resync"] = True
+        return result
+    if since == version:
+        return result
+
+    changed = (
+        db.query(ChangeLogEntry.entity, ChangeLogEntry.entity_id)
+        .filter(
+            ChangeLogEntry.user_id == user_id,
+            ChangeLogEntry.version > since,
+            ChangeLogEntry.version <= version
+        )
+        .distinct()
+        .limit(max_changes + 1)
+        .all()
+    )
+    if len(changed) > max_changes:
+        logger.info(f"User {user_id} has more than {max_changes} changes since version {since}, requiring a resync")
+        result["resync"] = True
+        return result
+
+    ids_by_entity: Dict[str, List[int]] = {}
+    for entity, entity_id in changed:
+        ids_by_entity.setdefault(entity, []).append(entity_id)
+
+    for entity, ids in ids_by_entity.items():
+        model = SYNC_ENTITIES.get(entity)
+        if model is None:
+            continue
+        rows = db.query(model).filter(model.user_id == user_id, model.id.in_(ids)).all()
+        result["changes"][entity] = [_row_to_dict(row) for row in rows]
+        found = {row.id for row in rows}
+        result["deleted"][entity] = sorted(set(ids) - found)
+
+    return result
+
+def truncate_change_log(db: Session, retention_days: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """Remove change_log entries older than the retention window; returns rows removed"""
+    retention_days = settings.SYNC_LOG_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    removed = db.execute(text(TRUNCATE_CHANGE_LOG_SQL), {"cutoff": cutoff}).scalar()
+    db.commit()
+    if removed:
+        logger.info(f"Truncated {removed} change log entries older than {cutoff}")
+    return removed
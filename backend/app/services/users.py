@@ -3,6 +3,7 @@ from app.models.users import User
 from app.models.plants import Plant
 from app.models.user_plants import UserPlant
 from app.schemas.users import UserCreate
+from app.services.weather_locations import snap_to_cell
 from fastapi import HTTPException
 from passlib.context import CryptContext
 from app.scripts.initialize_watering_schedules import sync_watering_schedules
@@ -23,6 +24,18 @@ def create_user(db: Session, user: UserCreate):
 def get_user(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
 
+def set_user_location(db: Session, user_id: int, latitude: float, longitude: float):
+    """Store garden coordinates and the forecast cell they fall in"""
+    db_user = get_user(db, user_id)
+    if not db_user:
+        return None
+    db_user.latitude = latitude
+    db_user.longitude = longitude
+    db_user.weather_location = snap_to_cell(latitude, longitude).location
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
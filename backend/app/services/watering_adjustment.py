@@ -1,27 +1,18 @@
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Sequence
+import numpy as np
 from app.schemas.watering import WateringBase
 from app.schemas.weather_forecast import WeatherForecast
+from app.services.adjustment_rules import get_rule_lookup, PLANT_MODIFIERS
 import logging
 import traceback
 
 # Set up logging
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class WateringAdjustment:
-    # Temperature thresholds (in Celsius)
-    TEMP_HIGH = 25
-    TEMP_VERY_HIGH = 30
-    
-    # Wind speed thresholds (in km/h)
-    WIND_HIGH = 20
-    WIND_VERY_HIGH = 30
-    
-    # Precipitation thresholds (in mm)
-    RAIN_LIGHT = 2
-    RAIN_MODERATE = 5
-    RAIN_HEAVY = 10
+    # Weather thresholds are defined in app.services.adjustment_rules
 
     @staticmethod
     def calculate_adjustment(
@@ -33,58 +24,56 @@ class WateringAdjustment:
         Returns a dict with adjusted values and recommendations
         """
         try:
-            logger.debug(f"Calculating adjustment for plant {base_watering.plant_id} with weather: {weather.__dict__}")
+            logger.debug("Calculating adjustment for plant %s", base_watering.plant_id)
             
+            adjustments = WateringAdjustment.calculate_adjustments(
+                [weather.temperature],
+                [weather.precipitation],
+                [weather.wind_speed],
+                [base_watering.drought_tolerant]
+            )
             adjustment = {
-                "skip_watering": False,
-                "frequency_adjustment": 0,  # Days to add/subtract
-                "volume_adjustment": 1.0,   # Multiplier for volume
-                "reason": []
+                "skip_watering": bool(adjustments["skip_watering"][0, 0]),
+                "frequency_adjustment": float(adjustments["frequency_adjustment"][0, 0]),  # Days to add/subtract
+                "volume_adjustment": float(adjustments["volume_adjustment"][0, 0]),   # Multiplier for volume
+                "reason": WateringAdjustment._reasons(weather, base_watering.drought_tolerant)
             }
 
-            # Check precipitation
-            if weather.precipitation >= WateringAdjustment.RAIN_HEAVY:
-                adjustment["skip_watering"] = True
-                adjustment["reason"].append("Heavy rain expected")
-            elif weather.precipitation >= WateringAdjustment.RAIN_MODERATE:
-                adjustment["volume_adjustment"] *= 0.5
-                adjustment["reason"].append("Moderate rain expected")
-            elif weather.precipitation >= WateringAdjustment.RAIN_LIGHT:
-                adjustment["volume_adjustment"] *= 0.75
-                adjustment["reason"].append("Light rain expected")
-
-            # Check temperature
-            if weather.temperature >= WateringAdjustment.TEMP_VERY_HIGH:
-                adjustment["frequency_adjustment"] -= 1
-                adjustment["volume_adjustment"] *= 1.5
-                adjustment["reason"].append("Very high temperature")
-            elif weather.temperature >= WateringAdjustment.TEMP_HIGH:
-                adjustment["frequency_adjustment"] -= 0.5
-                adjustment["volume_adjustment"] *= 1.25
-                adjustment["reason"].append("High temperature")
-
-            # Check wind
-            if weather.wind_speed >= WateringAdjustment.WIND_VERY_HIGH:
-                adjustment["frequency_adjustment"] -= 1
-                adjustment["volume_adjustment"] *= 1.5
-                adjustment["reason"].append("Very high winds")
-            elif weather.wind_speed >= WateringAdjustment.WIND_HIGH:
-                adjustment["frequency_adjustment"] -= 0.5
-                adjustment["volume_adjustment"] *= 1.25
-                adjustment["reason"].append("High winds")
-
-            # Adjust for drought tolerance
-            if base_watering.drought_tolerant:
-                adjustment["frequency_adjustment"] += 1
-                adjustment["volume_adjustment"] *= 0.75
-                adjustment["reason"].append("Drought tolerant plant")
-
-            logger.debug(f"Calculated adjustment: {adjustment}")
             return adjustment
         except Exception as e:
             logger.error(f"Error calculating adjustment: {str(e)}\n{traceback.format_exc()}")
             raise
 
+    @staticmethod
+    def calculate_adjustments(
+        temperatures: Sequence[float],
+        precipitation: Sequence[float],
+        wind_speeds: Sequence[float],
+        drought_tolerant: Sequence[bool]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_adjustment for every (plant, day) pair.
+
+        Weather arrays have shape (days,) when all plants share a forecast, or
+        (plants, days) for per-plant forecasts; drought_tolerant has shape
+        (plants,). Returns arrays of shape (plants, days) with the volume
+        multiplier, frequency adjustment (days), date shift and skip_watering mask.
+        Missing forecasts (NaN) produce no weather adjustment.
+        """
+        drought = np.asarray(drought_tolerant, dtype=bool)[:, np.newaxis]
+        cells = get_rule_lookup().lookup(temperatures, precipitation, wind_speeds)
+        modifier = PLANT_MODIFIERS["drought_tolerant"]
+
+        volume = cells["volume_adjustment"] * np.where(drought, modifier["volume"], 1.0)
+        frequency = cells["frequency_adjustment"] + np.where(drought, modifier["frequency"], 0.0)
+
+        return {
+            "volume_adjustment": volume,
+            "frequency_adjustment": frequency,
+            "skip_watering": np.broadcast_to(cells["skip_watering"], volume.shape),
+            "shift_days": np.broadcast_to(cells["shift_days"], volume.shape)
+        }
+
     @staticmethod
     def get_adjusted_schedule(
         base_watering: WateringBase,
@@ -94,56 +83,31 @@ class WateringAdjustment:
         Generate a week's worth of adjusted watering schedule
         """
         try:
-            logger.debug(f"Generating adjusted schedule for plant {base_watering.plant_id}")
-            schedule = []
+            logger.debug("Generating adjusted schedule for plant %s", base_watering.plant_id)
             current_date = datetime.now().date()
+            dates = [current_date + timedelta(days=i) for i in range(7)]
             
-            # Group forecasts by date
+            # Use the forecast closest to noon for each date
             forecasts_by_date = {}
             for forecast in weather_forecasts:
                 date_key = forecast.timestamp.date()
-                if date_key not in forecasts_by_date:
-                    forecasts_by_date[date_key] = []
-                forecasts_by_date[date_key].append(forecast)
+                best = forecasts_by_date.get(date_key)
+                if best is None or abs(forecast.timestamp.hour - 12) < abs(best.timestamp.hour - 12):
+                    forecasts_by_date[date_key] = forecast
+            day_forecasts = [forecasts_by_date.get(d) for d in dates]
             
-            for i in range(7):
-                forecast_date = current_date + timedelta(days=i)
-                # Get all forecasts for this date
-                day_forecasts = forecasts_by_date.get(forecast_date, [])
-                
-                if day_forecasts:
-                    # Use the forecast closest to noon
-                    forecast = min(day_forecasts, 
-                                 key=lambda x: abs(x.timestamp.hour - 12))
-                    
-                    logger.debug(f"Using forecast for {forecast_date} at {forecast.timestamp}")
-                    try:
-                        adjustment = WateringAdjustment.calculate_adjustment(
-                            base_watering,
-                            forecast
-                        )
-                        
-                        # Calculate adjusted volume based on the adjustment factors
-                        adjusted_volume = base_watering.volume_feet * adjustment["volume_adjustment"]
-                        
-                        schedule.append({
-                            "date": forecast_date,
-                            "skip_watering": adjustment["skip_watering"],
-                            "adjusted_volume": adjusted_volume,
-                            "reason": adjustment["reason"],
-                            "original_volume": base_watering.volume_feet,
-                            "weather_forecast": {
-                                "temperature": forecast.temperature,
-                                "precipitation": forecast.precipitation,
-                                "wind_speed": forecast.wind_speed
-                            }
-                        })
-                        
-                        logger.debug(f"Added schedule entry for {forecast_date}: {schedule[-1]}")
-                    except Exception as e:
-                        logger.error(f"Error calculating adjustment for {forecast_date}: {str(e)}")
-                        continue
-                else:
+            adjustments = WateringAdjustment.calculate_adjustments(
+                [f.temperature if f else np.nan for f in day_forecasts],
+                [f.precipitation if f else np.nan for f in day_forecasts],
+                [f.wind_speed if f else np.nan for f in day_forecasts],
+                [base_watering.drought_tolerant]
+            )
+            volumes = adjustments["volume_adjustment"][0] * base_watering.volume_feet
+            skips = adjustments["skip_watering"][0]
+            
+            schedule = []
+            for i, (forecast_date, forecast) in enumerate(zip(dates, day_forecasts)):
+                if forecast is None:
                     logger.warning(f"No forecast found for date {forecast_date}")
                     # Use default values when no forecast is available
                     schedule.append({
@@ -154,8 +118,30 @@ class WateringAdjustment:
                         "original_volume": base_watering.volume_feet,
                         "weather_forecast": None
                     })
+                    continue
+                
+                schedule.append({
+                    "date": forecast_date,
+                    "skip_watering": bool(skips[i]),
+                    "adjusted_volume": float(volumes[i]),
+                    "reason": WateringAdjustment._reasons(forecast, base_watering.drought_tolerant),
+                    "original_volume": base_watering.volume_feet,
+                    "weather_forecast": {
+                        "temperature": forecast.temperature,
+                        "precipitation": forecast.precipitation,
+                        "wind_speed": forecast.wind_speed
+                    }
+                })
             
             return schedule
         except Exception as e:
             logger.error(f"Error generating adjusted schedule: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def _reasons(weather: WeatherForecast, drought_tolerant: bool) -> List[str]:
+        """Human readable reasons, only built for schedules that are returned"""
+        reasons = get_rule_lookup().reasons(weather.temperature, weather.precipitation, weather.wind_speed)
+        if drought_tolerant:
+            reasons.append(PLANT_MODIFIERS["drought_tolerant"]["reason"])
+        return reasons
@@ -0,0 +1,122 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("day", "week", "month")
+
+# Recompute the rollup rows of the given (user, plant, day) keys from the
+# stored occurrences. Only the touched keys are read, so the cost does not
+# grow with the size of the history.
+REFRESH_HISTORY_SQL = """
+    INSERT INTO watering_history
+        (user_id, plant_id, section, day, planned, completed, volume, weather_adjusted, updated_at)
+    SELECT ws.user_id,
+           ws.plant_id,
+           (SELECT MIN(up.section) FROM user_plants AS up
+            WHERE up.user_id = ws.user_id AND up.plant_id = ws.plant_id),
+           ws.scheduled_date,
+           COUNT(*),
+           COUNT(*) FILTER (WHERE ws.completed),
+           COALESCE(SUM(COALESCE(ws.volume_needed, w.volume_feet, 0)) FILTER (WHERE ws.completed), 0),
+           COUNT(*) FILTER (WHERE ws.weather_adjusted),
+           now()
+    FROM unnest(CAST(:user_ids AS integer[]), CAST(:plant_ids AS integer[]), CAST(:days AS date[]))
+        AS k(user_id, plant_id, day)
+    JOIN watering_schedules AS ws
+        ON ws.user_id = k.user_id AND ws.plant_id = k.plant_id AND ws.scheduled_date = k.day
+    LEFT JOIN LATERAL (
+        SELECT volume_feet FROM watering WHERE watering.plant_id = ws.plant_id LIMIT 1
+    ) AS w ON true
+    GROUP BY ws.user_id, ws.plant_id, ws.scheduled_date
+    ON CONFLICT (user_id, plant_id, day) DO UPDATE
+    SET section = EXCLUDED.section,
+        planned = EXCLUDED.planned,
+        completed = EXCLUDED.completed,
+        volume = EXCLUDED.volume,
+        weather_adjusted = EXCLUDED.weather_adjusted,
+        updated_at = EXCLUDED.updated_at
+"""
+
+# Keys whose occurrences were all removed drop out of the rollup
+PRUNE_HISTORY_SQL = """
+    DELETE FROM watering_history AS h
+    USING unnest(CAST(:user_ids AS integer[]), CAST(:plant_ids AS integer[]), CAST(:days AS date[]))
+        AS k(user_id, plant_id, day)
+    WHERE h.user_id = k.user_id AND h.plant_id = k.plant_id AND h.day = k.day
+      AND NOT EXISTS (
+          SELECT 1 FROM watering_schedules AS ws
+          WHERE ws.user_id = k.user_id AND ws.plant_id = k.plant_id AND ws.scheduled_date = k.day
+      )
+"""
+
+HISTORY_SQL = """
+    SELECT CAST(date_trunc(:granularity, h.day) AS date) AS period,
+           COALESCE(h.section, 'Unassigned') AS section,
+           SUM(h.planned) AS planned,
+           SUM(h.completed) AS completed,
+           SUM(h.volume) AS volume,
+           SUM(h.weather_adjusted) AS weather_adjusted
+    FROM watering_history AS h
+    WHERE h.user_id = :user_id
+      AND h.day >= :date_from
+      AND h.day <= :date_to
+      {filters}
+    GROUP BY period, COALESCE(h.section, 'Unassigned')
+    ORDER BY period, section
+"""
+
+def refresh_history(db: Session, keys: Iterable[Tuple[int, int, date]]) -> None:
+    """Update the rollup for (user_id, plant_id, day) keys inside the caller's transaction"""
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    params = {
+        "user_ids": [user_id for user_id, _, _ in keys],
+        "plant_ids": [plant_id for _, plant_id, _ in keys],
+        "days": [day for _, _, day in keys],
+    }
+    db.execute(text(REFRESH_HISTORY_SQL), params)
+    db.execute(text(PRUNE_HISTORY_SQL), params)
+
+def get_watering_history(
+    db: Session,
+    user_id: int,
+    date_from: date,
+    date_to: date,
+    granularity: str = "week",
+    section: Optional[str] = None,
+    plant_id: Optional[int] = None
+) -> List[dict]:
+    """Watering totals per period and section; weeks are ISO weeks starting on Monday"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if date_to < date_from:
+        raise ValueError("date_to must not be before date_from")
+
+    filters = []
+    params = {"user_id": user_id, "date_from": date_from, "date_to": date_to, "granularity": granularity}
+    if section == "Unassigned":
+        filters.append("AND h.section IS NULL")
+    elif section is not None:
+        filters.append("AND h.section = :section")
+        params["section"] = section
+    if plant_id is not None:
+        filters.append("AND h.plant_id = :plant_id")
+        params["plant_id"] = plant_id
+
+    rows = db.execute(text(HISTORY_SQL.format(filters="\n      ".join(filters))), params).all()
+    return [
+        {
+            "period": row.period,
+            "section": row.section,
+            "planned": int(row.planned),
+            "completed": int(row.completed),
+            "volume": round(float(row.volume), 2),
+            "weather_adjusted": int(row.weather_adjusted),
+        }
+        for row in rows
+    ]
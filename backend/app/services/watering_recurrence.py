@@ -0,0 +1,141 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models.watering_recurrence import WateringRecurrence
+from app.models.watering import Watering
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Interval used when neither the recurrence nor the plant defines one
+DEFAULT_INTERVAL_DAYS = 7
+
+def occurrence_dates(
+    anchor_date: date,
+    interval_days: int,
+    start_date: date,
+    end_date: date,
+    today: date
+) -> List[date]:
+    """Base dates of a recurrence inside [start_date, end_date).
+
+    An overdue anchor is due today; later occurrences follow every
+    interval_days from there.
+    """
+    interval = max(interval_days or DEFAULT_INTERVAL_DAYS, 1)
+    current = max(anchor_date, today)
+    if current < start_date:
+        steps = -(-(start_date - current).days // interval)
+        current += timedelta(days=steps * interval)
+
+    dates = []
+    while current < end_date:
+        dates.append(current)
+        current += timedelta(days=interval)
+    return dates
+
+def get_plant_intervals(db: Session, plant_ids: Iterable[int]) -> Dict[int, int]:
+    """Watering frequency in days per plant"""
+    plant_ids = set(plant_ids)
+    if not plant_ids:
+        return {}
+    rows = db.query(Watering.plant_id, Watering.frequency_days).filter(Watering.plant_id.in_(plant_ids)).all()
+    return {row.plant_id: row.frequency_days for row in rows if row.frequency_days}
+
+def expand_recurrences(
+    db: Session,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    today: date,
+    plant_ids: Optional[Iterable[int]] = None
+) -> List[Tuple[int, date]]:
+    """(plant_id, base_date) of every occurrence of a user's recurrences in [start_date, end_date)"""
+    query = db.query(WateringRecurrence).filter(WateringRecurrence.user_id == user_id)
+    if plant_ids is not None:
+        query = query.filter(WateringRecurrence.plant_id.in_(list(plant_ids)))
+    recurrences = query.all()
+
+    intervals = get_plant_intervals(db, [r.plant_id for r in recurrences])
+    occurrences = []
+    for recurrence in recurrences:
+        interval = recurrence.interval_days or intervals.get(recurrence.plant_id, DEFAULT_INTERVAL_DAYS)
+        for base_date in occurrence_dates(recurrence.anchor_date, interval, start_date, end_date, today):
+            occurrences.append((recurrence.plant_id, base_date))
+    return occurrences
+
+def ensure_recurrences(db: Session, pairs: Iterable[Tuple[int, int]], anchor_date: date) -> int:
+    """Create recurrences for (user_id, plant_id) pairs that do not have one yet"""
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "plant_id": plant_id, "anchor_date": anchor_date, "created_at": now, "updated_at": now}
+        for user_id, plant_id in sorted(set(pairs))
+    ]
+    if not rows:
+        return 0
+    result = db.execute(pg_insert(WateringRecurrence).values(rows).on_conflict_do_nothing())
+    return result.rowcount
+
+def advance_recurrences(db: Session, pairs: Iterable[Tuple[int, int]], completed_on: date) -> int:
+    """Move each (user_id, plant_id) recurrence to the occurrence after a completion.
+
+    A single INSERT ... ON CONFLICT DO UPDATE, so plants without a recurrence
+    yet get one as well.
+    """
+    pairs = sorted(set(pairs))
+    if not pairs:
+        return 0
+
+    existing = {
+        (r.user_id, r.plant_id): r.interval_days
+        for r in db.query(WateringRecurrence).filter(
+            WateringRecurrence.user_id.in_({user_id for user_id, _ in pairs}),
+            WateringRecurrence.plant_id.in_({plant_id for _, plant_id in pairs})
+        ).all()
+    }
+    intervals = get_plant_intervals(db, [plant_id for _, plant_id in pairs])
+
+    now = datetime.utcnow()
+    rows = []
+    for user_id, plant_id in pairs:
+        interval = existing.get((user_id, plant_id)) or intervals.get(plant_id, DEFAULT_INTERVAL_DAYS)
+        rows.append({
+            "user_id": user_id,
+            "plant_id": plant_id,
+            "anchor_date": completed_on + timedelta(days=interval),
+            "created_at": now,
+            "updated_at": now
+        })
+
+    stmt = pg_insert(WateringRecurrence).values(rows)
+    result = db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "plant_id"],
+        set_={"anchor_date": stmt.excluded.anchor_date, "updated_at": stmt.excluded.updated_at}
+    ))
+    return result.rowcount
+
+def rewind_recurrence(db: Session, user_id: int, plant_id: int, due_date: date) -> None:
+    """Make an occurrence due again after its completion was undone"""
+    now = datetime.utcnow()
+    stmt = pg_insert(WateringRecurrence).values(
+        user_id=user_id, plant_id=plant_id, anchor_date=due_date, created_at=now, updated_at=now
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "plant_id"],
+        set_={
+            "anchor_date": func.least(WateringRecurrence.anchor_date, stmt.excluded.anchor_date),
+            "updated_at": stmt.excluded.updated_at
+        }
+    ))
+
+def delete_recurrences(db: Session, user_id: int, plant_ids: Iterable[int]) -> int:
+    """Remove the recurrences of plants that left a user's garden"""
+    plant_ids = list(plant_ids)
+    if not plant_ids:
+        return 0
+    return db.query(WateringRecurrence).filter(
+        WateringRecurrence.user_id == user_id,
+        WateringRecurrence.plant_id.in_(plant_ids)
+    ).delete(synchronize_session=False)
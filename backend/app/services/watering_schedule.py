@@ -1,13 +1,22 @@
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models.watering_schedule import WateringSchedule
-from app.schemas.watering_schedule import WateringScheduleCreate, WateringScheduleUpdate
+from app.schemas.watering_schedule import (
+    WateringSchedule as WateringScheduleSchema,
+    WateringScheduleCreate,
+    WateringScheduleUpdate,
+    WateringScheduleBatchComplete
+)
 from fastapi import HTTPException
 from datetime import date, datetime, timedelta
 from app.models.user_plants import UserPlant
 from app.models.plants import Plant
 from app.models.watering import Watering
 from app.models.users import User
+from app.models.idempotency_keys import IdempotencyKey
+from app.models.watering_recurrence import WateringRecurrence
 import logging
 from typing import List, Optional, Dict
 from collections import defaultdict
@@ -15,6 +24,15 @@ import functools
 from cachetools import TTLCache, cached
 from app.models.weather_forecast import WeatherForecast
 from app.core.config import settings
+from app.services.adjustment_rules import get_rule_lookup
+from app.core import events
+from app.core.events import schedule_events
+from app.services.watering_history import refresh_history
+from app.services.weather_locations import get_user_location
+from app.services.weather_daily import get_daily_weather
+from app.services.watering_recurrence import (
+    expand_recurrences, ensure_recurrences, advance_recurrences, rewind_recurrence
+)
 
 # Set up logging
 logging.basicConfig(
@@ -38,7 +56,98 @@ def _get_user_plants(db: Session, user_id: int) -> List[UserPlant]:
             .all()
         )
 
-def get_user_watering_schedule(db: Session, user_id: int) -> dict:
+def resolve_schedule_window(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    days: Optional[int] = None
+) -> tuple[date, int]:
+    """Resolve from/to/days request parameters into a (start date, number of days) window"""
+    start_date = date_from or datetime.now().date()
+
+    if date_to is not None:
+        if date_to < start_date:
+            raise ValueError("date_to must not be before date_from")
+        days = (date_to - start_date).days + 1
+    elif days is None:
+        days = settings.SCHEDULE_DEFAULT_DAYS
+
+    if days < 1:
+        raise ValueError("Schedule window must cover at least one day")
+    if days > settings.SCHEDULE_MAX_DAYS:
+        raise ValueError(f"Schedule window cannot exceed {settings.SCHEDULE_MAX_DAYS} days")
+
+    return start_date, days
+
+# Largest number of days the weather rules can move an occurrence
+MAX_WEATHER_SHIFT_DAYS = 3
+
+def get_schedule_entries(
+    db: Session,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    plant_ids: Optional[List[int]] = None
+) -> List[dict]:
+    """Occurrences scheduled in [start_date, end_date), stored and generated.
+
+    Stored rows are completions and exceptions; they override the generated
+    occurrence with the same base date. Generated occurrences come from the
+    user's recurrences with today's weather shift applied in memory.
+    """
+    today = datetime.now().date()
+
+    query = db.query(WateringSchedule).filter(
+        WateringSchedule.user_id == user_id,
+        WateringSchedule.scheduled_date >= start_date,
+        WateringSchedule.scheduled_date < end_date
+    )
+    if plant_ids is not None:
+        query = query.filter(WateringSchedule.plant_id.in_(plant_ids))
+
+    entries = []
+    stored_keys = set()
+    for schedule in query.all():
+        base_date = schedule.base_date or schedule.scheduled_date
+        stored_keys.add((schedule.plant_id, base_date))
+        entries.append({
+            "schedule_id": schedule.id,
+            "plant_id": schedule.plant_id,
+            "base_date": base_date,
+            "scheduled_date": schedule.scheduled_date,
+            "completed": bool(schedule.completed),
+            "completion_timestamp": schedule.completion_timestamp,
+            "weather_adjusted": bool(schedule.weather_adjusted)
+        })
+
+    # Occurrences just outside the window can be shifted into it
+    margin = timedelta(days=MAX_WEATHER_SHIFT_DAYS)
+    occurrences = expand_recurrences(db, user_id, start_date - margin, end_date + margin, today, plant_ids)
+    shifts = get_daily_weather_shifts(db, today, get_user_location(db, user_id)) if occurrences else {}
+    for plant_id, base_date in occurrences:
+        if (plant_id, base_date) in stored_keys:
+            continue
+        scheduled_date = max(base_date + timedelta(days=shifts.get(base_date, 0)), today)
+        if not start_date <= scheduled_date < end_date:
+            continue
+        entries.append({
+            "schedule_id": None,
+            "plant_id": plant_id,
+            "base_date": base_date,
+            "scheduled_date": scheduled_date,
+            "completed": False,
+            "completion_timestamp": None,
+            "weather_adjusted": scheduled_date != base_date
+        })
+
+    entries.sort(key=lambda entry: (entry["scheduled_date"], entry["plant_id"]))
+    return entries
+
+def get_user_watering_schedule(
+    db: Session,
+    user_id: int,
+    date_from: Optional[date] = None,
+    days: Optional[int] = None
+) -> dict:
     """Get simplified watering schedule for all plants of a user"""
     try:
         logger.info(f"Getting watering schedule for user {user_id}")
@@ -50,14 +159,22 @@ def get_user_watering_schedule(db: Session, user_id: int) -> dict:
             logger.info(f"No plants found for user {user_id}")
             return {"schedule": [], "last_updated": datetime.now().isoformat()}
         
-        # Get all watering schedules for these plants
+        today = datetime.now().date()
+        start_date, days = resolve_schedule_window(date_from, days=days)
+        end_date = start_date + timedelta(days=days)
+
+        # Pending occurrences inside the requested window, plus anything
+        # completed today so it can still be shown as watered
         plant_ids = [up.plant_id for up in user_plants]
-        schedules = db.query(WateringSchedule).filter(
-                WateringSchedule.user_id == user_id,
-            WateringSchedule.plant_id.in_(plant_ids)
-        ).order_by(WateringSchedule.scheduled_date).all()
+        entries = [
+            entry for entry in get_schedule_entries(db, user_id, min(start_date, today), end_date, plant_ids)
+            if (not entry["completed"] and entry["scheduled_date"] >= max(start_date, today))
+            or (entry["completion_timestamp"] and entry["completion_timestamp"].date() == today)
+        ]
+        entries_by_plant: Dict[int, List[dict]] = defaultdict(list)
+        for entry in entries:
+            entries_by_plant[entry["plant_id"]].append(entry)
 
-        today = datetime.now().date()
         # Build a mapping: (date, section) -> list of plant dicts
         day_section_plants: Dict[str, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
 
@@ -65,10 +182,10 @@ def get_user_watering_schedule(db: Session, user_id: int) -> dict:
             section = user_plant.section if user_plant.section else "Unassigned"
             if not user_plant.plant or not user_plant.plant.watering_info:
                 continue
-            plant_schedules = [s for s in schedules if s.plant_id == user_plant.plant_id]
+            plant_entries = entries_by_plant.get(user_plant.plant_id, [])
             # 1. Add completed schedule for today (if exists)
-            for sched in plant_schedules:
-                if sched.completed and sched.completion_timestamp and sched.completion_timestamp.date() == today:
+            for entry in plant_entries:
+                if entry["completed"]:
                     day_section_plants[today.isoformat()][section].append({
                         "plant_id": user_plant.plant_id,
                         "plant_name": user_plant.plant.common_name,
@@ -79,28 +196,28 @@ def get_user_watering_schedule(db: Session, user_id: int) -> dict:
                         "next_watering": today.isoformat(),
                         "last_watered": today.isoformat()
                     })
-            # 2. Add all future, uncompleted schedules
-            for sched in plant_schedules:
-                if not sched.completed and sched.scheduled_date >= today:
-                    day_section_plants[sched.scheduled_date.isoformat()][section].append({
+            # 2. Add all future, uncompleted occurrences
+            for entry in plant_entries:
+                if not entry["completed"]:
+                    day_section_plants[entry["scheduled_date"].isoformat()][section].append({
                         "plant_id": user_plant.plant_id,
                         "plant_name": user_plant.plant.common_name,
                         "image_url": user_plant.plant.image_url,
                         "frequency_days": user_plant.plant.watering_info.frequency_days,
                         "depth_mm": user_plant.plant.watering_info.depth_mm,
                         "volume_feet": user_plant.plant.watering_info.volume_feet,
-                        "next_watering": sched.scheduled_date.isoformat(),
-                        "last_watered": sched.completion_timestamp.date().isoformat() if sched.completion_timestamp else None
+                        "next_watering": entry["scheduled_date"].isoformat(),
+                        "last_watered": entry["completion_timestamp"].date().isoformat() if entry["completion_timestamp"] else None
                     })
 
-        # Create a schedule for the next 21 days (to accommodate the highest interval)
+        # Weather forecast for the window (only available for the next 7 days)
+        weather_forecast = get_weather_forecast(db, start_date, end_date, get_user_location(db, user_id))
+
+        # Create a schedule for each day in the requested window
         schedule = []
-        for day in range(21):  # Show three weeks
-            current_date = today + timedelta(days=day)
+        for day in range(days):
+            current_date = start_date + timedelta(days=day)
             day_str = current_date.strftime("%Y-%m-%d")
-        
-            # Get weather forecast for this day
-            weather_forecast = get_weather_forecast(db)
 
             # Create day schedule
             day_schedule = {
@@ -109,7 +226,7 @@ def get_user_watering_schedule(db: Session, user_id: int) -> dict:
             }
 
             # Add weather data if forecast exists
-            if weather_forecast and day < 7:  # Only add weather data for next 7 days
+            if day_str in weather_forecast:
                 day_schedule["weather"] = {
                     "temperature": round(weather_forecast[day_str]["temperature"], 1),
                     "precipitation": round(weather_forecast[day_str]["precipitation"], 1),
@@ -160,7 +277,11 @@ def get_user_watering_schedule(db: Session, user_id: int) -> dict:
         raise
 
 def create_watering_schedule(db: Session, user_id: int, plant_id: int):
-    """Create a new watering schedule for a plant"""
+    """Start watering a plant today (idempotent); returns its next occurrence.
+
+    Only the recurrence is stored: pending occurrences are generated from it
+    on read and a row is written once an occurrence is completed.
+    """
     try:
         logger.info(f"Creating watering schedule for user {user_id}, plant {plant_id}")
         
@@ -177,43 +298,33 @@ def create_watering_schedule(db: Session, user_id: int, plant_id: int):
 
         today = datetime.now().date()
         
-        # Check if a schedule already exists for this plant
-        existing_schedule = db.query(WateringSchedule).filter(
-            WateringSchedule.user_id == user_id,
-            WateringSchedule.plant_id == plant_id,
-            WateringSchedule.scheduled_date == today
+        # Concurrent requests resolve in the database instead of racing on a SELECT
+        ensure_recurrences(db, [(user_id, plant_id)], today)
+        db.commit()
+
+        recurrence = db.query(WateringRecurrence).filter(
+            WateringRecurrence.user_id == user_id,
+            WateringRecurrence.plant_id == plant_id
         ).first()
+        due_date = max(recurrence.anchor_date, today)
+        entries = get_schedule_entries(
+            db, user_id, today, due_date + timedelta(days=MAX_WEATHER_SHIFT_DAYS + 1), [plant_id]
+        )
+        entry = next((entry for entry in entries if not entry["completed"]), None)
         
-        if existing_schedule:
-            logger.info(f"Schedule already exists for plant {plant_id} on {today}")
-            return existing_schedule
-        
-        # Create a schedule for today
-        schedule = WateringSchedule(
+        logger.info("Successfully created watering schedule")
+        return WateringScheduleSchema(
+            id=entry["schedule_id"] if entry else None,
             user_id=user_id,
             plant_id=plant_id,
-            scheduled_date=today,
+            scheduled_date=entry["scheduled_date"] if entry else due_date,
             water_needed=True,
             volume_needed=watering_info.volume_feet,
-            weather_dependent=False,
-            completed=False,  # Never completed by default
-            completion_timestamp=None,  # No completion timestamp
-            next_scheduled_date=None  # Don't set next scheduled date until plant is watered
+            completed=False
         )
-        
-        # Ensure the schedule is not marked as completed
-        if schedule.completed:
-            schedule.completed = False
-            schedule.completion_timestamp = None
-        
-        db.add(schedule)
-        db.commit()
-        db.refresh(schedule)
-        
-        logger.info("Successfully created watering schedule")
-        return schedule
     except Exception as e:
         logger.error(f"Error creating watering schedule: {str(e)}")
+        db.rollback()
         raise
 
 def get_schedule(db: Session, schedule_id: int):
@@ -245,119 +356,169 @@ def get_user_plant_schedules(
         
     return query.order_by(WateringSchedule.scheduled_date).all()
 
-def calculate_weather_impact(temperature: float, precipitation: float) -> tuple[float, int]:
-    """Calculate the impact of weather conditions on watering needs"""
-    volume_adjustment = 1.0
-    date_adjustment = 0
-    
-    # Temperature impact
-    if temperature > 30:
-        volume_adjustment *= 1.2  # Increase volume by 20%
-        date_adjustment -= 1  # Water one day earlier
-    elif temperature < 10:
-        volume_adjustment *= 0.8  # Decrease volume by 20%
-        date_adjustment += 1  # Water one day later
-    
-    # Precipitation impact
-    if precipitation > 10:
-        volume_adjustment *= 0.5  # Decrease volume by 50%
-        date_adjustment += 1  # Water one day later
-    
-    return volume_adjustment, date_adjustment
+def calculate_weather_impact(temperature: float, precipitation: float, wind_speed: float = None) -> tuple[float, int]:
+    """Calculate the impact of weather conditions on watering needs (volume multiplier, days to shift)"""
+    impact = get_rule_lookup().lookup(
+        [temperature],
+        [precipitation],
+        [wind_speed if wind_speed is not None else float("nan")]
+    )
+    return float(impact["volume_adjustment"][0]), int(impact["shift_days"][0])
 
 def adjust_watering_date(scheduled_date: date, adjustment_days: int) -> date:
     """Adjust a watering date by the specified number of days"""
     return scheduled_date + timedelta(days=adjustment_days)
 
-def update_schedule(db: Session, schedule_id: int, schedule_update: WateringScheduleUpdate):
-    """Update a watering schedule and handle next watering date"""
+def claim_idempotency_key(db: Session, key: str, scope: str) -> Optional[IdempotencyKey]:
+    """Claim an idempotency key inside the current transaction.
+
+    Returns None when the key is new (the caller should do the work), or the
+    stored record when the request is a retry. A concurrent request with the
+    same key blocks on the insert until the first transaction finishes. A key
+    first used for another schedule or request type is rejected with 422.
+    """
+    claimed = db.execute(
+        pg_insert(IdempotencyKey)
+        .values(key=key, scope=scope, created_at=datetime.utcnow())
+        .on_conflict_do_nothing()
+        .returning(IdempotencyKey.key)
+    ).first()
+    if claimed:
+        return None
+    previous = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+    if previous.scope != scope:
+        logger.warning(f"Idempotency key {key} reused for {scope}, first used for {previous.scope}")
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    return previous
+
+def store_idempotent_response(db: Session, key: str, response: dict):
+    """Keep the result of a claimed key so retries get the same response"""
+    db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update(
+        {"response": response}, synchronize_session=False
+    )
+
+def prune_idempotency_keys(db: Session, ttl_hours: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """Remove idempotency keys older than the TTL; returns keys removed"""
+    ttl_hours = settings.IDEMPOTENCY_KEY_TTL_HOURS if ttl_hours is None else ttl_hours
+    cutoff = (now or datetime.utcnow()) - timedelta(hours=ttl_hours)
+    removed = db.query(IdempotencyKey).filter(
+        IdempotencyKey.created_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    if removed:
+        logger.info(f"Pruned {removed} idempotency keys older than {cutoff}")
+    return removed
+
+def _insert_completion_events(db: Session, user_id: int, entries: List[dict], completed_at: datetime) -> List[int]:
+    """Store generated occurrences as completed rows; returns the new row ids"""
+    rows = [
+        {
+            "user_id": user_id,
+            "plant_id": entry["plant_id"],
+            "scheduled_date": entry["scheduled_date"],
+            "base_date": entry["base_date"],
+            "water_needed": True,
+            "weather_dependent": True,
+            "weather_adjusted": entry["weather_adjusted"],
+            "completed": True,
+            "completion_timestamp": completed_at
+        }
+        for entry in entries
+    ]
+    if not rows:
+        return []
+    result = db.execute(
+        pg_insert(WateringSchedule).values(rows).on_conflict_do_nothing()
+        .returning(WateringSchedule.id)
+    )
+    return [row.id for row in result]
+
+def update_schedule(
+    db: Session,
+    schedule_id: int,
+    schedule_update: WateringScheduleUpdate,
+    idempotency_key: Optional[str] = None
+):
+    """Update a watering schedule and move its recurrence along"""
     try:
         logger.info(f"Updating schedule {schedule_id}")
-        db_schedule = get_schedule(db, schedule_id)
+        # Lock the row so concurrent updates of the same schedule serialize
+        db_schedule = db.query(WateringSchedule).filter(
+            WateringSchedule.id == schedule_id
+        ).with_for_update().first()
         if not db_schedule:
             logger.error(f"Schedule {schedule_id} not found")
             return None
 
+        if idempotency_key:
+            previous = claim_idempotency_key(db, idempotency_key, f"schedule:{schedule_id}")
+            if previous:
+                logger.info(f"Replaying update of schedule {schedule_id} for key {idempotency_key}")
+                db.commit()
+                if previous.response is None:
+                    return get_schedule(db, schedule_id)
+                return WateringScheduleSchema(**previous.response)
+
         update_data = schedule_update.model_dump(exclude_unset=True)
+        update_data.pop("batch_update", None)
         today = datetime.now().date()
+        completed_now = False
+        uncompleted = False
+        previous_date = db_schedule.scheduled_date
 
         # Handle completion status changes
         if schedule_update.completed and not db_schedule.completed:
             # If marking as completed, set completion timestamp to now
             update_data["completion_timestamp"] = datetime.utcnow()
-            
-            # Get plant and its watering requirements
-            plant = db.query(Plant).filter(Plant.id == db_schedule.plant_id).first()
-            if not plant or not plant.watering_info:
-                logger.error(f"Plant or watering info not found for plant {db_schedule.plant_id}")
-                return None
-
-            # Calculate base next date from frequency
-            next_date = today + timedelta(days=plant.watering_info.frequency_days)
-            
-            # Get weather forecast for the next date
-            forecast = db.query(WeatherForecast).filter(
-                WeatherForecast.timestamp >= next_date,
-                WeatherForecast.timestamp < next_date + timedelta(days=1)
-            ).order_by(WeatherForecast.timestamp).first()
-            
-            if forecast:
-                # Adjust based on temperature
-                if forecast.temperature > 30:
-                    next_date = next_date - timedelta(days=1)
-                    logger.info(f"Adjusted next watering date due to high temperature")
-                
-                # Adjust based on precipitation
-                if forecast.precipitation > 10:
-                    next_date = next_date + timedelta(days=1)
-                    logger.info(f"Adjusted next watering date due to high precipitation")
-
-            # Check if a schedule already exists for the next date
-            existing_schedule = db.query(WateringSchedule).filter(
-                WateringSchedule.user_id == db_schedule.user_id,
-                WateringSchedule.plant_id == db_schedule.plant_id,
-                WateringSchedule.scheduled_date == next_date
-            ).first()
-
-            if not existing_schedule:
-                # Create next schedule with weather adjustment info
-                next_schedule = WateringSchedule(
-                    user_id=db_schedule.user_id,
-                    plant_id=db_schedule.plant_id,
-                    scheduled_date=next_date,
-                    water_needed=True,
-                    volume_needed=plant.watering_info.volume_feet,
-                    weather_dependent=True,
-                    completed=False,
-                    completion_timestamp=None,
-                    weather_adjusted=forecast is not None and (forecast.temperature > 30 or forecast.precipitation > 10),
-                    frequency_days=plant.watering_info.frequency_days,
-                    depth_mm=plant.watering_info.depth_mm,
-                    volume_feet=plant.watering_info.volume_feet
-                )
-                db.add(next_schedule)
-                db.commit()  # Commit to ensure the next schedule is saved
-                logger.info(f"Created next schedule for {next_date}")
-
-            # Only adjust all schedules for weather if batch_update is not True
-            if not getattr(schedule_update, 'batch_update', False):
-                adjust_all_schedules_for_weather(db, db_schedule.user_id)
+            completed_now = True
+            # The next occurrence is generated from the recurrence
+            advance_recurrences(db, [(db_schedule.user_id, db_schedule.plant_id)], today)
 
         elif not schedule_update.completed and db_schedule.completed:
             # If unmarking as completed, clear completion timestamp
             update_data["completion_timestamp"] = None
+            uncompleted = True
 
         # If not completed and scheduled date is in the past, update to today
         if not schedule_update.completed and db_schedule.scheduled_date < today:
             update_data["scheduled_date"] = today
+            update_data["base_date"] = today
             update_data["water_needed"] = True
 
         # Update the schedule
         for key, value in update_data.items():
             setattr(db_schedule, key, value)
 
+        if uncompleted:
+            # The undone occurrence is due again; the stored row stands in for it
+            rewind_recurrence(
+                db, db_schedule.user_id, db_schedule.plant_id,
+                db_schedule.base_date or db_schedule.scheduled_date
+            )
+
+        db.flush()
+        refresh_history(db, {
+            (db_schedule.user_id, db_schedule.plant_id, previous_date),
+            (db_schedule.user_id, db_schedule.plant_id, db_schedule.scheduled_date)
+        })
+        if idempotency_key:
+            store_idempotent_response(
+                db, idempotency_key,
+                WateringScheduleSchema.model_validate(db_schedule).model_dump(mode="json")
+            )
         db.commit()
         db.refresh(db_schedule)
+
+        if completed_now or uncompleted:
+            schedule_events.publish(
+                db_schedule.user_id,
+                events.SCHEDULE_COMPLETED if completed_now else events.SCHEDULE_UNCOMPLETED,
+                plant_ids=[db_schedule.plant_id],
+                date=db_schedule.scheduled_date.isoformat()
+            )
         return db_schedule
 
     except Exception as e:
@@ -365,85 +526,160 @@ def update_schedule(db: Session, schedule_id: int, schedule_update: WateringSche
         db.rollback()
         raise
 
-def adjust_all_schedules_for_weather(db: Session, user_id: int):
-    """Adjust all schedules for a user based on real weather data"""
+def complete_schedules_batch(
+    db: Session,
+    batch: WateringScheduleBatchComplete,
+    idempotency_key: Optional[str] = None
+) -> dict:
+    """Mark many occurrences as completed and advance their recurrences.
+
+    Stored rows are completed with a single UPDATE ... RETURNING. When
+    selecting by date, generated occurrences on that date are stored as
+    completed rows with a single INSERT ... ON CONFLICT DO NOTHING. The
+    recurrences then move on in one upsert.
+    """
     try:
+        now = datetime.utcnow()
         today = datetime.now().date()
-        # Get all incomplete schedules for the user
-        schedules = db.query(WateringSchedule).filter(
-            WateringSchedule.user_id == user_id,
-            WateringSchedule.completed == False,
-            WateringSchedule.scheduled_date >= today
+
+        if idempotency_key:
+            previous = claim_idempotency_key(db, idempotency_key, "complete:batch")
+            if previous:
+                logger.info(f"Replaying batch completion for key {idempotency_key}")
+                db.commit()
+                return previous.response or {"completed_ids": [], "completed": 0, "advanced": 0}
+
+        stmt = update(WateringSchedule).where(WateringSchedule.completed == False)
+        plant_ids = None
+        if batch.schedule_ids:
+            stmt = stmt.where(WateringSchedule.id.in_(batch.schedule_ids))
+        else:
+            stmt = stmt.where(
+                WateringSchedule.user_id == batch.user_id,
+                WateringSchedule.scheduled_date == batch.scheduled_date
+            )
+            if batch.section is not None or batch.plant_ids is not None:
+                selected = db.query(UserPlant.plant_id).filter(UserPlant.user_id == batch.user_id)
+                if batch.section == "Unassigned":
+                    selected = selected.filter(UserPlant.section.is_(None))
+                elif batch.section is not None:
+                    selected = selected.filter(UserPlant.section == batch.section)
+                if batch.plant_ids is not None:
+                    selected = selected.filter(UserPlant.plant_id.in_(batch.plant_ids))
+                plant_ids = [row.plant_id for row in selected.all()]
+                stmt = stmt.where(WateringSchedule.plant_id.in_(plant_ids))
+
+        completed = db.execute(
+            stmt.values(completed=True, completion_timestamp=now)
+            .returning(
+                WateringSchedule.id, WateringSchedule.user_id,
+                WateringSchedule.plant_id, WateringSchedule.scheduled_date
+            )
+            .execution_options(synchronize_session=False)
         ).all()
-        
-        # Get weather forecasts for the next 7 days
-        forecasts = db.query(WeatherForecast).filter(
-            WeatherForecast.timestamp >= today,
-            WeatherForecast.timestamp < today + timedelta(days=7)
-        ).order_by(WeatherForecast.timestamp).all()
-        
-        # Group forecasts by day
-        daily_forecasts = {}
-        for forecast in forecasts:
-            date_str = forecast.timestamp.date().isoformat()
-            if date_str not in daily_forecasts:
-                daily_forecasts[date_str] = {
-                    "temperatures": [],
-                    "precipitations": [],
-                    "wind_speeds": []
-                }
-            daily_forecasts[date_str]["temperatures"].append(forecast.temperature)
-            daily_forecasts[date_str]["precipitations"].append(forecast.precipitation)
-            daily_forecasts[date_str]["wind_speeds"].append(forecast.wind_speed)
-        
-        # Calculate daily averages
-        weather_data = {}
-        for date_str, data in daily_forecasts.items():
-            avg_temp = sum(data["temperatures"]) / len(data["temperatures"])
-            avg_precip = sum(data["precipitations"]) / len(data["precipitations"])
-            avg_wind = sum(data["wind_speeds"]) / len(data["wind_speeds"])
-            
-            weather_data[date_str] = {
-                "temperature": round(avg_temp, 1),
-                "precipitation": round(avg_precip, 1),
-                "wind_speed": round(avg_wind, 1)
-            }
-        
-        for schedule in schedules:
-            original_date = schedule.scheduled_date
-            date_str = original_date.isoformat()
-            
-            # Get weather data for the scheduled date
-            if date_str in weather_data:
-                weather = weather_data[date_str]
-                
-                # Adjust based on temperature
-                if weather["temperature"] > 30:
-                    schedule.scheduled_date = original_date - timedelta(days=1)
-                    schedule.weather_adjusted = True
-                    logger.info(f"Adjusted schedule {schedule.id} from {original_date} to {schedule.scheduled_date} due to high temperature")
-                
-                # Adjust based on precipitation
-                if weather["precipitation"] > 10:
-                    schedule.scheduled_date = original_date + timedelta(days=1)
-                    schedule.weather_adjusted = True
-                    logger.info(f"Adjusted schedule {schedule.id} from {original_date} to {schedule.scheduled_date} due to high precipitation")
-        
+        completed_ids = [row.id for row in completed]
+        pairs = {(row.user_id, row.plant_id) for row in completed}
+        history_keys = {(row.user_id, row.plant_id, row.scheduled_date) for row in completed}
+
+        if not batch.schedule_ids:
+            generated = [
+                entry for entry in get_schedule_entries(
+                    db, batch.user_id, batch.scheduled_date,
+                    batch.scheduled_date + timedelta(days=1), plant_ids
+                )
+                if entry["schedule_id"] is None
+            ]
+            completed_ids += _insert_completion_events(db, batch.user_id, generated, now)
+            pairs |= {(batch.user_id, entry["plant_id"]) for entry in generated}
+            history_keys |= {(batch.user_id, entry["plant_id"], entry["scheduled_date"]) for entry in generated}
+
+        advanced = advance_recurrences(db, pairs, today)
+        refresh_history(db, history_keys)
+        result = {
+            "completed_ids": completed_ids,
+            "completed": len(completed_ids),
+            "advanced": advanced
+        }
+        if idempotency_key:
+            store_idempotent_response(db, idempotency_key, result)
         db.commit()
+
+        completed_plants = defaultdict(set)
+        for user_id, plant_id in pairs:
+            completed_plants[user_id].add(plant_id)
+        for user_id, plant_ids in completed_plants.items():
+            schedule_events.publish(user_id, events.SCHEDULE_COMPLETED, plant_ids=sorted(plant_ids))
+
+        logger.info(f"Batch completed {len(completed_ids)} schedules, advanced {advanced} recurrences")
+        return result
+    except Exception as e:
+        logger.error(f"Error completing schedules in batch: {str(e)}")
+        db.rollback()
+        raise
+
+DAILY_WEATHER_SQL = """
+    SELECT location,
+           day,
+           temperature_mean AS temperature,
+           precipitation_mean AS precipitation,
+           wind_speed_mean AS wind_speed
+    FROM weather_daily
+    WHERE day >= :window_start AND day < :window_end
+      {filters}
+"""
+
+def get_weather_shifts_by_location(
+    db: Session,
+    today: date,
+    locations: Optional[List[str]] = None
+) -> Dict[str, Dict[date, int]]:
+    """Date shift per forecast location and day from weather_daily and the rule lookup"""
+    params = {"window_start": today, "window_end": today + timedelta(days=7)}
+    filters = ""
+    if locations is not None:
+        filters = "AND location = ANY(:locations)"
+        params["locations"] = list(locations)
+    daily = db.execute(text(DAILY_WEATHER_SQL.format(filters=filters)), params).all()
+    if not daily:
+        return {}
+    shifts = get_rule_lookup().lookup(
+        [row.temperature if row.temperature is not None else float("nan") for row in daily],
+        [row.precipitation if row.precipitation is not None else float("nan") for row in daily],
+        [row.wind_speed if row.wind_speed is not None else float("nan") for row in daily]
+    )["shift_days"]
+    by_location: Dict[str, Dict[date, int]] = defaultdict(dict)
+    for row, shift in zip(daily, shifts):
+        by_location[row.location][row.day] = int(shift)
+    return dict(by_location)
+
+def get_daily_weather_shifts(db: Session, today: date, location: Optional[str] = None) -> Dict[date, int]:
+    """Date shift per forecast day of one location (the default location when None)"""
+    location = location or settings.WEATHER_LOCATION
+    return get_weather_shifts_by_location(db, today, [location]).get(location, {})
+
+def adjust_all_schedules_for_weather(db: Session, user_id: Optional[int] = None):
+    """Tell clients that weather-adjusted dates changed.
+
+    Pending occurrences are generated from recurrences and shifted by the
+    current weather_daily rollup on every read (see get_schedule_entries),
+    so a new forecast needs no writes; stored rows are completions and
+    explicit overrides, which keep their dates. Runs for a single user, or
+    for every user when user_id is None (the forecast refresh job).
+    """
+    try:
+        schedule_events.publish(user_id, events.WEATHER_ADJUSTED)
         return True
-        
     except Exception as e:
         logger.error(f"Error adjusting schedules for weather: {str(e)}")
-        db.rollback()
         return False
 
 def get_schedules(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    """Get all watering schedules for a user"""
+    """Get all watering schedules for a user.
+
+    This is a pure read; weather adjustments are applied by the forecast
+    refresh job (see app.core.scheduler) rather than on every GET.
+    """
     try:
-        # First adjust all schedules for weather
-        adjust_all_schedules_for_weather(db, user_id)
-        
-        # Then get the adjusted schedules
         schedules = db.query(WateringSchedule).filter(
             WateringSchedule.user_id == user_id
         ).offset(skip).limit(limit).all()
@@ -459,72 +695,41 @@ def delete_schedule(db: Session, schedule_id: int):
         return False
     
     db.delete(db_schedule)
+    db.flush()
+    refresh_history(db, [(db_schedule.user_id, db_schedule.plant_id, db_schedule.scheduled_date)])
     db.commit()
     return True
 
 def get_upcoming_schedules(db: Session, user_id: int, days: int = 7):
     today = date.today()
     end_date = today + timedelta(days=days)
-    return db.query(WateringSchedule).filter(
-        WateringSchedule.user_id == user_id,
-        WateringSchedule.scheduled_date >= today,
-        WateringSchedule.scheduled_date <= end_date,
-        WateringSchedule.completed == False
-    ).order_by(WateringSchedule.scheduled_date).all()
-
-def get_weather_forecast(db: Session) -> dict:
-    """Get weather forecast for the next 7 days"""
+    return [
+        {
+            "id": entry["schedule_id"],
+            "user_id": user_id,
+            "plant_id": entry["plant_id"],
+            "scheduled_date": entry["scheduled_date"],
+            "completed": False,
+            "completion_timestamp": None
+        }
+        for entry in get_schedule_entries(db, user_id, today, end_date + timedelta(days=1))
+        if not entry["completed"]
+    ]
+
+def get_weather_forecast(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    location: Optional[str] = None
+) -> dict:
+    """Get daily weather forecast of a location for start_date <= day < end_date (defaults to the next 7 days)"""
     try:
-        # Get weather forecasts from database
-        forecasts = db.query(WeatherForecast)\
-            .filter(WeatherForecast.timestamp >= datetime.now())\
-            .filter(WeatherForecast.timestamp <= datetime.now() + timedelta(days=7))\
-            .order_by(WeatherForecast.timestamp)\
-            .all()
-        
-        # Group forecasts by day and calculate daily averages
-        daily_forecasts = {}
-        for forecast in forecasts:
-            date_str = forecast.timestamp.date().isoformat()
-            if date_str not in daily_forecasts:
-                daily_forecasts[date_str] = {
-                    "temperatures": [],
-                    "precipitations": [],
-                    "wind_speeds": []
-                }
-            
-            daily_forecasts[date_str]["temperatures"].append(forecast.temperature)
-            daily_forecasts[date_str]["precipitations"].append(forecast.precipitation)
-            daily_forecasts[date_str]["wind_speeds"].append(forecast.wind_speed)
-        
-        # Calculate daily averages and determine weather icons
-        result = {}
-        for date_str, data in daily_forecasts.items():
-            avg_temp = sum(data["temperatures"]) / len(data["temperatures"])
-            avg_precip = sum(data["precipitations"]) / len(data["precipitations"])
-            avg_wind = sum(data["wind_speeds"]) / len(data["wind_speeds"])
-            
-            # Determine weather icons based on conditions
-            weather_icons = []
-            if avg_precip > 0:
-                weather_icons.append("rainy")
-            elif avg_temp > 25:
-                weather_icons.append("hot")
-            elif avg_temp < 10:
-                weather_icons.append("cold")
-            elif avg_wind > 15:
-                weather_icons.append("windy")
-            else:
-                weather_icons.append("sunny")
-            
-            result[date_str] = {
-                "temperature": round(avg_temp, 1),
-                "precipitation": round(avg_precip, 1),
-                "wind_speed": round(avg_wind, 1),
-                "weather_icons": weather_icons
-            }
-        
-        return result
+        today = datetime.now().date()
+        # Forecasts reach 7 days ahead of today
+        horizon = today + timedelta(days=8)
+        range_start = max(today, start_date) if start_date else today
+        range_end = min(horizon, end_date) if end_date else horizon
+        return get_daily_weather(db, location or settings.WEATHER_LOCATION, range_start, range_end)
     except Exception as e:
         logger.error(f"Error getting weather forecast: {str(e)}")
         # Return empty forecast if there's an error
@@ -546,28 +751,21 @@ def update_schedule_for_weather(db: Session, schedule: WateringSchedule, adjuste
         return schedule
 
 def adjust_schedule_for_weather(db: Session, schedule: WateringSchedule, forecast: WeatherForecast) -> WateringSchedule:
-    """Adjust watering schedule based on weather forecast."""
-    # Check if weather conditions require adjustment
-    needs_adjustment = False
-    
-    # High temperature adjustment (above 30°C)
-    if forecast.temperature > 30:
-        needs_adjustment = True
-        schedule.scheduled_date = schedule.scheduled_date - timedelta(days=1)
-    
-    # High precipitation adjustment (above 10mm)
-    if forecast.precipitation > 10:
-        needs_adjustment = True
-        schedule.scheduled_date = schedule.scheduled_date + timedelta(days=1)
+    """Adjust watering schedule based on weather forecast (relative to its base date).
+
+    Like get_schedule_entries, an earlier shift never moves a row before today.
+    """
+    base_date = schedule.base_date or schedule.scheduled_date
+    _, shift = calculate_weather_impact(forecast.temperature, forecast.precipitation, forecast.wind_speed)
     
-    # Update adjustment status
-    if needs_adjustment:
-        schedule.weather_adjusted = True
+    schedule.base_date = base_date
+    schedule.scheduled_date = max(datetime.now().date(), base_date + timedelta(days=shift))
+    schedule.weather_adjusted = schedule.scheduled_date != base_date
     
     return schedule
 
-def get_watering_schedule(db: Session, user_id: int, date: str = None):
-    """Get the watering schedule for a user."""
+def get_watering_schedule(db: Session, user_id: int, date: str = None, days: Optional[int] = None):
+    """Get the watering schedule for a user over a window of `days` days starting at `date`."""
     try:
         logger.info(f"Getting watering schedule for user {user_id}")
         
@@ -580,60 +778,24 @@ def get_watering_schedule(db: Session, user_id: int, date: str = None):
                 raise ValueError(f"Invalid date format: {date}")
         else:
             target_date = datetime.utcnow()
+        _, days = resolve_schedule_window(target_date.date(), days=days)
         
-        # Get all user plants
-        user_plants = db.query(UserPlant).filter(UserPlant.user_id == user_id).all()
-        
-        # Get weather forecasts for the next 21 days (3 weeks)
-        forecasts = db.query(WeatherForecast).filter(
-            WeatherForecast.timestamp >= target_date,
-            WeatherForecast.timestamp < target_date + timedelta(days=21)
-        ).order_by(WeatherForecast.timestamp).all()
-        
-        # Group forecasts by day
-        daily_forecasts = {}
-        for forecast in forecasts:
-            date_str = forecast.timestamp.date().isoformat()
-            if date_str not in daily_forecasts:
-                daily_forecasts[date_str] = {
-                    "temperatures": [],
-                    "precipitations": [],
-                    "wind_speeds": []
-                }
-            daily_forecasts[date_str]["temperatures"].append(forecast.temperature)
-            daily_forecasts[date_str]["precipitations"].append(forecast.precipitation)
-            daily_forecasts[date_str]["wind_speeds"].append(forecast.wind_speed)
+        # Get all user plants with their watering info
+        user_plants = db.query(UserPlant).filter(UserPlant.user_id == user_id).options(
+            joinedload(UserPlant.plant).joinedload(Plant.watering_info)
+        ).all()
         
-        # Calculate daily averages and determine weather icons
-        weather_data = {}
-        for date_str, data in daily_forecasts.items():
-            avg_temp = sum(data["temperatures"]) / len(data["temperatures"])
-            avg_precip = sum(data["precipitations"]) / len(data["precipitations"])
-            avg_wind = sum(data["wind_speeds"]) / len(data["wind_speeds"])
-            
-            # Determine weather icons based on conditions
-            weather_icons = []
-            if avg_precip > 0:
-                weather_icons.append("rainy")
-            elif avg_temp > 25:
-                weather_icons.append("hot")
-            elif avg_temp < 10:
-                weather_icons.append("cold")
-            elif avg_wind > 15:
-                weather_icons.append("windy")
-            else:
-                weather_icons.append("sunny")
-            
-            weather_data[date_str] = {
-                "temperature": round(avg_temp, 1),
-                "precipitation": round(avg_precip, 1),
-                "wind_speed": round(avg_wind, 1),
-                "weather_icons": weather_icons
-            }
+        # Daily weather for the requested window
+        weather_data = get_daily_weather(
+            db,
+            get_user_location(db, user_id),
+            target_date.date(),
+            target_date.date() + timedelta(days=days)
+        )
         
         # Initialize schedules for all days in the forecast period
         schedules_by_date = {}
-        for i in range(21):  # Show 3 weeks
+        for i in range(days):
             current_date = (target_date + timedelta(days=i)).date()
             date_str = current_date.isoformat()
             schedules_by_date[date_str] = {
@@ -642,32 +804,22 @@ def get_watering_schedule(db: Session, user_id: int, date: str = None):
                 "weather": weather_data.get(date_str)
             }
         
-        # Get all schedules for the user's plants within the date range
+        # Get all occurrences for the user's plants within the date range
         plant_ids = [up.plant_id for up in user_plants]
         start_date = target_date.date()
-        end_date = start_date + timedelta(days=21)  # Look ahead 3 weeks
-        
-        all_schedules = db.query(WateringSchedule).filter(
-            WateringSchedule.user_id == user_id,
-            WateringSchedule.plant_id.in_(plant_ids),
-            WateringSchedule.scheduled_date >= start_date,
-            WateringSchedule.scheduled_date < end_date
-        ).all()
+        end_date = start_date + timedelta(days=days)
         
-        # Create a mapping of plant_id to its schedule for each date
+        # Create a mapping of plant_id to its occurrences for each date
         plant_schedules = {}
-        for schedule in all_schedules:
-            date_str = schedule.scheduled_date.isoformat()
-            if schedule.plant_id not in plant_schedules:
-                plant_schedules[schedule.plant_id] = {}
-            plant_schedules[schedule.plant_id][date_str] = schedule
+        for entry in get_schedule_entries(db, user_id, start_date, end_date, plant_ids):
+            plant_schedules.setdefault(entry["plant_id"], {})[entry["scheduled_date"].isoformat()] = entry
         
         # Add plant schedules
         for user_plant in user_plants:
             plant_schedules_for_plant = plant_schedules.get(user_plant.plant_id, {})
-            
-            # Get plant details
-            plant = db.query(Plant).filter(Plant.id == user_plant.plant_id).first()
+            plant = user_plant.plant
+            if not plant:
+                continue
             
             # For each date in our range
             for date_str in schedules_by_date.keys():
@@ -700,20 +852,20 @@ def get_watering_schedule(db: Session, user_id: int, date: str = None):
                             "depth_mm": plant.watering_info.depth_mm if plant.watering_info else 0,
                             "volume_feet": plant.watering_info.volume_feet if plant.watering_info else 0
                         },
-                        "last_watered": schedule.completion_timestamp.date().isoformat() if schedule.completion_timestamp else None,
-                        "is_watered": schedule.completed,
-                        "weather_adjusted": schedule.weather_adjusted,
-                        "next_watering": schedule.scheduled_date.isoformat(),
+                        "last_watered": schedule["completion_timestamp"].date().isoformat() if schedule["completion_timestamp"] else None,
+                        "is_watered": schedule["completed"],
+                        "weather_adjusted": schedule["weather_adjusted"],
+                        "next_watering": schedule["scheduled_date"].isoformat(),
                         "weather_info": {
-                            "is_adjusted": schedule.weather_adjusted,
-                            "original_date": (schedule.scheduled_date + timedelta(days=1)).isoformat() if schedule.weather_adjusted and schedule.scheduled_date > start_date else None
+                            "is_adjusted": schedule["weather_adjusted"],
+                            "original_date": schedule["base_date"].isoformat() if schedule["weather_adjusted"] else None
                         }
                     }
                     section["groups"][0]["plants"].append(plant_data)
                     
                     # Update watering stats
                     section["watering_stats"]["total_plants"] += 1
-                    if schedule.completed:
+                    if schedule["completed"]:
                         section["watering_stats"]["watered_plants"] += 1
                     section["watering_stats"]["percentage"] = (
                         (section["watering_stats"]["watered_plants"] / section["watering_stats"]["total_plants"]) * 100
@@ -733,3 +885,79 @@ def get_watering_schedule(db: Session, user_id: int, date: str = None):
         logger.error(f"Error getting watering schedule: {str(e)}")
         raise
 
+
+# Status bits of a plant entry in the compact overview
+STATUS_WATERED = 1
+STATUS_WEATHER_ADJUSTED = 2
+
+def get_compact_watering_schedule(
+    db: Session,
+    user_id: int,
+    date_from: Optional[date] = None,
+    days: Optional[int] = None
+) -> dict:
+    """Schedule overview in the compact v2 format.
+
+    Plant details are sent once in `plants`; each day lists
+    [section index, [[plant_id, status flags(, original date offset)], ...]].
+    The offset (base date minus scheduled date, in days) is only present
+    for weather-adjusted entries.
+    """
+    start_date, days = resolve_schedule_window(date_from, days=days)
+    end_date = start_date + timedelta(days=days)
+
+    user_plants = db.query(UserPlant).filter(UserPlant.user_id == user_id).options(
+        joinedload(UserPlant.plant).joinedload(Plant.watering_info)
+    ).all()
+
+    sections: List[str] = []
+    section_index: Dict[str, int] = {}
+    plants = {}
+    for user_plant in user_plants:
+        plant = user_plant.plant
+        if not plant:
+            continue
+        section_name = user_plant.section or "Unassigned"
+        if section_name not in section_index:
+            section_index[section_name] = len(sections)
+            sections.append(section_name)
+        watering_info = plant.watering_info
+        plants[plant.id] = {
+            "name": plant.common_name,
+            "image_url": plant.image_url,
+            "section": section_index[section_name],
+            "frequency_days": watering_info.frequency_days if watering_info else 7,
+            "depth_mm": watering_info.depth_mm if watering_info else 0,
+            "volume_feet": watering_info.volume_feet if watering_info else 0
+        }
+
+    # day -> section index -> entries
+    entries_by_day: Dict[date, Dict[int, list]] = defaultdict(lambda: defaultdict(list))
+    for entry in get_schedule_entries(db, user_id, start_date, end_date, list(plants)):
+        flags = STATUS_WATERED if entry["completed"] else 0
+        item = [entry["plant_id"], flags]
+        if entry["weather_adjusted"]:
+            item[1] |= STATUS_WEATHER_ADJUSTED
+            item.append((entry["base_date"] - entry["scheduled_date"]).days)
+        entries_by_day[entry["scheduled_date"]][plants[entry["plant_id"]]["section"]].append(item)
+
+    weather_forecast = get_weather_forecast(db, start_date, end_date, get_user_location(db, user_id))
+    schedule = []
+    for offset in range(days):
+        current_date = start_date + timedelta(days=offset)
+        weather = weather_forecast.get(current_date.isoformat())
+        schedule.append({
+            "date": current_date,
+            "weather": [weather["temperature"], weather["precipitation"], weather["wind_speed"]] if weather else None,
+            "sections": sorted(entries_by_day[current_date].items())
+        })
+
+    return {
+        "version": 2,
+        "start_date": start_date,
+        "sections": sections,
+        "plants": plants,
+        "flags": {"watered": STATUS_WATERED, "weather_adjusted": STATUS_WEATHER_ADJUSTED},
+        "schedule": schedule,
+        "last_updated": datetime.utcnow().isoformat()
+    }
@@ -0,0 +1,32 @@
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Dict
+from app.models.weather_daily import WeatherDaily
+import logging
+
+logger = logging.getLogger(__name__)
+
+def daily_weather_entry(row: WeatherDaily) -> dict:
+    """Schedule view of a weather_daily row"""
+    def rounded(value):
+        return round(value, 1) if value is not None else None
+
+    return {
+        "temperature": rounded(row.temperature_mean),
+        "temperature_min": rounded(row.temperature_min),
+        "temperature_max": rounded(row.temperature_max),
+        "precipitation": rounded(row.precipitation_mean),
+        "precipitation_sum": rounded(row.precipitation_sum),
+        "wind_speed": rounded(row.wind_speed_mean),
+        "wind_speed_max": rounded(row.wind_speed_max),
+        "weather_icons": [row.icon] if row.icon else []
+    }
+
+def get_daily_weather(db: Session, location: str, start_date: date, end_date: date) -> Dict[str, dict]:
+    """Daily weather of a location for start_date <= day < end_date, keyed by ISO date"""
+    rows = db.query(WeatherDaily).filter(
+        WeatherDaily.location == location,
+        WeatherDaily.day >= start_date,
+        WeatherDaily.day < end_date
+    ).order_by(WeatherDaily.day).all()
+    return {row.day.isoformat(): daily_weather_entry(row) for row in rows}
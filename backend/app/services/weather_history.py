@@ -0,0 +1,122 @@
+"""Downsampled weather history.
+
+Aggregates stored weather per hour, day or ISO week (Monday start) in SQL
+with date_trunc. Hour buckets read the hourly storage in use (weather_forecast
+rows or compact weather_hourly days). Day and week buckets read the
+weather_daily rollup, weighting day means by their hours. That rollup also
+covers history that retention has already downsampled. Day and week buckets
+cover whole days, so the days of start_date and end_date count in full.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import AsyncIterator
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+WEATHER_BUCKETS = ("hour", "day", "week")
+
+# Rows fetched per round trip when streaming
+STREAM_BATCH_SIZE = 1000
+
+HOURLY_AGGREGATES = """
+    COUNT(*) AS hours,
+    AVG(temperature) AS temperature,
+    MIN(temperature) AS temperature_min,
+    MAX(temperature) AS temperature_max,
+    AVG(precipitation) AS precipitation,
+    SUM(precipitation) AS precipitation_sum,
+    AVG(wind_speed) AS wind_speed,
+    MAX(wind_speed) AS wind_speed_max
+"""
+
+FORECAST_HOURS_SQL = """
+    SELECT timestamp, temperature, precipitation, wind_speed
+    FROM weather_forecast
+    WHERE location = :location AND timestamp >= :start_date AND timestamp <= :end_date
+"""
+
+# Array position n of a compact day is hour n - 1 of that day
+COMPACT_HOURS_SQL = """
+    SELECT h.day + (v.hour - 1) * interval '1 hour' AS timestamp,
+           v.temperature, v.precipitation, v.wind_speed
+    FROM weather_hourly AS h
+    JOIN weather_locations AS l ON l.id = h.location_id
+    CROSS JOIN LATERAL unnest(h.temperature, h.precipitation, h.wind_speed)
+        WITH ORDINALITY AS v(temperature, precipitation, wind_speed, hour)
+    WHERE l.location = :location AND h.day >= :start_day AND h.day <= :end_day
+      AND (v.temperature IS NOT NULL OR v.precipitation IS NOT NULL OR v.wind_speed IS NOT NULL)
+"""
+
+HOURLY_BUCKETS_SQL = """
+    SELECT date_trunc('hour', hours.timestamp) AS bucket, {aggregates}
+    FROM ({hours}) AS hours
+    WHERE hours.timestamp >= :start_date AND hours.timestamp <= :end_date
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+DAILY_BUCKETS_SQL = """
+    SELECT date_trunc(:bucket, CAST(day AS timestamp)) AS bucket,
+           SUM(hours) AS hours,
+           SUM(temperature_mean * hours) / NULLIF(SUM(hours), 0) AS temperature,
+           MIN(temperature_min) AS temperature_min,
+           MAX(temperature_max) AS temperature_max,
+           SUM(precipitation_mean * hours) / NULLIF(SUM(hours), 0) AS precipitation,
+           SUM(precipitation_sum) AS precipitation_sum,
+           SUM(wind_speed_mean * hours) / NULLIF(SUM(hours), 0) AS wind_speed,
+           MAX(wind_speed_max) AS wind_speed_max
+    FROM weather_daily
+    WHERE location = :location AND day >= :start_day AND day <= :end_day
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+def weather_buckets_query(location: str, bucket: str, start_date: datetime, end_date: datetime):
+    """Aggregated weather of a location per bucket, oldest first"""
+    if bucket not in WEATHER_BUCKETS:
+        raise ValueError(f"Unknown weather bucket: {bucket}")
+
+    days = {"start_day": start_date.date(), "end_day": end_date.date()}
+    if bucket != "hour":
+        return text(DAILY_BUCKETS_SQL).bindparams(location=location, bucket=bucket, **days)
+
+    if settings.WEATHER_STORAGE == "compact":
+        # Compact hours are wall-clock timestamps without a zone; the day
+        # bounds pick the compact rows to unnest
+        hours = COMPACT_HOURS_SQL
+        start_date, end_date = start_date.replace(tzinfo=None), end_date.replace(tzinfo=None)
+        params = days
+    else:
+        hours = FORECAST_HOURS_SQL
+        params = {}
+    sql = HOURLY_BUCKETS_SQL.format(aggregates=HOURLY_AGGREGATES.strip(), hours=hours.strip())
+    return text(sql).bindparams(location=location, start_date=start_date, end_date=end_date, **params)
+
+async def get_weather_buckets(
+    db: AsyncSession,
+    location: str,
+    bucket: str,
+    start_date: datetime,
+    end_date: datetime
+) -> list:
+    result = await db.execute(weather_buckets_query(location, bucket, start_date, end_date))
+    return [dict(row) for row in result.mappings()]
+
+async def stream_weather_buckets(
+    db: AsyncSession,
+    location: str,
+    bucket: str,
+    start_date: datetime,
+    end_date: datetime
+) -> AsyncIterator[dict]:
+    """Yield buckets from a server-side cursor, STREAM_BATCH_SIZE rows at a time"""
+    query = weather_buckets_query(location, bucket, start_date, end_date)
+    result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+    count = 0
+    async for row in result.mappings():
+        count += 1
+        yield dict(row)
+    logger.debug(f"Streamed {count} {bucket} weather buckets for {location}")
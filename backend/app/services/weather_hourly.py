@@ -0,0 +1,179 @@
+"""Compact hourly forecast storage.
+
+With WEATHER_STORAGE = "compact", forecasts are stored as one weather_hourly
+row per location and day holding real[] arrays of the day's hourly values,
+instead of one weather_forecast row per hour. A week for one location is
+seven rows, and decode_hourly turns fetched rows into flat NumPy arrays in
+one step. Days and hours are the wall-clock ones of the forecast timestamps.
+"""
+from sqlalchemy import literal_column, or_, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import date, datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from app.models.weather_hourly import WeatherHourly, WeatherLocation, HOURS_PER_DAY
+import logging
+
+logger = logging.getLogger(__name__)
+
+HOURLY_COLUMNS = ("temperature", "precipitation", "wind_speed")
+
+class HourlySeries(NamedTuple):
+    timestamps: np.ndarray  # datetime64[h]
+    temperature: np.ndarray  # float32, NaN where missing
+    precipitation: np.ndarray
+    wind_speed: np.ndarray
+
+def _naive(timestamp: datetime) -> datetime:
+    return timestamp.replace(tzinfo=None) if timestamp.tzinfo else timestamp
+
+def get_location_ids(db: Session, locations: Iterable[str], create: bool = False) -> Dict[str, int]:
+    """Ids of location keys, registering unknown ones when create is set"""
+    locations = sorted(set(locations))
+    if not locations:
+        return {}
+    if create:
+        db.execute(
+            pg_insert(WeatherLocation)
+            .values([{"location": location} for location in locations])
+            .on_conflict_do_nothing(index_elements=["location"])
+        )
+    rows = db.query(WeatherLocation.location, WeatherLocation.id).filter(
+        WeatherLocation.location.in_(locations)
+    ).all()
+    return dict(rows)
+
+def encode_forecasts(forecasts: Iterable[dict]) -> Dict[Tuple[str, date], Dict[str, list]]:
+    """Group hourly forecast dicts into per-day arrays keyed by (location, day)"""
+    days: Dict[Tuple[str, date], Dict[str, list]] = {}
+    for forecast in forecasts:
+        timestamp = _naive(forecast["timestamp"])
+        key = (forecast["location"], timestamp.date())
+        arrays = days.get(key)
+        if arrays is None:
+            arrays = days[key] = {column: [None] * HOURS_PER_DAY for column in HOURLY_COLUMNS}
+        for column in HOURLY_COLUMNS:
+            arrays[column][timestamp.hour] = forecast.get(column)
+    return days
+
+def _merged_sql(column: str) -> str:
+    """New hourly values over the stored ones; hours the new row leaves NULL keep their value"""
+    return (
+        f"ARRAY(SELECT COALESCE(new_value, old_value) "
+        f"FROM unnest(excluded.{column}, weather_hourly.{column}) "
+        f"WITH ORDINALITY AS merged(new_value, old_value, hour) ORDER BY hour)"
+    )
+
+def upsert_compact_forecasts(db: Session, forecasts: List[dict]) -> Dict[str, int]:
+    """Store hourly forecasts as compact day rows in one INSERT ... ON CONFLICT.
+
+    Returns inserted, updated and unchanged counts of day rows.
+    """
+    days = encode_forecasts(forecasts)
+    if not days:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    try:
+        location_ids = get_location_ids(db, (location for location, _ in days), create=True)
+        stmt = pg_insert(WeatherHourly).values([
+            {"location_id": location_ids[location], "day": day, **arrays}
+            for (location, day), arrays in days.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            constraint="weather_hourly_pkey",
+            set_={column: literal_column(_merged_sql(column)) for column in HOURLY_COLUMNS},
+            where=or_(*(
+                text(f"weather_hourly.{column} IS DISTINCT FROM {_merged_sql(column)}")
+                for column in HOURLY_COLUMNS
+            ))
+        ).returning(literal_column("xmax = 0").label("inserted"))
+        # xmax is 0 only for freshly inserted row versions
+        results = db.execute(stmt).scalars().all()
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error upserting compact weather forecasts: {str(e)}")
+        db.rollback()
+        raise
+
+    inserted = sum(1 for fresh in results if fresh)
+    updated = len(results) - inserted
+    return {"inserted": inserted, "updated": updated, "unchanged": len(days) - len(results)}
+
+def decode_hourly(
+    days: Sequence[date],
+    temperature: Sequence[Sequence[Optional[float]]],
+    precipitation: Sequence[Sequence[Optional[float]]],
+    wind_speed: Sequence[Sequence[Optional[float]]]
+) -> HourlySeries:
+    """Flatten per-day arrays into hourly NumPy arrays, dropping hours without any value"""
+    if not len(days):
+        empty = np.empty(0, dtype=np.float32)
+        return HourlySeries(np.empty(0, dtype="datetime64[h]"), empty, empty.copy(), empty.copy())
+
+    starts = np.array(days, dtype="datetime64[D]").astype("datetime64[h]")
+    timestamps = (starts[:, None] + np.arange(HOURS_PER_DAY).astype("timedelta64[h]")).ravel()
+    # None becomes NaN in a float array
+    values = [
+        np.array(column, dtype=np.float32).reshape(-1)
+        for column in (temperature, precipitation, wind_speed)
+    ]
+    present = ~(np.isnan(values[0]) & np.isnan(values[1]) & np.isnan(values[2]))
+    return HourlySeries(timestamps[present], *(column[present] for column in values))
+
+def decode_rows(rows: Sequence[WeatherHourly]) -> HourlySeries:
+    return decode_hourly(
+        [row.day for row in rows],
+        [row.temperature for row in rows],
+        [row.precipitation for row in rows],
+        [row.wind_speed for row in rows]
+    )
+
+def hourly_rows_query(location: str, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Compact rows of the days covering start..end, oldest first"""
+    stmt = select(WeatherHourly).join(
+        WeatherLocation, WeatherLocation.id == WeatherHourly.location_id
+    ).where(WeatherLocation.location == location)
+    if start:
+        stmt = stmt.where(WeatherHourly.day >= _naive(start).date())
+    if end:
+        stmt = stmt.where(WeatherHourly.day <= _naive(end).date())
+    return stmt.order_by(WeatherHourly.day)
+
+def clip_series(series: HourlySeries, start: Optional[datetime] = None, end: Optional[datetime] = None) -> HourlySeries:
+    """Hours with start <= timestamp <= end"""
+    mask = np.ones(len(series.timestamps), dtype=bool)
+    if start:
+        mask &= series.timestamps >= np.datetime64(_naive(start))
+    if end:
+        mask &= series.timestamps <= np.datetime64(_naive(end))
+    return HourlySeries(*(column[mask] for column in series))
+
+def get_hourly_series(
+    db: Session,
+    location: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> HourlySeries:
+    """Hours of a location with start <= timestamp <= end"""
+    rows = db.execute(hourly_rows_query(location, start, end)).scalars().all()
+    return clip_series(decode_rows(rows), start, end)
+
+def series_to_forecasts(series: HourlySeries, location: str) -> List[dict]:
+    """Hourly forecast dicts (the weather_forecast row shape) of a decoded series"""
+    columns = [
+        [None if np.isnan(value) else round(float(value), 2) for value in column]
+        for column in (series.temperature, series.precipitation, series.wind_speed)
+    ]
+    return [
+        {
+            "timestamp": timestamp,
+            "location": location,
+            "temperature": temperature,
+            "precipitation": precipitation,
+            "wind_speed": wind_speed
+        }
+        for timestamp, temperature, precipitation, wind_speed in zip(
+            series.timestamps.astype("datetime64[s]").tolist(), *columns
+        )
+    ]
@@ -0,0 +1,71 @@
+"""Forecast grid cells.
+
+User coordinates are snapped to a grid of WEATHER_GRID_DEGREES so everyone
+in the same cell shares one provider fetch and one set of forecast rows.
+A cell's location key ("55.70,12.60") is what weather_forecast.location
+holds; users without coordinates use the configured default location.
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, NamedTuple, Optional
+from app.core.config import settings
+from app.models.users import User
+from app.models.user_plants import UserPlant
+import logging
+
+logger = logging.getLogger(__name__)
+
+class WeatherCell(NamedTuple):
+    location: str
+    latitude: float
+    longitude: float
+
+def snap_to_cell(latitude: float, longitude: float, grid: Optional[float] = None) -> WeatherCell:
+    """Grid cell whose center is nearest to the coordinates"""
+    grid = grid or settings.WEATHER_GRID_DEGREES
+    lat = round(round(latitude / grid) * grid, 4)
+    lon = round(round(longitude / grid) * grid, 4)
+    return WeatherCell(f"{lat:.2f},{lon:.2f}", lat, lon)
+
+def default_cell() -> WeatherCell:
+    return WeatherCell(settings.WEATHER_LOCATION, settings.WEATHER_LAT, settings.WEATHER_LON)
+
+def cell_for_location(location: Optional[str]) -> WeatherCell:
+    """Cell of a location key; names other than a "lat,lon" key use the default coordinates"""
+    if location and location != settings.WEATHER_LOCATION:
+        lat, sep, lon = location.partition(",")
+        try:
+            if sep:
+                return snap_to_cell(float(lat), float(lon))
+        except ValueError:
+            pass
+    return default_cell()
+
+def get_user_location(db: Session, user_id: Optional[int]) -> str:
+    """Forecast location key of a user's garden"""
+    if user_id is not None:
+        location = db.query(User.weather_location).filter(User.id == user_id).scalar()
+        if location:
+            return location
+    return settings.WEATHER_LOCATION
+
+def get_active_cells(db: Session) -> List[WeatherCell]:
+    """Distinct cells of active users with at least one plant"""
+    has_plants = db.query(UserPlant.id).filter(UserPlant.user_id == User.id).exists()
+    rows = (
+        db.query(User.weather_location, func.min(User.latitude), func.min(User.longitude))
+        .filter(User.is_active.is_(True), has_plants)
+        .group_by(User.weather_location)
+        .all()
+    )
+    cells = []
+    for location, latitude, longitude in rows:
+        if location is None or latitude is None or longitude is None:
+            cells.append(default_cell())
+        else:
+            cells.append(snap_to_cell(latitude, longitude))
+    # The default location is always kept fresh
+    if default_cell() not in cells:
+        cells.append(default_cell())
+    logger.info(f"{len(cells)} active weather cells")
+    return cells
@@ -0,0 +1,86 @@
+"""Retention for stored hourly forecasts.
+
+Hours older than WEATHER_RETENTION_DAYS are deleted in batches of
+WEATHER_RETENTION_BATCH_SIZE rows, one transaction per batch, so the job
+never holds locks on a large slice of the table while ingest runs.
+
+In "downsample" mode the rollup triggers leave weather_daily alone for
+these deletes, so old history stays available at day resolution. In
+"delete" mode the triggers prune the matching daily rows as usual.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+RETENTION_MODES = ("downsample", "delete")
+
+# Read by the weather_daily triggers; local to the batch transaction
+SET_RETENTION_MODE_SQL = "SELECT set_config('weather.retention', :mode, true)"
+
+# The cutoff scan uses the (timestamp, location) unique index
+PRUNE_FORECAST_ROWS_SQL = """
+    DELETE FROM weather_forecast
+    WHERE id IN (
+        SELECT id FROM weather_forecast
+        WHERE timestamp < :cutoff
+        LIMIT :batch_size
+    )
+"""
+
+PRUNE_HOURLY_DAYS_SQL = """
+    DELETE FROM weather_hourly
+    WHERE (location_id, day) IN (
+        SELECT location_id, day FROM weather_hourly
+        WHERE day < :cutoff_day
+        LIMIT :batch_size
+    )
+"""
+
+def _prune_batches(db: Session, sql: str, params: dict, mode: str) -> int:
+    removed = 0
+    while True:
+        db.execute(text(SET_RETENTION_MODE_SQL), {"mode": mode})
+        count = db.execute(text(sql), params).rowcount
+        db.commit()
+        removed += count
+        if count < params["batch_size"]:
+            return removed
+
+def prune_weather_history(
+    db: Session,
+    retention_days: Optional[int] = None,
+    mode: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """Remove stored forecast hours older than the retention window.
+
+    Returns the weather_forecast rows and weather_hourly days removed.
+    """
+    retention_days = settings.WEATHER_RETENTION_DAYS if retention_days is None else retention_days
+    mode = mode or settings.WEATHER_RETENTION_MODE
+    batch_size = batch_size or settings.WEATHER_RETENTION_BATCH_SIZE
+    if mode not in RETENTION_MODES:
+        raise ValueError(f"Unknown weather retention mode: {mode}")
+
+    cutoff = (now or datetime.now().astimezone()) - timedelta(days=retention_days)
+    removed = {
+        "rows": _prune_batches(
+            db, PRUNE_FORECAST_ROWS_SQL, {"cutoff": cutoff, "batch_size": batch_size}, mode
+        ),
+        # Compact rows hold whole days; only days entirely before the cutoff go
+        "days": _prune_batches(
+            db, PRUNE_HOURLY_DAYS_SQL, {"cutoff_day": cutoff.date(), "batch_size": batch_size}, mode
+        ),
+    }
+    if removed["rows"] or removed["days"]:
+        logger.info(
+            f"Pruned weather history older than {cutoff} ({mode}): "
+            f"{removed['rows']} hourly rows, {removed['days']} compact days"
+        )
+    return removed
@@ -1,20 +1,28 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models.weather_forecast import WeatherForecast
+from app.models.weather_ingest import WeatherIngest
 from app.schemas.weather_forecast import WeatherForecastCreate
 from fastapi import HTTPException
 from datetime import datetime, timedelta
 import httpx
-from typing import List
+import hashlib
+import time
+from typing import Dict, List, Optional, Tuple
 import logging
 import traceback
 import asyncio
 from app.core.config import settings
-
-# Constants
-LAT = 56  # Denmark latitude
-LON = 10  # Denmark longitude
-WEATHER_API_URL = f"https://api.open-meteo.com/v1/forecast?latitude={LAT}&longitude={LON}&hourly=temperature_2m,precipitation,wind_speed_10m&timezone=Europe%2FLondon"
+from app.core.http_client import request_with_retries
+from app.database import SessionLocal
+from app.services.weather_locations import WeatherCell, cell_for_location, default_cell, get_active_cells
+from app.services.weather_hourly import (
+    upsert_compact_forecasts, get_hourly_series, series_to_forecasts,
+    hourly_rows_query, clip_series, decode_rows
+)
 
 # Set up logging
 logging.basicConfig(
@@ -23,50 +31,127 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def fetch_weather_data() -> List[dict]:
-    """Fetch weather forecast from Open-Meteo API"""
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={settings.WEATHER_LAT}&longitude={settings.WEATHER_LON}&hourly=temperature_2m,precipitation,wind_speed_10m&timezone=Europe%2FLondon"
-    
+# Validators, freshness and ingested payload hash of the last fetch per (URL, location)
+_fetch_state: Dict[Tuple[str, str], dict] = {}
+
+def clear_fetch_state():
+    _fetch_state.clear()
+
+def _max_age(cache_control: Optional[str]) -> Optional[int]:
+    """max-age in seconds from a Cache-Control header (0 for no-cache/no-store)"""
+    if not cache_control:
+        return None
+    for directive in cache_control.lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        if name in ("no-cache", "no-store"):
+            return 0
+        if name == "max-age" and value.strip().isdigit():
+            return int(value)
+    return None
+
+def weather_request_params(cell: WeatherCell) -> dict:
+    return {
+        "latitude": cell.latitude,
+        "longitude": cell.longitude,
+        "hourly": "temperature_2m,precipitation,wind_speed_10m",
+        "timezone": "Europe/London",
+    }
+
+def parse_weather_payload(data: dict, location: str) -> List[dict]:
+    """Hourly Open-Meteo arrays -> forecast rows"""
+    hourly = data['hourly']
+    return [
+        {
+            "timestamp": datetime.fromisoformat(timestamp),
+            "location": location,
+            "temperature": temperature,
+            "precipitation": precipitation,
+            "wind_speed": wind_speed
+        }
+        for timestamp, temperature, precipitation, wind_speed in zip(
+            hourly['time'], hourly['temperature_2m'], hourly['precipitation'], hourly['wind_speed_10m']
+        )
+    ]
+
+async def fetch_weather_data(
+    url: Optional[str] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    cell: Optional[WeatherCell] = None
+) -> Optional[List[dict]]:
+    """Fetch weather forecast from Open-Meteo API.
+
+    Uses the shared HTTP client with retries. Returns None without
+    re-downloading while the provider's Cache-Control max-age has not
+    passed, and when a conditional request comes back 304 or the payload
+    hash equals the one last ingested.
+    """
+    url = url or settings.WEATHER_API_URL
+    cell = cell or default_cell()
+    state = _fetch_state.setdefault((url, cell.location), {})
+    if state.get("fresh_until") and time.monotonic() < state["fresh_until"]:
+        logger.info("Cached weather data is still fresh, skipping fetch")
+        return None
+
+    headers = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+
     try:
-        logger.info("Fetching weather data from Open-Meteo API")
-        async with httpx.AsyncClient(timeout=10.0) as client:  # 10 second timeout
-            try:
-                response = await client.get(url)
-                response.raise_for_status()
-                data = response.json()
-                
-                forecasts = []
-                times = data['hourly']['time']
-                temps = data['hourly']['temperature_2m']
-                precips = data['hourly']['precipitation']
-                winds = data['hourly']['wind_speed_10m']
-                
-                for i in range(len(times)):
-                    forecasts.append({
-                        "timestamp": datetime.fromisoformat(times[i]),
-                        "location": settings.WEATHER_LOCATION,
-                        "temperature": temps[i],
-                        "precipitation": precips[i],
-                        "wind_speed": winds[i]
-                    })
-                logger.info(f"Successfully fetched {len(forecasts)} weather forecasts")
-                return forecasts
-            except asyncio.CancelledError:
-                logger.info("Weather data fetch was cancelled")
-                raise
-            except httpx.TimeoutException:
-                logger.error("Weather data fetch timed out")
-                raise HTTPException(status_code=504, detail="Weather data fetch timed out")
-            except httpx.HTTPError as e:
-                logger.error(f"HTTP error fetching weather data: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"Error fetching weather data: {str(e)}")
+        logger.info(f"Fetching weather data for {cell.location} from Open-Meteo API")
+        response = await request_with_retries(
+            "GET", url, client=client, params=weather_request_params(cell), headers=headers
+        )
+        max_age = _max_age(response.headers.get("Cache-Control"))
+        state["fresh_until"] = time.monotonic() + max_age if max_age else None
+        if response.status_code == 304:
+            logger.info("Weather data not modified since the last fetch")
+            return None
+        response.raise_for_status()
+
+        state["etag"] = response.headers.get("ETag")
+        state["last_modified"] = response.headers.get("Last-Modified")
+        payload_hash = hashlib.sha256(response.content).hexdigest()
+        if payload_hash == state.get("payload_hash"):
+            logger.info("Weather payload unchanged since the last ingest")
+            return None
+        state["pending_hash"] = payload_hash
+
+        forecasts = parse_weather_payload(response.json(), cell.location)
+        logger.info(f"Successfully fetched {len(forecasts)} weather forecasts")
+        return forecasts
     except asyncio.CancelledError:
         logger.info("Weather data fetch was cancelled")
         raise
+    except httpx.TimeoutException:
+        logger.error("Weather data fetch timed out")
+        raise HTTPException(status_code=504, detail="Weather data fetch timed out")
+    except httpx.HTTPError as e:
+        logger.error(f"HTTP error fetching weather data: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching weather data: {str(e)}")
     except Exception as e:
         logger.error(f"Error fetching weather data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching weather data: {str(e)}")
 
+def mark_weather_ingested(url: Optional[str] = None, location: Optional[str] = None):
+    """Remember the hash of the fetched payload once it is stored"""
+    state = _fetch_state.get((url or settings.WEATHER_API_URL, location or settings.WEATHER_LOCATION), {})
+    if state.get("pending_hash"):
+        state["payload_hash"] = state.pop("pending_hash")
+
+def record_weather_ingest(db: Session, location: str):
+    """Mark a location as checked against the provider just now"""
+    db.execute(
+        pg_insert(WeatherIngest)
+        .values(location=location, ingested_at=func.now())
+        .on_conflict_do_update(
+            index_elements=[WeatherIngest.location],
+            set_={"ingested_at": func.now()}
+        )
+    )
+    db.commit()
+
 def create_weather_forecast(db: Session, forecast: WeatherForecastCreate):
     try:
         logger.debug(f"Creating weather forecast for {forecast.timestamp}")
@@ -87,6 +172,63 @@ def create_weather_forecast(db: Session, forecast: WeatherForecastCreate):
         db.rollback()
         raise
 
+FORECAST_VALUE_COLUMNS = ("temperature", "precipitation", "wind_speed")
+
+def upsert_weather_forecasts(db: Session, forecasts: List[dict]) -> Dict[str, int]:
+    """Insert or refresh forecast hours in one INSERT ... ON CONFLICT statement.
+
+    Existing (timestamp, location) rows get the new values; rows whose values
+    did not change are left alone. Returns inserted, updated and unchanged counts.
+    With WEATHER_STORAGE = "compact" the hours go to weather_hourly day rows
+    and the counts are of days.
+    """
+    if settings.WEATHER_STORAGE == "compact":
+        return upsert_compact_forecasts(db, forecasts)
+
+    # The same hour twice in one statement would be updated twice, which
+    # Postgres rejects; the last value wins
+    rows = {}
+    for forecast in forecasts:
+        rows[(forecast["timestamp"], forecast["location"])] = {
+            "timestamp": forecast["timestamp"],
+            "location": forecast["location"],
+            **{column: forecast.get(column) for column in FORECAST_VALUE_COLUMNS}
+        }
+    if not rows:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    stmt = pg_insert(WeatherForecast).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        constraint="unique_weather",
+        set_={column: stmt.excluded[column] for column in FORECAST_VALUE_COLUMNS},
+        where=or_(*(
+            getattr(WeatherForecast, column).is_distinct_from(stmt.excluded[column])
+            for column in FORECAST_VALUE_COLUMNS
+        ))
+    ).returning(literal_column("xmax = 0").label("inserted"))
+
+    try:
+        # xmax is 0 only for freshly inserted row versions
+        results = db.execute(stmt).scalars().all()
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error upserting weather forecasts: {str(e)}")
+        db.rollback()
+        raise
+
+    inserted = sum(1 for fresh in results if fresh)
+    updated = len(results) - inserted
+    return {"inserted": inserted, "updated": updated, "unchanged": len(rows) - len(results)}
+
+def forecast_query(location: str, start_date: datetime = None, end_date: datetime = None):
+    """weather_forecast hours of a location with start_date <= timestamp <= end_date"""
+    stmt = select(WeatherForecast).where(WeatherForecast.location == location)
+    if start_date:
+        stmt = stmt.where(WeatherForecast.timestamp >= start_date)
+    if end_date:
+        stmt = stmt.where(WeatherForecast.timestamp <= end_date)
+    return stmt.order_by(WeatherForecast.timestamp)
+
 def get_weather_forecast(
     db: Session,
     location: str,
@@ -95,58 +237,83 @@ def get_weather_forecast(
 ):
     try:
         logger.debug(f"Getting weather forecast for {location}")
-        query = db.query(WeatherForecast).filter(WeatherForecast.location == location)
-        
-        if start_date:
-            query = query.filter(WeatherForecast.timestamp >= start_date)
-        if end_date:
-            query = query.filter(WeatherForecast.timestamp <= end_date)
-        
-        forecasts = query.order_by(WeatherForecast.timestamp).all()
+        if settings.WEATHER_STORAGE == "compact":
+            return series_to_forecasts(get_hourly_series(db, location, start_date, end_date), location)
+
+        forecasts = db.execute(forecast_query(location, start_date, end_date)).scalars().all()
+        logger.debug(f"Found {len(forecasts)} weather forecasts")
+        return forecasts
+    except Exception as e:
+        logger.error(f"Error getting weather forecast: {str(e)}")
+        raise
+
+async def get_weather_forecast_async(
+    db: AsyncSession,
+    location: str,
+    start_date: datetime = None,
+    end_date: datetime = None
+):
+    """get_weather_forecast for async routes"""
+    try:
+        logger.debug(f"Getting weather forecast for {location}")
+        if settings.WEATHER_STORAGE == "compact":
+            rows = (await db.execute(hourly_rows_query(location, start_date, end_date))).scalars().all()
+            return series_to_forecasts(clip_series(decode_rows(rows), start_date, end_date), location)
+
+        forecasts = (await db.execute(forecast_query(location, start_date, end_date))).scalars().all()
         logger.debug(f"Found {len(forecasts)} weather forecasts")
         return forecasts
     except Exception as e:
         logger.error(f"Error getting weather forecast: {str(e)}")
         raise
 
+def store_weather_forecasts(db: Session, location: str, forecasts: Optional[List[dict]]) -> bool:
+    """Store fetched forecasts (None: nothing new); returns whether any arrived"""
+    if forecasts is None:
+        logger.info(f"Weather data for {location} unchanged, nothing to ingest")
+        record_weather_ingest(db, location)
+        return False
+
+    counts = upsert_weather_forecasts(db, forecasts)
+    mark_weather_ingested(location=location)
+    record_weather_ingest(db, location)
+    logger.info(
+        f"Weather ingest for {location}: {counts['inserted']} inserted, "
+        f"{counts['updated']} updated, {counts['unchanged']} unchanged"
+    )
+    return True
+
+def ingest_weather_forecasts(db: Session, location: str, forecasts: Optional[List[dict]]):
+    """Store fetched forecasts and return the next week (None: nothing new)"""
+    if not store_weather_forecasts(db, location, forecasts):
+        return []
+    return get_weather_forecast(
+        db,
+        location,
+        datetime.now(),
+        datetime.now() + timedelta(days=7)
+    )
+
 async def update_weather_forecasts(db: Session, location: str):
-    """Fetch new weather data and update database"""
+    """Fetch new weather data and update database.
+
+    Returns the stored forecasts for the next week, or an empty list when
+    the fetch failed or the provider had nothing new.
+    """
+    cell = cell_for_location(location)
+    location = cell.location
     try:
         logger.info(f"Updating weather forecasts for {location}")
         try:
-            forecasts = await fetch_weather_data()
+            forecasts = await fetch_weather_data(cell=cell)
         except asyncio.CancelledError:
             logger.info("Weather update was cancelled")
             raise
         except Exception as e:
             logger.error(f"Error fetching weather data: {str(e)}")
             return []  # Return empty list instead of raising
-        
-        updated_count = 0
-        
-        for forecast_data in forecasts:
-            try:
-                forecast = WeatherForecastCreate(**forecast_data)
-                try:
-                    create_weather_forecast(db, forecast)
-                    updated_count += 1
-                except HTTPException as e:
-                    if e.status_code == 400:  # Already exists
-                        continue
-                    logger.error(f"Error creating forecast: {str(e)}")
-                except Exception as e:
-                    logger.error(f"Unexpected error creating forecast: {str(e)}")
-            except Exception as e:
-                logger.error(f"Error processing forecast data: {str(e)}")
-                continue
-            
-        logger.info(f"Successfully updated {updated_count} weather forecasts")
-        return get_weather_forecast(
-            db,
-            location,
-            datetime.now(),
-            datetime.now() + timedelta(days=7)
-        )
+
+        return ingest_weather_forecasts(db, location, forecasts)
     except asyncio.CancelledError:
         logger.info("Weather update was cancelled")
         raise
@@ -154,22 +321,134 @@ async def update_weather_forecasts(db: Session, location: str):
         logger.error(f"Error updating weather forecasts: {str(e)}")
         return []  # Return empty list instead of raising
 
+async def update_weather_cells(db: Session, cells: Optional[List[WeatherCell]] = None) -> List[str]:
+    """Refresh every active forecast cell; returns the locations whose data changed.
+
+    Provider fetches run concurrently, at most WEATHER_FETCH_CONCURRENCY at a
+    time, so a refresh takes as long as the number of distinct cells allows
+    rather than growing with the number of users. Ingest then runs per cell
+    on this session, in a worker thread so the blocking upserts and rollup
+    triggers stay off the event loop.
+    """
+    if cells is None:
+        cells = await asyncio.to_thread(get_active_cells, db)
+    semaphore = asyncio.Semaphore(settings.WEATHER_FETCH_CONCURRENCY)
+
+    async def fetch(cell: WeatherCell):
+        async with semaphore:
+            return await fetch_weather_data(cell=cell)
+
+    results = await asyncio.gather(*(fetch(cell) for cell in cells), return_exceptions=True)
+
+    changed = []
+    for cell, result in zip(cells, results):
+        if isinstance(result, asyncio.CancelledError):
+            raise result
+        if isinstance(result, Exception):
+            logger.error(f"Error fetching weather data for {cell.location}: {str(result)}")
+            continue
+        try:
+            if await asyncio.to_thread(store_weather_forecasts, db, cell.location, result):
+                changed.append(cell.location)
+        except Exception as e:
+            logger.error(f"Error ingesting weather data for {cell.location}: {str(e)}")
+    logger.info(f"Refreshed {len(cells)} weather cells, {len(changed)} changed")
+    return changed
+
+# In-flight refresh per location, shared by every caller in this worker
+_refresh_tasks: Dict[str, asyncio.Task] = {}
+
+def _ingest_in_session(location: str, forecasts: Optional[List[dict]]):
+    db = SessionLocal()
+    try:
+        return ingest_weather_forecasts(db, location, forecasts)
+    except Exception as e:
+        logger.error(f"Error updating weather forecasts: {str(e)}")
+        return []
+    finally:
+        db.close()
+
+async def _refresh_location(location: str):
+    """Run one refresh: fetch on the event loop, store in a worker thread.
+
+    The upsert and the rollup triggers it fires are blocking database work,
+    so they run on their own session off the loop; the requesting session
+    may be closed by then anyway.
+    """
+    cell = cell_for_location(location)
+    try:
+        forecasts = await fetch_weather_data(cell=cell)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching weather data: {str(e)}")
+        return []
+    return await asyncio.to_thread(_ingest_in_session, cell.location, forecasts)
+
+def refresh_weather_forecast(location: str) -> asyncio.Task:
+    """Start a refresh of a location unless one is already running (single flight).
+
+    Returns the running task, so callers that need fresh data can await it
+    while everyone else keeps reading what is stored.
+    """
+    location = cell_for_location(location).location
+    task = _refresh_tasks.get(location)
+    if task is None or task.done():
+        task = asyncio.create_task(_refresh_location(location))
+        _refresh_tasks[location] = task
+
+        def forget(done: asyncio.Task):
+            if _refresh_tasks.get(location) is done:
+                del _refresh_tasks[location]
+            if not done.cancelled() and done.exception():
+                logger.error(f"Weather refresh for {location} failed: {str(done.exception())}")
+
+        task.add_done_callback(forget)
+    return task
+
+async def wait_for_refresh(location: str, timeout: Optional[float] = None) -> bool:
+    """Wait for the location's refresh, starting one if needed; False on timeout.
+
+    The refresh is shielded, so a caller giving up does not cancel it for the others.
+    """
+    timeout = settings.WEATHER_REFRESH_WAIT_SECONDS if timeout is None else timeout
+    try:
+        await asyncio.wait_for(asyncio.shield(refresh_weather_forecast(location)), timeout)
+        return True
+    except asyncio.TimeoutError:
+        logger.warning(f"Weather refresh for {location} still running after {timeout}s")
+        return False
+    except Exception:
+        # Logged by the task's done callback
+        return False
+
+def last_ingest_query(location: str):
+    return select(WeatherIngest.ingested_at).where(WeatherIngest.location == location)
+
+def _needs_update(ingested_at: Optional[datetime]) -> bool:
+    # Forecast timestamps run days into the future, so freshness is judged
+    # by when the provider was last checked, not by the newest stored hour
+    if not ingested_at:
+        logger.info("No weather ingest recorded, update needed")
+        return True
+    
+    # Update if the last ingest is more than 6 hours old
+    needs_update = datetime.now(ingested_at.tzinfo) - ingested_at > timedelta(hours=6)
+    logger.debug(f"Last weather ingest at {ingested_at}, update needed: {needs_update}")
+    return needs_update
+
 def should_update_forecast(db: Session, location: str) -> bool:
     """Check if we need to update the forecast"""
     try:
-        latest = db.query(WeatherForecast)\
-            .filter(WeatherForecast.location == location)\
-            .order_by(WeatherForecast.timestamp.desc())\
-            .first()
-        
-        if not latest:
-            logger.info("No weather forecasts found, update needed")
-            return True
-        
-        # Update if latest forecast is more than 6 hours old
-        needs_update = datetime.now(latest.timestamp.tzinfo) - latest.timestamp > timedelta(hours=6)
-        logger.debug(f"Latest forecast is from {latest.timestamp}, update needed: {needs_update}")
-        return needs_update
+        return _needs_update(db.execute(last_ingest_query(location)).scalar())
+    except Exception as e:
+        logger.error(f"Error checking if forecast needs update: {str(e)}")
+        return True  # If there's an error, assume we need to update
+
+async def should_update_forecast_async(db: AsyncSession, location: str) -> bool:
+    """should_update_forecast for async routes"""
+    try:
+        return _needs_update((await db.execute(last_ingest_query(location))).scalar())
     except Exception as e:
         logger.error(f"Error checking if forecast needs update: {str(e)}")
-        return True  # If there's an error, assume we need to update 
\ No newline at end of file
+        return True  # If there's an error, assume we need to update
@@ -4,9 +4,11 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from fastapi.testclient import TestClient
 from httpx import AsyncClient, Client, Response
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db, async_database_url
 from app.main import app
 from app.core.config import settings
 import asyncio
@@ -46,6 +48,17 @@ def override_get_db():
 
 app.dependency_overrides[get_db] = override_get_db
 
+# Async routes get their own engine on the test database; no pooling, since
+# each test client runs its own event loop
+async_engine = create_async_engine(async_database_url(settings.TEST_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+
 @pytest.fixture(scope="function")
 def db():
     """Create a fresh database for each test"""
@@ -107,6 +120,7 @@ def client(db_session):
     app.dependency_overrides[get_db] = override_get_db
     yield CustomTestClient(app)
     app.dependency_overrides.clear()
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
 @pytest.fixture
 async def async_client():
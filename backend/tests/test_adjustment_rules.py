@@ -0,0 +1,39 @@
+import numpy as np
+from app.services.adjustment_rules import RuleLookup, ADJUSTMENT_RULES, get_rule_lookup
+from app.services.watering_schedule import calculate_weather_impact
+
+def test_lookup_bins_use_lower_bounds():
+    """A value equal to a bin's lower bound belongs to that bin"""
+    lookup = get_rule_lookup()
+    result = lookup.lookup([29.9, 30.0], [0.0, 0.0], [0.0, 0.0])
+    assert result["shift_days"].tolist() == [0, -1]
+    assert result["volume_adjustment"].tolist() == [1.25, 1.5]
+
+def test_lookup_combines_dimensions():
+    """Very hot, heavy rain and very windy: volumes multiply, shifts add up"""
+    result = get_rule_lookup().lookup([31.0], [12.0], [35.0])
+    assert result["skip_watering"][0]
+    assert result["shift_days"][0] == 0  # -1 for heat, +1 for rain
+    assert result["volume_adjustment"][0] == 1.5 * 1.5
+    assert result["frequency_adjustment"][0] == -2
+
+def test_missing_weather_is_neutral():
+    result = get_rule_lookup().lookup([np.nan], [np.nan], [np.nan])
+    assert result["volume_adjustment"][0] == 1.0
+    assert result["shift_days"][0] == 0
+    assert not result["skip_watering"][0]
+
+def test_custom_region_rules():
+    """Regions can supply their own table"""
+    rules = {
+        **ADJUSTMENT_RULES["default"],
+        "temperature": [{"min": None}, {"min": 20, "shift_days": -1, "reason": "Warm"}],
+    }
+    lookup = RuleLookup(rules)
+    assert lookup.lookup([22.0], [0.0], [0.0])["shift_days"][0] == -1
+    assert lookup.reasons(22.0, 0.0, 0.0) == ["Warm"]
+
+def test_weather_impact_uses_rule_table():
+    assert calculate_weather_impact(31.0, 0.0) == (1.5, -1)
+    assert calculate_weather_impact(20.0, 12.0) == (1.0, 1)
+    assert calculate_weather_impact(20.0, 0.0) == (1.0, 0)
@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.main import app
+from app.models.plants import Plant
+from app.models.pruning import Pruning
+from app.models.sunlight import Sunlight
+from app.models.users import User
+from app.models.user_plants import UserPlant
+
+client = TestClient(app)
+
+def _garden(db: Session):
+    db.add(User(id=1, email="user@example.com", hashed_password="x", is_active=True))
+    db.add(Plant(id=1, common_name="Lavender", scientific_name=["Lavandula"], type="Herb"))
+    db.add(Plant(id=2, common_name="Rose", scientific_name=["Rosa"], type="Shrub"))
+    db.flush()
+    db.add(Sunlight(plant_id=1, condition="Full sun"))
+    db.add(Pruning(plant_id=1, months=["March", "August"]))
+    db.add(UserPlant(user_id=1, plant_id=1, section="Bed"))
+    db.commit()
+
+def test_plant_reads_use_async_session(db: Session):
+    _garden(db)
+
+    response = client.get("/api/plants/search", params={"query": "lav", "user_id": 1})
+    assert [(item["id"], item["in_user_garden"]) for item in response.json()["items"]] == [(1, True)]
+
+    response = client.post("/api/plants/filtered", json={"sunlight": ["Full sun"]})
+    assert [(plant["id"], plant["sunlight"]) for plant in response.json()] == [(1, ["Full sun"])]
+
+    response = client.get("/api/pruning/schedule/1")
+    assert response.json()["pruning_schedule"] == [{
+        "section": "Bed",
+        "months": {"3": 1, "8": 1},
+        "details": {
+            "3": [{"id": 1, "name": "Lavender", "image_url": None}],
+            "8": [{"id": 1, "name": "Lavender", "image_url": None}]
+        }
+    }]
+
+def test_update_plant_section_commits(db: Session):
+    _garden(db)
+
+    response = client.put("/api/plants/user/1/plants/1/section", json={"section": "Border"})
+    assert response.json() == {"status": "success", "section": "Border"}
+    db.expire_all()
+    assert db.query(UserPlant).filter(UserPlant.plant_id == 1).one().section == "Border"
+
+    response = client.put("/api/plants/user/1/plants/2/section", json={"section": "Border"})
+    assert response.status_code == 404
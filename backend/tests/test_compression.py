@@ -0,0 +1,73 @@
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from app.core.compression import CompressionMiddleware, choose_encoding, is_compressible
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=100, offload_size=1000)
+
+@app.get("/large")
+def large():
+    return PlainTextResponse("plant " * 1000)
+
+@app.get("/small")
+def small():
+    return PlainTextResponse("plant")
+
+@app.get("/image")
+def image():
+    return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse(iter([b"a" * 500, b"b" * 500]), media_type="application/x-ndjson")
+
+client = TestClient(app)
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate", ["br", "gzip"]) == "gzip"
+    assert choose_encoding("gzip;q=0.5, br", ["br", "gzip"]) == "br"
+    assert choose_encoding("br;q=0, gzip", ["br", "gzip"]) == "gzip"
+    assert choose_encoding("identity", ["gzip"]) is None
+    assert choose_encoding("*", ["gzip"]) == "gzip"
+
+def test_is_compressible():
+    assert is_compressible("application/json")
+    assert is_compressible("text/html; charset=utf-8")
+    assert is_compressible("application/problem+json")
+    assert is_compressible("image/svg+xml")
+    assert not is_compressible("text/event-stream")
+    assert not is_compressible("image/png")
+    assert not is_compressible("application/zip")
+    assert not is_compressible("application/octet-stream")
+
+def test_large_response_is_compressed():
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.text == "plant " * 1000
+
+def test_small_and_streaming_responses_are_not_compressed():
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == b"a" * 500 + b"b" * 500
+
+def test_identity_requests_are_untouched():
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert len(response.content) == len("plant " * 1000)
+    assert "Accept-Encoding" in response.headers["vary"]
+
+def test_small_responses_still_vary():
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+
+def test_binary_responses_are_not_compressed():
+    response = client.get("/image", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+    assert response.content == b"\x89PNG" * 1000
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import threading
+from app.core.events import ScheduleEventBus, format_sse, RESYNC, SCHEDULE_COMPLETED
+
+def test_events_reach_only_the_users_subscribers():
+    bus = ScheduleEventBus()
+
+    async def scenario():
+        async with bus.subscribe(1) as mine, bus.subscribe(2) as other:
+            # Sync routes publish from threadpool threads
+            thread = threading.Thread(target=bus.publish, args=(1, SCHEDULE_COMPLETED), kwargs={"plant_ids": [5]})
+            thread.start()
+            thread.join()
+            event = await asyncio.wait_for(mine.get(), timeout=1)
+            assert event["type"] == SCHEDULE_COMPLETED
+            assert event["plant_ids"] == [5]
+            assert other.empty()
+
+            # Broadcasts reach everyone
+            bus.publish(None, "weather_adjusted")
+            assert (await asyncio.wait_for(other.get(), timeout=1))["type"] == "weather_adjusted"
+        assert bus.subscriber_count() == 0
+
+    asyncio.run(scenario())
+
+def test_slow_subscribers_get_a_resync():
+    bus = ScheduleEventBus(max_queue_size=2)
+
+    async def scenario():
+        async with bus.subscribe(1) as queue:
+            for _ in range(3):
+                bus.publish(1, SCHEDULE_COMPLETED)
+            await asyncio.sleep(0)
+            assert queue.qsize() == 1
+            assert queue.get_nowait()["type"] == RESYNC
+
+    asyncio.run(scenario())
+
+def test_format_sse():
+    message = format_sse({"id": 3, "type": SCHEDULE_COMPLETED, "plant_ids": [1]})
+    lines = message.split("\n")
+    assert lines[0] == "id: 3"
+    assert lines[1] == "event: completed"
+    assert json.loads(lines[2][len("data: "):]) == {"id": 3, "type": "completed", "plant_ids": [1]}
+    assert message.endswith("\n\n")
+
+def test_events_from_other_workers_are_delivered_once():
+    bus, other_worker = ScheduleEventBus(), ScheduleEventBus()
+    forwarded = []
+    bus.forward = lambda user_id, event: forwarded.append(bus.encode(user_id, event))
+
+    async def scenario():
+        async with bus.subscribe(1) as queue:
+            bus.publish(1, SCHEDULE_COMPLETED, plant_ids=[5])
+            await asyncio.sleep(0)
+            assert queue.qsize() == 1
+            queue.get_nowait()
+
+            # Our own message echoed back by NOTIFY is skipped
+            bus.receive(forwarded[0])
+            await asyncio.sleep(0)
+            assert queue.empty()
+
+            other_worker.forward = lambda user_id, event: bus.receive(other_worker.encode(user_id, event))
+            other_worker.publish(None, "weather_adjusted", plant_ids=[7])
+            event = await asyncio.wait_for(queue.get(), timeout=1)
+            assert (event["type"], event["plant_ids"]) == ("weather_adjusted", [7])
+
+    asyncio.run(scenario())
+
+
+def test_fanout_notifies_without_blocking_the_publisher():
+    import asyncpg
+    from sqlalchemy.engine import make_url
+    from app.core.config import settings
+    from app.core.event_fanout import EventFanout, EVENTS_CHANNEL
+    from app.core.events import schedule_events
+
+    async def scenario():
+        # Stands in for another worker's LISTEN connection
+        dsn = make_url(settings.get_database_url).render_as_string(hide_password=False)
+        listener = await asyncpg.connect(dsn)
+        received = asyncio.Queue()
+        await listener.add_listener(EVENTS_CHANNEL, lambda *args: received.put_nowait(args[-1]))
+
+        fanout = EventFanout(asyncio.get_running_loop())
+        schedule_events.forward = fanout.notify
+        task = asyncio.create_task(fanout.run())
+        try:
+            # Publishing only queues the NOTIFY, from threads too
+            await asyncio.to_thread(schedule_events.publish, 1, SCHEDULE_COMPLETED, plant_ids=[5])
+            message = json.loads(await asyncio.wait_for(received.get(), timeout=5))
+            assert message["origin"] == schedule_events.origin
+            assert message["user_id"] == 1
+            assert message["event"]["plant_ids"] == [5]
+        finally:
+            schedule_events.forward = None
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await listener.close()
+
+    asyncio.run(scenario())
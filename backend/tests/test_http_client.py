@@ -0,0 +1,99 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import pytest
+from app.core.config import settings
+from app.core.http_client import request_with_retries
+from app.services import weather_service
+
+PAYLOAD = {
+    "hourly": {
+        "time": ["2024-03-20T00:00", "2024-03-20T01:00", "2024-03-20T02:00"],
+        "temperature_2m": [10.5, 11.0, 10.8],
+        "precipitation": [0.0, 0.2, 0.0],
+        "wind_speed_10m": [5.2, 5.5, 5.1]
+    }
+}
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves the queued (status, headers, body) responses in order, then 200 with PAYLOAD"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if server.responses:
+            status, headers, body = server.responses.pop(0)
+        else:
+            status, headers, body = 200, {"ETag": '"v1"'}, json.dumps(PAYLOAD).encode()
+        etag = headers.get("ETag")
+        if status == 200 and etag is not None and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_RETRY_BASE_DELAY", 0.01)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests = []
+    server.responses = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/v1/forecast"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    weather_service.clear_fetch_state()
+    yield server
+    server.shutdown()
+    server.server_close()
+    weather_service.clear_fetch_state()
+
+def run(coroutine_factory):
+    """Run against a fresh pooled client, as the app does between startup and shutdown"""
+    async def main():
+        async with httpx.AsyncClient(timeout=5) as client:
+            return await coroutine_factory(client)
+    return asyncio.run(main())
+
+def test_retries_transient_errors(stub_server):
+    stub_server.responses = [(503, {}, b""), (503, {"Retry-After": "0"}, b"")]
+    response = run(lambda client: request_with_retries("GET", stub_server.url, client=client, retries=3))
+    assert response.status_code == 200
+    assert len(stub_server.requests) == 3
+
+    # The final status is returned once retries run out
+    stub_server.responses = [(503, {}, b"")] * 2
+    response = run(lambda client: request_with_retries("GET", stub_server.url, client=client, retries=1))
+    assert response.status_code == 503
+
+def test_fetch_weather_data_is_conditional(stub_server):
+    forecasts = run(lambda client: weather_service.fetch_weather_data(stub_server.url, client))
+    assert len(forecasts) == 3
+    assert forecasts[0]["temperature"] == 10.5
+    assert forecasts[0]["location"] == settings.WEATHER_LOCATION
+
+    # Until the payload is stored, the same content is returned again
+    weather_service._fetch_state[(stub_server.url, settings.WEATHER_LOCATION)].pop("etag")
+    assert len(run(lambda client: weather_service.fetch_weather_data(stub_server.url, client))) == 3
+
+    # Once ingested, identical content is skipped even without validators
+    weather_service.mark_weather_ingested(stub_server.url)
+    weather_service._fetch_state[(stub_server.url, settings.WEATHER_LOCATION)].pop("etag")
+    assert run(lambda client: weather_service.fetch_weather_data(stub_server.url, client)) is None
+
+    # The ETag is sent back and a 304 skips the download
+    assert run(lambda client: weather_service.fetch_weather_data(stub_server.url, client)) is None
+    assert stub_server.requests[-1]["If-None-Match"] == '"v1"'
+
+def test_fetch_honors_max_age(stub_server):
+    stub_server.responses = [(200, {"Cache-Control": "max-age=600"}, json.dumps(PAYLOAD).encode())]
+    assert run(lambda client: weather_service.fetch_weather_data(stub_server.url, client))
+    assert run(lambda client: weather_service.fetch_weather_data(stub_server.url, client)) is None
+    assert len(stub_server.requests) == 1
@@ -0,0 +1,41 @@
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.models.plants import Plant
+from app.models.users import User
+from app.models.watering_schedule import WateringSchedule
+from app.services.schedule_partitions import (
+    add_months,
+    partition_name,
+    list_partitions,
+    ensure_partitions,
+    archive_partitions
+)
+
+def test_month_helpers():
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert partition_name(date(2024, 6, 1)) == "watering_schedules_p2024_06"
+
+def test_partitions_created_and_archived(db: Session):
+    """Rows move out of the default partition and old months are detached"""
+    today = date(2024, 6, 15)
+    db.add(User(id=1, email="test@example.com", hashed_password="testpassword", is_active=True))
+    db.add(Plant(id=1, common_name="Plant 1", scientific_name=["Test"]))
+    db.flush()
+    db.add(WateringSchedule(user_id=1, plant_id=1, scheduled_date=date(2024, 6, 20), completed=True))
+    db.add(WateringSchedule(user_id=1, plant_id=1, scheduled_date=date(2022, 3, 1), completed=True))
+    db.commit()
+
+    created = ensure_partitions(db, months_ahead=1, today=today)
+    assert created == ["watering_schedules_p2024_06", "watering_schedules_p2024_07"]
+    assert ensure_partitions(db, months_ahead=1, today=today) == []
+    assert db.execute(text("SELECT COUNT(*) FROM watering_schedules_p2024_06")).scalar() == 1
+
+    # Queries on the parent still see every row
+    assert db.query(WateringSchedule).count() == 2
+
+    ensure_partitions(db, months_ahead=0, today=date(2022, 3, 1))
+    assert archive_partitions(db, retention_months=24, drop=True, today=today) == ["watering_schedules_p2022_03"]
+    assert "watering_schedules_p2022_03" not in [name for name, _, _ in list_partitions(db)]
+    assert db.query(WateringSchedule).count() == 1
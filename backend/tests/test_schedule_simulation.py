@@ -0,0 +1,47 @@
+from datetime import date
+from app.services.schedule_simulation import GardenSnapshot, simulate
+
+START = date(2024, 6, 1)
+
+def make_garden():
+    return GardenSnapshot(
+        start_date=START,
+        days=7,
+        today=START,
+        plants={1: {"name": "Plant 1"}, 2: {"name": "Plant 2"}},
+        pending=[(1, date(2024, 6, 2)), (2, date(2024, 6, 3))],
+        completed=[{"plant_id": 2, "base_date": START, "scheduled_date": START}]
+    )
+
+def test_scenarios_shift_pending_occurrences():
+    hot, rain, calm = simulate(make_garden(), [
+        {"name": "hot", "temperature": [20, 35]},
+        {"name": "rain", "precipitation": [0, 0, 15]},
+        {"name": "calm"},
+    ])
+
+    # Very hot weather on the base date waters a day earlier
+    assert hot["summary"]["moved_earlier"] == 1
+    assert [(e["plant_id"], e["scheduled_date"]) for e in hot["entries"] if not e["completed"]] == [
+        (1, date(2024, 6, 1)), (2, date(2024, 6, 3))
+    ]
+
+    # Heavy rain skips and postpones
+    adjusted = [e for e in rain["entries"] if e["weather_adjusted"]]
+    assert [(e["plant_id"], e["scheduled_date"], e["skip"]) for e in adjusted] == [(2, date(2024, 6, 4), True)]
+
+    assert calm["summary"] == {
+        "occurrences": 3,
+        "completed": 1,
+        "weather_adjusted": 0,
+        "moved_earlier": 0,
+        "moved_later": 0,
+        "skipped": 0,
+    }
+
+def test_summary_only_and_no_earlier_than_today():
+    garden = GardenSnapshot(START, 7, START, {1: {}}, [(1, START)], [])
+    (result,) = simulate(garden, [{"temperature": [35]}], include_entries=False)
+    assert "entries" not in result
+    # Cannot be moved before today
+    assert result["summary"]["weather_adjusted"] == 0
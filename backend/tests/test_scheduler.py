@@ -0,0 +1,28 @@
+import time
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.scheduler import LeaderLock
+
+def test_single_leader_with_failover(db: Session):
+    """Only one lock holder at a time; another takes over once it is gone"""
+    leader = LeaderLock(bind=db.get_bind())
+    standby = LeaderLock(bind=db.get_bind())
+    try:
+        assert leader.try_acquire()
+        assert not standby.try_acquire()
+        assert leader.check()
+
+        # A dead leader's session ends and releases the lock
+        pid = leader.connection.execute(text("SELECT pg_backend_pid()")).scalar()
+        leader.connection.commit()
+        db.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": pid})
+        db.commit()
+        assert not leader.check()
+        deadline = time.monotonic() + 5
+        while not standby.try_acquire() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert standby.held
+        assert not leader.try_acquire()
+    finally:
+        leader.release()
+        standby.release()
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.models.plants import Plant
+from app.models.users import User
+from app.models.sections import Section
+from app.models.user_plants import UserPlant
+from app.services.sync import get_changes_since, truncate_change_log
+
+def test_changes_since_version(db: Session):
+    """Changed rows come back once, deletions as ids, and truncation forces a resync"""
+    db.add(User(id=1, email="test@example.com", hashed_password="testpassword", is_active=True))
+    db.add(Plant(id=1, common_name="Plant 1", scientific_name=["Test"]))
+    db.commit()
+
+    # A client without a copy always starts with a full load
+    assert get_changes_since(db, 1, 0)["resync"] is True
+
+    # Both rows are written in one transaction and share a version
+    section = Section(user_id=1, section_id="A", name="Front")
+    user_plant = UserPlant(user_id=1, plant_id=1, section="A")
+    db.add_all([section, user_plant])
+    db.commit()
+    first = get_changes_since(db, 1, 0)["version"]
+    assert first == 1
+
+    user_plant.section = None
+    db.commit()
+    changes = get_changes_since(db, 1, first)
+    assert changes["resync"] is False
+    assert changes["version"] == first + 1
+    assert [row["id"] for row in changes["changes"]["user_plants"]] == [user_plant.id]
+    assert changes["changes"]["sections"] == []
+
+    # Nothing new since the latest version
+    assert get_changes_since(db, 1, changes["version"])["changes"]["user_plants"] == []
+
+    section_id = section.id
+    db.delete(section)
+    db.commit()
+    changes = get_changes_since(db, 1, first + 1)
+    assert changes["deleted"]["sections"] == [section_id]
+
+    assert truncate_change_log(db, retention_days=0, now=datetime.utcnow() + timedelta(days=1)) == 4
+    assert get_changes_since(db, 1, first)["resync"] is True
+    assert get_changes_since(db, 1, changes["version"])["resync"] is False
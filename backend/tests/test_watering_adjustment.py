@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+from datetime import datetime
+from app.schemas.watering import WateringBase
+from app.schemas.weather_forecast import WeatherForecast
+from app.services.watering_adjustment import WateringAdjustment
+
+WEATHER_CASES = [
+    (20.0, 0.0, 5.0),    # Normal
+    (26.0, 3.0, 22.0),   # Warm, light rain, windy
+    (31.0, 6.0, 35.0),   # Very hot, moderate rain, very windy
+    (15.0, 12.0, 10.0),  # Heavy rain
+]
+
+def make_watering(plant_id: int, drought_tolerant: bool) -> WateringBase:
+    return WateringBase(
+        plant_id=plant_id,
+        frequency_days=7,
+        depth_mm=10,
+        volume_feet=1.0,
+        period="morning",
+        drought_tolerant=drought_tolerant,
+        soil=["loam"]
+    )
+
+def make_forecast(temperature: float, precipitation: float, wind_speed: float) -> WeatherForecast:
+    return WeatherForecast(
+        id=1,
+        timestamp=datetime.now(),
+        location="Copenhagen",
+        temperature=temperature,
+        precipitation=precipitation,
+        wind_speed=wind_speed
+    )
+
+def test_batch_matches_single_adjustment():
+    """Every (plant, day) cell of the batch result matches calculate_adjustment"""
+    plants = [make_watering(1, False), make_watering(2, True)]
+    temps, rain, wind = (np.array(column) for column in zip(*WEATHER_CASES))
+
+    result = WateringAdjustment.calculate_adjustments(
+        temps, rain, wind, [p.drought_tolerant for p in plants]
+    )
+    assert result["volume_adjustment"].shape == (2, len(WEATHER_CASES))
+
+    for i, plant in enumerate(plants):
+        for j, case in enumerate(WEATHER_CASES):
+            single = WateringAdjustment.calculate_adjustment(plant, make_forecast(*case))
+            assert result["volume_adjustment"][i, j] == pytest.approx(single["volume_adjustment"])
+            assert result["frequency_adjustment"][i, j] == pytest.approx(single["frequency_adjustment"])
+            assert result["skip_watering"][i, j] == single["skip_watering"]
+
+def test_batch_handles_missing_forecasts():
+    """NaN weather means no weather adjustment, only the plant's own factor"""
+    result = WateringAdjustment.calculate_adjustments(
+        [np.nan], [np.nan], [np.nan], [False, True]
+    )
+    assert result["volume_adjustment"][:, 0].tolist() == [1.0, 0.75]
+    assert not result["skip_watering"].any()
+
+def test_batch_per_plant_forecasts():
+    """2-D weather arrays give each plant its own forecast"""
+    result = WateringAdjustment.calculate_adjustments(
+        [[20.0], [31.0]], [[0.0], [0.0]], [[5.0], [5.0]], [False, False]
+    )
+    assert result["volume_adjustment"][:, 0].tolist() == [1.0, 1.5]
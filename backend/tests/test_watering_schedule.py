@@ -4,14 +4,33 @@ import sys
 import os
 from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.models.idempotency_keys import IdempotencyKey
 from app.models.watering_schedule import WateringSchedule
 from app.models.weather_forecast import WeatherForecast
 from app.services.watering_schedule import (
     get_watering_schedule,
     calculate_weather_impact,
     adjust_watering_date,
-    update_schedule_for_weather
+    adjust_schedule_for_weather,
+    update_schedule_for_weather,
+    resolve_schedule_window,
+    complete_schedules_batch,
+    update_schedule,
+    get_schedule_entries,
+    get_compact_watering_schedule,
+    create_watering_schedule,
+    prune_idempotency_keys,
+    STATUS_WATERED
 )
+from app.services.watering_recurrence import occurrence_dates
+from app.services.watering_history import get_watering_history
+from app.models.watering_recurrence import WateringRecurrence
+from app.schemas.watering_schedule import WateringScheduleBatchComplete, WateringScheduleUpdate
+from app.models.plants import Plant
+from app.models.watering import Watering
+from app.models.user_plants import UserPlant
+from app.models.users import User
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.main import app
@@ -195,20 +214,23 @@ def test_invalid_date_range():
 
 def test_weather_impact_calculation():
     """Test weather impact calculation for different conditions"""
-    # Test high temperature
-    impact, days = calculate_weather_impact(30.0, 0.0)
-    assert impact > 0
+    # Test high temperature: more water, one day earlier
+    volume, days = calculate_weather_impact(30.0, 0.0)
+    assert volume > 1.0
+    assert days < 0
+
+    # Test heavy rain: watering is pushed back a day
+    volume, days = calculate_weather_impact(20.0, 15.0)
+    assert volume == 1.0
     assert days > 0
 
-    # Test heavy rain
-    impact, days = calculate_weather_impact(20.0, 15.0)
-    assert impact < 0
-    assert days < 0
+    # Test light rain: less water, same day
+    volume, days = calculate_weather_impact(22.0, 2.0)
+    assert volume < 1.0
+    assert days == 0
 
     # Test normal conditions
-    impact, days = calculate_weather_impact(22.0, 2.0)
-    assert abs(impact) < 0.4
-    assert days == 0
+    assert calculate_weather_impact(22.0, 0.0) == (1.0, 0)
 
 def test_adjust_watering_date():
     """Test watering date adjustments"""
@@ -227,6 +249,36 @@ def test_adjust_watering_date():
     adjusted = adjust_watering_date(today, -1)
     assert adjusted == today  # Should not go before today
 
+def test_resolve_schedule_window():
+    """Test resolving from/to/days parameters into a schedule window"""
+    today = date.today()
+
+    # Defaults to the configured number of days from today
+    start, days = resolve_schedule_window()
+    assert start == today
+    assert days == 21
+
+    # A today-only view covers a single day
+    assert resolve_schedule_window(days=1) == (today, 1)
+
+    # date_to is inclusive
+    start, days = resolve_schedule_window(today, today + timedelta(days=6))
+    assert days == 7
+
+    # Inverted and oversized windows are rejected
+    with pytest.raises(ValueError):
+        resolve_schedule_window(today, today - timedelta(days=1))
+    with pytest.raises(ValueError):
+        resolve_schedule_window(days=365)
+
+def test_get_watering_schedule_window(db: Session):
+    """Test that the overview honours the requested number of days"""
+    result = get_watering_schedule(db, 1, days=1)
+    assert len(result["schedule"]) == 1
+
+    result = get_watering_schedule(db, 1, days=7)
+    assert len(result["schedule"]) == 7
+
 def test_weather_schedule_adjustment(db: Session):
     """Test full weather-based schedule adjustment"""
     # Create test data
@@ -266,4 +318,200 @@ def test_weather_schedule_adjustment(db: Session):
                 for plant in section["plants"]:
                     if plant["plant_id"] == plant_id:
                         assert plant["weather_adjusted"] == True
-                        break 
\ No newline at end of file
+                        break 
+
+def test_complete_schedules_batch(db: Session):
+    """Completing a whole section advances each recurrence once"""
+    today = date.today()
+    db.add(User(id=1, email="test@example.com", hashed_password="testpassword", is_active=True))
+    for plant_id in (1, 2, 3):
+        db.add(Plant(id=plant_id, common_name=f"Plant {plant_id}", scientific_name=["Test"]))
+    db.flush()
+    for plant_id, section in ((1, "A"), (2, "A"), (3, "B")):
+        db.add(Watering(plant_id=plant_id, frequency_days=3, depth_mm=10, volume_feet=1.0))
+        db.add(UserPlant(user_id=1, plant_id=plant_id, section=section))
+        db.add(WateringSchedule(user_id=1, plant_id=plant_id, scheduled_date=today, completed=False))
+    db.commit()
+
+    batch = WateringScheduleBatchComplete(user_id=1, scheduled_date=today, section="A")
+    result = complete_schedules_batch(db, batch)
+    assert result["completed"] == 2
+    assert result["advanced"] == 2
+
+    advanced = db.query(WateringRecurrence).filter(
+        WateringRecurrence.anchor_date == today + timedelta(days=3)
+    ).all()
+    assert sorted(r.plant_id for r in advanced) == [1, 2]
+    # Next occurrences are generated, not stored
+    assert db.query(WateringSchedule).filter(WateringSchedule.scheduled_date > today).count() == 0
+
+    # Repeating the request is harmless
+    result = complete_schedules_batch(db, batch)
+    assert result["completed"] == 0
+    assert result["advanced"] == 0
+
+def test_batch_complete_requires_selector():
+    with pytest.raises(ValueError):
+        WateringScheduleBatchComplete(user_id=1)
+
+def test_completion_retries_are_idempotent(db: Session):
+    """Retrying a completion with the same key neither fails nor duplicates work"""
+    today = date.today()
+    db.add(User(id=1, email="test@example.com", hashed_password="testpassword", is_active=True))
+    db.add(Plant(id=1, common_name="Plant 1", scientific_name=["Test"]))
+    db.flush()
+    db.add(Watering(plant_id=1, frequency_days=3, depth_mm=10, volume_feet=1.0))
+    schedule = WateringSchedule(user_id=1, plant_id=1, scheduled_date=today, completed=False)
+    db.add(schedule)
+    db.commit()
+
+    update = WateringScheduleUpdate(completed=True)
+    first = update_schedule(db, schedule.id, update, idempotency_key="tap-1")
+    assert first.completed is True
+
+    # Toggle back, then replay the original request: the key is recognised
+    # and the original response comes back without redoing the work
+    update_schedule(db, schedule.id, WateringScheduleUpdate(completed=False))
+    replay = update_schedule(db, schedule.id, update, idempotency_key="tap-1")
+    assert replay.completed is True
+    assert replay.id == schedule.id
+    db.expire_all()
+    assert db.query(WateringSchedule).filter(WateringSchedule.id == schedule.id).one().completed is False
+
+    recurrence = db.query(WateringRecurrence).filter(WateringRecurrence.plant_id == 1).one()
+    assert recurrence.anchor_date == today
+
+    batch = WateringScheduleBatchComplete(schedule_ids=[schedule.id])
+    result = complete_schedules_batch(db, batch, idempotency_key="bed-1")
+    assert result["completed"] == 1
+    assert complete_schedules_batch(db, batch, idempotency_key="bed-1") == result
+
+    # A key reused for another request type or schedule is not a replay
+    with pytest.raises(HTTPException) as error:
+        complete_schedules_batch(db, batch, idempotency_key="tap-1")
+    assert error.value.status_code == 422
+    other = WateringSchedule(user_id=1, plant_id=1, scheduled_date=today + timedelta(days=1), completed=False)
+    db.add(other)
+    db.commit()
+    with pytest.raises(HTTPException):
+        update_schedule(db, other.id, update, idempotency_key="tap-1")
+
+    # Expired keys are pruned, after which the key starts a new request
+    assert prune_idempotency_keys(db, ttl_hours=0, now=datetime.utcnow() + timedelta(seconds=1)) == 2
+    assert db.query(IdempotencyKey).count() == 0
+
+def test_occurrence_dates():
+    today = date(2024, 6, 10)
+    # Overdue anchors are due today, then every interval
+    assert occurrence_dates(date(2024, 6, 1), 3, today, today + timedelta(days=7), today) == [
+        date(2024, 6, 10), date(2024, 6, 13), date(2024, 6, 16)
+    ]
+    # A window starting later skips to the first occurrence inside it
+    assert occurrence_dates(date(2024, 6, 10), 3, date(2024, 6, 14), date(2024, 6, 20), today) == [
+        date(2024, 6, 16), date(2024, 6, 19)
+    ]
+
+def test_schedule_entries_expand_recurrences(db: Session):
+    """Occurrences come from the recurrence; stored completions override them"""
+    today = date.today()
+    db.add(User(id=1, email="test@example.com", hashed_password="testpassword", is_active=True))
+    db.add(Plant(id=1, common_name="Plant 1", scientific_name=["Test"]))
+    db.flush()
+    db.add(Watering(plant_id=1, frequency_days=3, depth_mm=10, volume_feet=1.0))
+    db.add(UserPlant(user_id=1, plant_id=1, section="A"))
+    db.add(WateringRecurrence(user_id=1, plant_id=1, anchor_date=today))
+    db.commit()
+
+    entries = get_schedule_entries(db, 1, today, today + timedelta(days=7))
+    assert [e["base_date"] for e in entries] == [today, today + timedelta(days=3), today + timedelta(days=6)]
+    assert all(e["schedule_id"] is None for e in entries)
+
+    batch = WateringScheduleBatchComplete(user_id=1, scheduled_date=entries[0]["scheduled_date"], plant_ids=[1])
+    result = complete_schedules_batch(db, batch)
+    assert result["completed"] == 1
+
+    entries = get_schedule_entries(db, 1, today, today + timedelta(days=7))
+    assert entries[0]["completed"] is True
+    assert [e["base_date"] for e in entries[1:]] == [today + timedelta(days=3), today + timedelta(days=6)]
+
+def test_create_schedule_stores_only_the_recurrence(db: Session):
+    """Starting a plant stores its recurrence; the pending occurrence is generated"""
+    today = date.today()
+    db.add(User(id=1, email="test@example.com", hashed_password="testpassword", is_active=True))
+    db.add(Plant(id=1, common_name="Plant 1", scientific_name=["Test"]))
+    db.flush()
+    db.add(Watering(plant_id=1, frequency_days=3, depth_mm=10, volume_feet=1.0))
+    db.commit()
+
+    for _ in range(2):
+        schedule = create_watering_schedule(db, 1, 1)
+        assert (schedule.id, schedule.scheduled_date, schedule.completed) == (None, today, False)
+    assert db.query(WateringRecurrence).count() == 1
+    assert db.query(WateringSchedule).count() == 0
+
+def test_watering_history_rollup(db: Session):
+    """Completions update the rollup, which the history query aggregates"""
+    today = date.today()
+    db.add(User(id=1, email="test@example.com", hashed_password="testpassword", is_active=True))
+    for plant_id in (1, 2):
+        db.add(Plant(id=plant_id, common_name=f"Plant {plant_id}", scientific_name=["Test"]))
+    db.flush()
+    for plant_id in (1, 2):
+        db.add(Watering(plant_id=plant_id, frequency_days=3, depth_mm=10, volume_feet=2.0))
+        db.add(UserPlant(user_id=1, plant_id=plant_id, section="A"))
+        db.add(WateringRecurrence(user_id=1, plant_id=plant_id, anchor_date=today))
+    db.commit()
+
+    complete_schedules_batch(db, WateringScheduleBatchComplete(user_id=1, scheduled_date=today, plant_ids=[1]))
+
+    history = get_watering_history(db, 1, today, today, "day")
+    assert history == [{
+        "period": today, "section": "A", "planned": 1, "completed": 1, "volume": 2.0, "weather_adjusted": 0
+    }]
+
+    # Undoing the completion is reflected as well
+    schedule = db.query(WateringSchedule).filter(WateringSchedule.plant_id == 1).one()
+    update_schedule(db, schedule.id, WateringScheduleUpdate(completed=False))
+    month = get_watering_history(db, 1, today.replace(day=1), today, "month")
+    assert month[0]["period"] == today.replace(day=1)
+    assert month[0]["completed"] == 0
+
+    with pytest.raises(ValueError):
+        get_watering_history(db, 1, today, today, "year")
+
+def test_compact_watering_schedule(db: Session):
+    """Plant details appear once; days only carry [plant_id, flags]"""
+    today = date.today()
+    db.add(User(id=1, email="test@example.com", hashed_password="testpassword", is_active=True))
+    for plant_id in (1, 2):
+        db.add(Plant(id=plant_id, common_name=f"Plant {plant_id}", scientific_name=["Test"]))
+    db.flush()
+    for plant_id, section in ((1, "A"), (2, None)):
+        db.add(Watering(plant_id=plant_id, frequency_days=3, depth_mm=10, volume_feet=1.0))
+        db.add(UserPlant(user_id=1, plant_id=plant_id, section=section))
+        db.add(WateringRecurrence(user_id=1, plant_id=plant_id, anchor_date=today))
+    db.commit()
+    complete_schedules_batch(db, WateringScheduleBatchComplete(user_id=1, scheduled_date=today, plant_ids=[1]))
+
+    overview = get_compact_watering_schedule(db, 1, today, 7)
+    assert overview["sections"] == ["A", "Unassigned"]
+    assert overview["plants"][1]["name"] == "Plant 1"
+    assert overview["plants"][2]["section"] == 1
+    assert len(overview["schedule"]) == 7
+    assert overview["schedule"][0]["sections"] == [(0, [[1, STATUS_WATERED]]), (1, [[2, 0]])]
+    assert overview["schedule"][3]["sections"] == [(0, [[1, 0]]), (1, [[2, 0]])]
+
+def test_weather_adjustment_never_moves_into_the_past():
+    """A hot day pulls watering earlier, but not before today"""
+    today = date.today()
+    hot = WeatherForecast(temperature=30.0, precipitation=0.0, wind_speed=5.0)
+
+    schedule = adjust_schedule_for_weather(None, WateringSchedule(scheduled_date=today, base_date=today), hot)
+    assert schedule.scheduled_date == today
+    assert schedule.weather_adjusted is False
+
+    later = today + timedelta(days=3)
+    schedule = adjust_schedule_for_weather(None, WateringSchedule(scheduled_date=later, base_date=later), hot)
+    assert schedule.scheduled_date == later - timedelta(days=1)
+    assert schedule.weather_adjusted is True
+
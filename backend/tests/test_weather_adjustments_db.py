@@ -7,7 +7,8 @@ from app.models.user_plants import UserPlant
 from app.models.plants import Plant
 from app.models.watering import Watering
 from app.models.users import User
-from app.services.watering_schedule import get_watering_schedule
+from app.models.watering_recurrence import WateringRecurrence
+from app.services.watering_schedule import get_watering_schedule, get_schedule_entries
 
 def test_weather_adjustment_db_flow(db: Session):
     """Test the database operations for weather-based schedule adjustments"""
@@ -166,4 +167,36 @@ def test_multiple_weather_conditions_db(db: Session):
     for i, (temp, precip, wind) in enumerate(weather_conditions):
         assert saved_forecasts[i].temperature == temp
         assert saved_forecasts[i].precipitation == precip
-        assert saved_forecasts[i].wind_speed == wind 
\ No newline at end of file
+        assert saved_forecasts[i].wind_speed == wind 
+
+def test_weather_adjustment_is_idempotent(db: Session):
+    """Generated occurrences shift from their base date without storing anything"""
+    today = date.today()
+    user_id = 1
+    plant_id = 1
+
+    db.add(User(id=user_id, email="test@example.com", hashed_password="testpassword", is_active=True))
+    db.add(Plant(id=plant_id, common_name="Test Plant", scientific_name=["Test Scientific"]))
+    db.flush()
+    db.add(Watering(plant_id=plant_id, frequency_days=7, depth_mm=10, volume_feet=1.0))
+
+    base_date = today + timedelta(days=2)
+    db.add(WateringRecurrence(user_id=user_id, plant_id=plant_id, anchor_date=base_date))
+
+    # Hot day on the base date
+    db.add(WeatherForecast(
+        timestamp=datetime.combine(base_date, datetime.min.time()) + timedelta(hours=12),
+        location="Copenhagen",
+        temperature=35.0,
+        precipitation=0.0,
+        wind_speed=5.0
+    ))
+    db.commit()
+
+    # Reading again does not keep shifting the date
+    for _ in range(2):
+        entries = get_schedule_entries(db, user_id, today, today + timedelta(days=7))
+        assert [(e["base_date"], e["scheduled_date"], e["weather_adjusted"]) for e in entries] == [
+            (base_date, base_date - timedelta(days=1), True)
+        ]
+    assert db.query(WateringSchedule).count() == 0
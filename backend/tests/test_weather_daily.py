@@ -0,0 +1,68 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session
+from app.models.weather_daily import WeatherDaily
+from app.models.weather_forecast import WeatherForecast
+from app.core.config import settings
+from app.services import weather_service
+from app.services.watering_schedule import get_weather_forecast, get_daily_weather_shifts
+
+def _hours(day: date, temperatures, precipitation=0.0, wind_speed=5.0, location=settings.WEATHER_LOCATION):
+    start = datetime.combine(day, datetime.min.time())
+    return [
+        {"timestamp": start + timedelta(hours=6 * i), "location": location,
+         "temperature": temperature, "precipitation": precipitation, "wind_speed": wind_speed}
+        for i, temperature in enumerate(temperatures)
+    ]
+
+def _daily(db: Session, day: date, location: str = settings.WEATHER_LOCATION) -> WeatherDaily:
+    db.expire_all()
+    return db.query(WeatherDaily).filter(WeatherDaily.location == location, WeatherDaily.day == day).first()
+
+def test_rollup_follows_ingest(db: Session):
+    tomorrow = date.today() + timedelta(days=1)
+    hours = _hours(tomorrow, [20.0, 30.0, 34.0, 24.0], precipitation=0.0, wind_speed=8.0)
+    weather_service.upsert_weather_forecasts(db, hours)
+
+    daily = _daily(db, tomorrow)
+    assert daily.hours == 4
+    assert daily.temperature_mean == 27.0
+    assert (daily.temperature_min, daily.temperature_max) == (20.0, 34.0)
+    assert daily.precipitation_sum == 0.0
+    assert daily.wind_speed_max == 8.0
+    assert daily.icon == "hot"
+
+    # Refreshed hours update the day in the same transaction
+    for hour in hours:
+        hour["precipitation"] = 3.0
+    weather_service.upsert_weather_forecasts(db, hours)
+    daily = _daily(db, tomorrow)
+    assert daily.precipitation_sum == 12.0
+    assert daily.precipitation_mean == 3.0
+    assert daily.icon == "rainy"
+
+    forecast = get_weather_forecast(db, tomorrow, tomorrow + timedelta(days=1))
+    assert forecast == {
+        tomorrow.isoformat(): {
+            "temperature": 27.0,
+            "temperature_min": 20.0,
+            "temperature_max": 34.0,
+            "precipitation": 3.0,
+            "precipitation_sum": 12.0,
+            "wind_speed": 8.0,
+            "wind_speed_max": 8.0,
+            "weather_icons": ["rainy"]
+        }
+    }
+
+def test_rollup_follows_orm_writes_and_deletes(db: Session):
+    today = date.today()
+    noon = datetime.combine(today + timedelta(days=1), datetime.min.time()) + timedelta(hours=12)
+    forecast = WeatherForecast(timestamp=noon, location=settings.WEATHER_LOCATION, temperature=35.0, precipitation=0.0, wind_speed=5.0)
+    db.add(forecast)
+    db.commit()
+    assert get_daily_weather_shifts(db, today) == {today + timedelta(days=1): -1}
+
+    db.delete(forecast)
+    db.commit()
+    assert _daily(db, today + timedelta(days=1)) is None
+    assert get_daily_weather_shifts(db, today) == {}
@@ -2,13 +2,17 @@ import pytest
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import httpx
 from httpx import AsyncClient
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.services import weather_service
 from app.models.weather_forecast import WeatherForecast
+from app.models.weather_ingest import WeatherIngest
 from app.schemas.weather_forecast import WeatherForecastCreate
 from app.main import app
+from app.core.config import settings
 from unittest.mock import patch, AsyncMock
 
 # Sample weather data for mocking API responses
@@ -26,21 +30,15 @@ MOCK_WEATHER_RESPONSE = {
 }
 
 @pytest.fixture
-async def mock_weather_api():
-    """Mock the external weather API calls"""
-    mock_response = AsyncMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = MOCK_WEATHER_RESPONSE
-    mock_response.raise_for_status.return_value = None
-
-    mock_client = AsyncMock()
-    mock_client.get.return_value = mock_response
-    mock_client.__aenter__.return_value = mock_client
-
-    with patch('httpx.AsyncClient') as mock:
-        mock.return_value = mock_client
-        mock.return_value.__aenter__ = mock_client.__aenter__
+def mock_weather_api():
+    """Mock the external weather API calls made through the shared HTTP client"""
+    async def respond(method, url, **kwargs):
+        return httpx.Response(200, json=MOCK_WEATHER_RESPONSE, request=httpx.Request(method, url))
+
+    weather_service.clear_fetch_state()
+    with patch.object(weather_service, "request_with_retries", AsyncMock(side_effect=respond)) as mock:
         yield mock
+    weather_service.clear_fetch_state()
 
 @pytest.fixture
 def sample_weather_forecast(db: Session):
@@ -57,17 +55,21 @@ def sample_weather_forecast(db: Session):
     db.refresh(forecast)
     return forecast
 
-@pytest.mark.asyncio
-async def test_fetch_weather_data(mock_weather_api):
+def test_fetch_weather_data(mock_weather_api):
     """Test fetching weather data from API"""
-    forecasts = await weather_service.fetch_weather_data()
+    forecasts = asyncio.run(weather_service.fetch_weather_data())
     
     assert isinstance(forecasts, list)
     assert len(forecasts) == 3
-    assert forecasts[0]["location"] == "Denmark"
+    assert forecasts[0]["location"] == settings.WEATHER_LOCATION
     assert isinstance(forecasts[0]["temperature"], float)
     assert forecasts[0]["temperature"] == 10.5  # Check actual value from mock
 
+    # One GET to the provider with the default cell's coordinates
+    method, url = mock_weather_api.call_args.args
+    assert (method, url) == ("GET", settings.WEATHER_API_URL)
+    assert mock_weather_api.call_args.kwargs["params"]["hourly"]
+
 def test_create_weather_forecast(db: Session):
     """Test creating a new weather forecast"""
     forecast_data = {
@@ -99,6 +101,24 @@ def test_create_duplicate_forecast(db: Session, sample_weather_forecast):
     with pytest.raises(Exception):
         weather_service.create_weather_forecast(db, forecast)
 
+def test_upsert_weather_forecasts(db: Session):
+    """Existing hours are refreshed instead of skipped"""
+    start = datetime(2024, 3, 20, 0, 0)
+    forecasts = [
+        {"timestamp": start + timedelta(hours=i), "location": "Denmark",
+         "temperature": 10.0 + i, "precipitation": 0.0, "wind_speed": 5.0}
+        for i in range(3)
+    ]
+    assert weather_service.upsert_weather_forecasts(db, forecasts) == {"inserted": 3, "updated": 0, "unchanged": 0}
+
+    forecasts[1]["temperature"] = 25.0
+    forecasts.append({"timestamp": start + timedelta(hours=3), "location": "Denmark",
+                      "temperature": 12.0, "precipitation": 0.0, "wind_speed": 5.0})
+    assert weather_service.upsert_weather_forecasts(db, forecasts) == {"inserted": 1, "updated": 1, "unchanged": 2}
+
+    stored = weather_service.get_weather_forecast(db, "Denmark", start, start + timedelta(hours=3))
+    assert [f.temperature for f in stored] == [10.0, 25.0, 12.0, 12.0]
+
 def test_get_weather_forecast(db: Session, sample_weather_forecast):
     """Test retrieving weather forecasts"""
     forecasts = weather_service.get_weather_forecast(
@@ -113,21 +133,26 @@ def test_get_weather_forecast(db: Session, sample_weather_forecast):
 
 def test_should_update_forecast(db: Session, sample_weather_forecast):
     """Test the update check logic"""
-    # Recent forecast
+    # Stored hours alone do not count; only a recorded provider check does
+    assert weather_service.should_update_forecast(db, "Denmark")
+
+    # Recent ingest
+    weather_service.record_weather_ingest(db, "Denmark")
     assert not weather_service.should_update_forecast(db, "Denmark")
     
-    # Old forecast
-    sample_weather_forecast.timestamp = datetime.now() - timedelta(hours=7)
+    # Old ingest, even with forecast hours far in the future
+    sample_weather_forecast.timestamp = datetime.now() + timedelta(days=6)
+    db.query(WeatherIngest).update({"ingested_at": datetime.now().astimezone() - timedelta(hours=7)})
     db.commit()
     assert weather_service.should_update_forecast(db, "Denmark")
 
 @pytest.mark.asyncio
 async def test_weather_endpoint(async_client, mock_weather_api, db: Session):
     """Test the weather API endpoint"""
-    # Create a sample forecast first
+    # Create an upcoming forecast first, stored under the location's cell
     forecast = WeatherForecast(
-        timestamp=datetime.now(),
-        location="Denmark",
+        timestamp=datetime.now() + timedelta(hours=1),
+        location=settings.WEATHER_LOCATION,
         temperature=20.5,
         precipitation=0.0,
         wind_speed=5.2
@@ -166,7 +191,7 @@ async def test_historical_weather_endpoint(
 @pytest.mark.asyncio
 async def test_scheduler_update(mock_weather_api, db: Session):
     """Test the scheduled weather update"""
-    from app.core.scheduler import update_weather_periodic
+    from app.core.scheduler import run_periodic_jobs
     
     # Create initial data to ensure there's something to return
     forecast = WeatherForecast(
@@ -179,7 +204,7 @@ async def test_scheduler_update(mock_weather_api, db: Session):
     db.add(forecast)
     db.commit()
     
-    await update_weather_periodic()
+    await run_periodic_jobs()
     
     forecasts = weather_service.get_weather_forecast(
         db,
@@ -188,13 +213,4 @@ async def test_scheduler_update(mock_weather_api, db: Session):
         datetime.now() + timedelta(days=1)
     )
     
-    assert len(forecasts) > 0 
-
-@router.get("/weather/summary")
-def get_weather_summary(db: Session = Depends(get_db)):
-    """Get weather summary for charts/graphs"""
-    return {
-        "daily_temperatures": ...,
-        "precipitation_forecast": ...,
-        "wind_conditions": ...
-    } 
\ No newline at end of file
+    assert len(forecasts) > 0
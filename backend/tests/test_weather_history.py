@@ -0,0 +1,62 @@
+import json
+from datetime import date, datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.main import app
+from app.services import weather_service
+from app.core.config import settings
+
+client = TestClient(app)
+
+# A Monday, so both days fall in one ISO week
+MONDAY = date(2024, 3, 18)
+
+def _ingest(db: Session):
+    """Hours stored under the grid cell that "Denmark" maps to"""
+    hours = []
+    for offset, temperatures in enumerate([[10.0, 12.0, 14.0, 16.0], [20.0, 22.0]]):
+        start = datetime.combine(MONDAY + timedelta(days=offset), datetime.min.time())
+        hours += [
+            {"timestamp": start + timedelta(hours=i), "location": settings.WEATHER_LOCATION,
+             "temperature": temperature, "precipitation": 1.0, "wind_speed": 4.0 + i}
+            for i, temperature in enumerate(temperatures)
+        ]
+    weather_service.upsert_weather_forecasts(db, hours)
+
+def _params(**params):
+    return {
+        "start_date": datetime.combine(MONDAY, datetime.min.time()).isoformat(),
+        "end_date": datetime.combine(MONDAY + timedelta(days=6), datetime.max.time()).isoformat(),
+        **params
+    }
+
+def test_day_and_week_buckets(db: Session):
+    _ingest(db)
+
+    response = client.get("/api/weather/Denmark/historical", params=_params(bucket="day"))
+    days = response.json()
+    assert [(day["hours"], day["temperature"], day["precipitation_sum"]) for day in days] == [
+        (4, 13.0, 4.0), (2, 21.0, 2.0)
+    ]
+    assert days[0]["bucket"].startswith(MONDAY.isoformat())
+
+    response = client.get("/api/weather/Denmark/historical", params=_params(bucket="week"))
+    [week] = response.json()
+    assert week["hours"] == 6
+    assert round(week["temperature"], 6) == round((13.0 * 4 + 21.0 * 2) / 6, 6)
+    assert (week["temperature_min"], week["temperature_max"]) == (10.0, 22.0)
+    assert week["precipitation_sum"] == 6.0
+    assert week["wind_speed_max"] == 7.0
+
+def test_ndjson_streams_hourly_buckets(db: Session):
+    _ingest(db)
+
+    response = client.get("/api/weather/Denmark/historical", params=_params(format="ndjson"))
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["temperature"] for row in rows] == [10.0, 12.0, 14.0, 16.0, 20.0, 22.0]
+    assert all(row["hours"] == 1 for row in rows)
+
+    # Without bucket or format the stored hours come back unchanged
+    response = client.get("/api/weather/Denmark/historical", params=_params())
+    assert len(response.json()) == 6
@@ -0,0 +1,55 @@
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.weather_daily import WeatherDaily
+from app.models.weather_hourly import WeatherHourly
+from app.services import weather_service
+from app.services.weather_hourly import encode_forecasts, decode_hourly, get_hourly_series
+
+def _hours(start: datetime, count: int, location: str = "Denmark", temperature: float = 10.0):
+    return [
+        {"timestamp": start + timedelta(hours=i), "location": location,
+         "temperature": temperature + i, "precipitation": 0.5, "wind_speed": 4.0}
+        for i in range(count)
+    ]
+
+def test_encode_and_decode():
+    start = datetime(2024, 3, 20, 22)
+    days = encode_forecasts(_hours(start, 4))
+    assert sorted(days) == [("Denmark", date(2024, 3, 20)), ("Denmark", date(2024, 3, 21))]
+    assert days[("Denmark", date(2024, 3, 20))]["temperature"][22:] == [10.0, 11.0]
+    assert days[("Denmark", date(2024, 3, 21))]["temperature"][:3] == [12.0, 13.0, None]
+
+    keys = sorted(days)
+    series = decode_hourly(
+        [day for _, day in keys],
+        *([days[key][column] for key in keys] for column in ("temperature", "precipitation", "wind_speed"))
+    )
+    # Hours without values are dropped
+    assert series.timestamps.tolist() == [start + timedelta(hours=i) for i in range(4)]
+    assert np.allclose(series.temperature, [10.0, 11.0, 12.0, 13.0])
+
+def test_compact_storage(db: Session, monkeypatch):
+    monkeypatch.setattr(settings, "WEATHER_STORAGE", "compact")
+    start = datetime(2024, 3, 20, 0)
+    assert weather_service.upsert_weather_forecasts(db, _hours(start, 30)) == {"inserted": 2, "updated": 0, "unchanged": 0}
+    assert db.query(WeatherHourly).count() == 2
+
+    # A partial refresh only overwrites the hours it carries
+    refresh = _hours(start + timedelta(hours=24), 2, temperature=20.0)
+    assert weather_service.upsert_weather_forecasts(db, refresh) == {"inserted": 0, "updated": 1, "unchanged": 0}
+    assert weather_service.upsert_weather_forecasts(db, refresh) == {"inserted": 0, "updated": 0, "unchanged": 1}
+
+    series = get_hourly_series(db, "Denmark", start + timedelta(hours=23), start + timedelta(hours=26))
+    assert np.allclose(series.temperature, [33.0, 20.0, 21.0, 36.0])
+
+    stored = weather_service.get_weather_forecast(db, "Denmark", start, start + timedelta(hours=2))
+    assert [(f["timestamp"], f["temperature"]) for f in stored] == [(start + timedelta(hours=i), 10.0 + i) for i in range(3)]
+
+    # The daily rollup follows compact rows too
+    db.expire_all()
+    daily = db.query(WeatherDaily).filter(WeatherDaily.location == "Denmark", WeatherDaily.day == date(2024, 3, 21)).one()
+    assert daily.hours == 6
+    assert daily.temperature_min == 20.0
+    assert daily.precipitation_sum == 3.0
@@ -0,0 +1,40 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.plants import Plant
+from app.models.users import User
+from app.models.user_plants import UserPlant
+from app.models.weather_forecast import WeatherForecast
+from app.services.weather_locations import snap_to_cell, cell_for_location, default_cell, get_active_cells
+from app.services.watering_schedule import get_daily_weather_shifts
+from app.services.users import set_user_location
+
+def test_snap_to_cell():
+    assert snap_to_cell(55.676, 12.568).location == "55.70,12.60"
+    assert snap_to_cell(55.66, 12.61) == snap_to_cell(55.676, 12.568)
+    assert snap_to_cell(56.16, 10.2).location == "56.20,10.20"
+    assert cell_for_location("55.70,12.60") == snap_to_cell(55.7, 12.6)
+    assert cell_for_location(settings.WEATHER_LOCATION) == default_cell()
+    assert cell_for_location("Denmark") == default_cell()
+
+def test_users_in_one_cell_share_weather(db: Session):
+    db.add(Plant(id=1, common_name="Plant 1", scientific_name=["Test"]))
+    for user_id, (lat, lon) in enumerate([(55.68, 12.57), (55.71, 12.61), (56.16, 10.2)], start=1):
+        db.add(User(id=user_id, email=f"user{user_id}@example.com", hashed_password="x", is_active=True))
+        db.flush()
+        db.add(UserPlant(user_id=user_id, plant_id=1))
+        set_user_location(db, user_id, lat, lon)
+    db.commit()
+
+    cells = get_active_cells(db)
+    assert sorted(cell.location for cell in cells) == sorted(["55.70,12.60", "56.20,10.20", settings.WEATHER_LOCATION])
+
+    # Each location gets the shift of its own forecast
+    today = date.today()
+    noon = datetime.combine(today + timedelta(days=1), datetime.min.time()) + timedelta(hours=12)
+    db.add(WeatherForecast(timestamp=noon, location="55.70,12.60", temperature=35.0, precipitation=0.0, wind_speed=5.0))
+    db.add(WeatherForecast(timestamp=noon, location="56.20,10.20", temperature=15.0, precipitation=15.0, wind_speed=5.0))
+    db.commit()
+    assert get_daily_weather_shifts(db, today, "55.70,12.60") == {today + timedelta(days=1): -1}
+    assert get_daily_weather_shifts(db, today, "56.20,10.20") == {today + timedelta(days=1): 1}
+    assert get_daily_weather_shifts(db, today) == {}
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+from app.core.config import settings
+from app.services import weather_service
+
+def test_refresh_is_single_flight(monkeypatch):
+    calls = []
+    ingest_threads = []
+    release = None
+
+    async def fake_fetch(cell):
+        calls.append(cell.location)
+        await release.wait()
+        return None
+
+    def fake_ingest(location, forecasts):
+        ingest_threads.append(threading.current_thread())
+        return []
+
+    monkeypatch.setattr(weather_service, "fetch_weather_data", fake_fetch)
+    monkeypatch.setattr(weather_service, "_ingest_in_session", fake_ingest)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        first = weather_service.refresh_weather_forecast(settings.WEATHER_LOCATION)
+        second = weather_service.refresh_weather_forecast(settings.WEATHER_LOCATION)
+        assert first is second
+
+        # Waiters share the running refresh; one giving up does not cancel it
+        assert await weather_service.wait_for_refresh(settings.WEATHER_LOCATION, timeout=0.01) is False
+        assert not first.cancelled()
+        waiter = asyncio.create_task(weather_service.wait_for_refresh(settings.WEATHER_LOCATION, timeout=1))
+        await asyncio.sleep(0)
+        release.set()
+        assert await waiter is True
+        assert calls == [settings.WEATHER_LOCATION]
+        # Database work runs off the event loop thread
+        assert ingest_threads and ingest_threads[0] is not threading.main_thread()
+
+        # A finished refresh is forgotten, so the next caller starts a new one
+        await asyncio.sleep(0)
+        third = weather_service.refresh_weather_forecast(settings.WEATHER_LOCATION)
+        assert third is not first
+        await third
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,46 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session
+from app.models.weather_daily import WeatherDaily
+from app.models.weather_forecast import WeatherForecast
+from app.services import weather_service
+from app.services.weather_retention import prune_weather_history
+
+def _hours(day: date, count: int = 4, location: str = "Denmark"):
+    start = datetime.combine(day, datetime.min.time())
+    return [
+        {"timestamp": start + timedelta(hours=i), "location": location,
+         "temperature": 10.0 + i, "precipitation": 0.0, "wind_speed": 5.0}
+        for i in range(count)
+    ]
+
+def _ingest(db: Session, *days: date):
+    weather_service.upsert_weather_forecasts(db, [hour for day in days for hour in _hours(day)])
+
+def _days(db: Session):
+    db.expire_all()
+    return sorted(row.day for row in db.query(WeatherDaily).all())
+
+def test_downsample_keeps_daily_rollup(db: Session):
+    today = date.today()
+    old = today - timedelta(days=100)
+    _ingest(db, old, old + timedelta(days=1), today)
+
+    # Batch size below the number of old rows, so several batches run
+    removed = prune_weather_history(db, retention_days=90, mode="downsample", batch_size=3)
+    assert removed == {"rows": 8, "days": 0}
+
+    db.expire_all()
+    assert {row.timestamp.date() for row in db.query(WeatherForecast).all()} == {today}
+    assert _days(db) == [old, old + timedelta(days=1), today]
+
+def test_delete_drops_daily_rollup(db: Session):
+    today = date.today()
+    old = today - timedelta(days=100)
+    _ingest(db, old, today)
+
+    removed = prune_weather_history(db, retention_days=90, mode="delete", batch_size=100)
+    assert removed == {"rows": 4, "days": 0}
+    assert _days(db) == [today]
+
+    # Nothing left to prune
+    assert prune_weather_history(db, retention_days=90, mode="delete") == {"rows": 0, "days": 0}
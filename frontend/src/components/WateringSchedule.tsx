@@ -5,6 +5,8 @@ import { API_ENDPOINTS } from '../config';
 import { Plant } from '../types/Plant';
 import { PlantDetails } from './Garden/PlantDetails';
 import { api } from '../utils/api';
+import { CompactScheduleResponse, expandCompactSchedule } from '../utils/compactSchedule';
+import { useScheduleEvents } from '../hooks/useScheduleEvents';
 import CheckCircleIcon from '@mui/icons-material/CheckCircle';
 import WaterDropIcon from '@mui/icons-material/WaterDrop';
 import { useGarden } from '../contexts/GardenContext';
@@ -328,15 +330,17 @@ const WateringSchedule: React.FC<WateringScheduleProps> = ({ sectionId, sections
       const userId = 1; // TODO: Get from auth context
       console.log('Refreshing watering schedule for user:', userId);
       
-      const { data, error } = await api.get<WateringScheduleResponse>(`${API_ENDPOINTS.BASE_URL}/api/watering-schedule/watering-schedule/user/${userId}`);
+      const { data: compactData, error } = await api.get<CompactScheduleResponse>(API_ENDPOINTS.WATERING_SCHEDULE_V2(userId));
       
       if (error) {
         throw new Error(error);
       }
       
-      if (!data) {
+      if (!compactData) {
         throw new Error('No data received from server');
       }
+
+      const data: WateringScheduleResponse = expandCompactSchedule(compactData);
       
       // Store the raw schedule data
       setRawScheduleData(data);
@@ -408,20 +412,17 @@ const WateringSchedule: React.FC<WateringScheduleProps> = ({ sectionId, sections
     [refreshSchedule]
   );
 
-  // Update the periodic refresh to use the debounced version
+  // Initial refresh
   useEffect(() => {
-    // Initial refresh
     refreshSchedule();
-
-    // Set up periodic refresh (every 5 minutes)
-    const interval = setInterval(() => {
-      needsRefreshRef.current = true;
-      debouncedRefresh();
-    }, 300000); // 5 minutes
-
-    return () => clearInterval(interval);
   }, [debouncedRefresh]);
 
+  // Refresh when the server reports a schedule change instead of polling
+  useScheduleEvents(1, () => { // TODO: Get user from auth context
+    needsRefreshRef.current = true;
+    debouncedRefresh();
+  });
+
   // Refresh when garden plants change
   useEffect(() => {
     if (lastUpdated) {
@@ -441,34 +442,6 @@ const WateringSchedule: React.FC<WateringScheduleProps> = ({ sectionId, sections
       const today = format(new Date(), 'yyyy-MM-dd');
       console.log('Marking plant as watered:', plant);
       
-      // First, get the current schedule ID
-      const { data: scheduleData, error: scheduleError } = await api.get<ScheduleData[]>(
-        `${API_ENDPOINTS.BASE_URL}/api/watering-schedule/user/1/plant/${plant.plant_id}`
-      );
-      
-      if (scheduleError) {
-        throw new Error(scheduleError);
-      }
-      
-      if (!scheduleData) {
-        throw new Error('No schedule data received');
-      }
-      
-      console.log('Schedule data for plant:', scheduleData);
-      
-      // Sort schedules by date and find the most recent uncompleted schedule
-      const sortedSchedules = scheduleData.sort((a, b) => 
-        new Date(b.scheduled_date).getTime() - new Date(a.scheduled_date).getTime()
-      );
-      
-      const currentSchedule = sortedSchedules.find(schedule => !schedule.completed);
-
-      if (!currentSchedule) {
-        throw new Error('No active watering schedule found');
-      }
-
-      console.log('Found schedule to update:', currentSchedule);
-
       // Calculate the next watering date
       const nextWateringDate = addDays(new Date(today), plant.watering_frequency);
       const nextWateringDateStr = format(nextWateringDate, 'yyyy-MM-dd');
@@ -513,13 +486,13 @@ const WateringSchedule: React.FC<WateringScheduleProps> = ({ sectionId, sections
         );
       });
 
-      // Update the watering schedule with batch_update flag
-      const { error: updateError } = await api.put(
-        `${API_ENDPOINTS.BASE_URL}/api/watering-schedule/${currentSchedule.id}`,
-        { 
-          completed: true,
-          completion_timestamp: new Date().toISOString(),
-          batch_update: true  // Add this flag to prevent immediate weather adjustments
+      // Complete the plant's occurrence; the backend moves its recurrence to the next one
+      const { error: updateError } = await api.post(
+        `${API_ENDPOINTS.BASE_URL}/api/watering-schedule/complete:batch`,
+        {
+          user_id: 1,
+          scheduled_date: plant.next_watering || today,
+          plant_ids: [plant.plant_id]
         }
       );
       
@@ -564,7 +537,7 @@ const WateringSchedule: React.FC<WateringScheduleProps> = ({ sectionId, sections
         throw new Error('No schedule data received');
       }
       
-      // Find the completed schedule for today and the future schedule
+      // Find the completed schedule for today
       const today = format(new Date(), 'yyyy-MM-dd');
       const completedSchedule = scheduleData.find(schedule => 
         schedule.completed && 
@@ -572,11 +545,6 @@ const WateringSchedule: React.FC<WateringScheduleProps> = ({ sectionId, sections
         format(new Date(schedule.completion_timestamp), 'yyyy-MM-dd') === today
       );
 
-      const futureSchedule = scheduleData.find(schedule => 
-        !schedule.completed && 
-        format(new Date(schedule.scheduled_date), 'yyyy-MM-dd') > today
-      );
-
       if (!completedSchedule) {
         throw new Error('No completed schedule found for today');
       }
@@ -594,17 +562,6 @@ const WateringSchedule: React.FC<WateringScheduleProps> = ({ sectionId, sections
         throw new Error(updateError);
       }
 
-      // Delete the future schedule if it exists
-      if (futureSchedule) {
-        const { error: deleteError } = await api.delete(
-          `${API_ENDPOINTS.BASE_URL}/api/watering-schedule/${futureSchedule.id}`
-        );
-        
-        if (deleteError) {
-          console.warn('Failed to delete future schedule, but continuing with reset');
-        }
-      }
-
       // Update local state to maintain the plant's visibility and remove next scheduled watering
       setScheduleData(prevData => {
         const updatedData = prevData.filter(p => {
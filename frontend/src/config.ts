@@ -15,6 +15,8 @@ export const API_ENDPOINTS = {
   ADD_PLANT: (userId: number) => `${baseUrl}/api/plants/user/${userId}/plants`,
   PLANT_SECTION: (userId: number, plantId: number) => `${baseUrl}/api/plants/user/${userId}/plants/${plantId}/section`,
   WATERING_SCHEDULE: (userId: number) => `${baseUrl}/api/watering-schedule/watering-schedule/user/${userId}`,
+  WATERING_SCHEDULE_V2: (userId: number) => `${baseUrl}/api/watering-schedule/v2/user/${userId}`,
+  WATERING_SCHEDULE_EVENTS: (userId: number) => `${baseUrl}/api/watering-schedule/user/${userId}/events`,
   PRUNING: (userId: number) => `${baseUrl}/api/pruning/schedule/${userId}`,
   PLANT_SUGGESTIONS: (sectionId: string) => `${baseUrl}/suggestions/${sectionId}`,
   WEATHER: `${baseUrl}/api/weather`,
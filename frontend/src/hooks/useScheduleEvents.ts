@@ -0,0 +1,40 @@
+import { useEffect, useRef } from 'react';
+import { API_ENDPOINTS } from '../config';
+
+export interface ScheduleEvent {
+  id: number;
+  type: 'completed' | 'uncompleted' | 'plant_added' | 'plant_removed' | 'plant_moved' | 'weather_adjusted' | 'resync';
+  plant_ids?: number[];
+  date?: string;
+  section?: string | null;
+}
+
+const EVENT_TYPES: ScheduleEvent['type'][] = [
+  'completed', 'uncompleted', 'plant_added', 'plant_removed', 'plant_moved', 'weather_adjusted', 'resync'
+];
+
+// Subscribe to server-sent schedule change events for a user.
+// EventSource reconnects on its own after network errors.
+export const useScheduleEvents = (userId: number | undefined, onEvent: (event: ScheduleEvent) => void) => {
+  const onEventRef = useRef(onEvent);
+  onEventRef.current = onEvent;
+
+  useEffect(() => {
+    if (userId === undefined || typeof EventSource === 'undefined') return;
+
+    const source = new EventSource(API_ENDPOINTS.WATERING_SCHEDULE_EVENTS(userId));
+    const handleMessage = (message: MessageEvent) => {
+      try {
+        onEventRef.current(JSON.parse(message.data) as ScheduleEvent);
+      } catch (err) {
+        console.error('Invalid schedule event:', err);
+      }
+    };
+    EVENT_TYPES.forEach(type => source.addEventListener(type, handleMessage));
+
+    return () => {
+      EVENT_TYPES.forEach(type => source.removeEventListener(type, handleMessage));
+      source.close();
+    };
+  }, [userId]);
+};
@@ -2,6 +2,7 @@ import { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { WateringSchedule } from '../types/Plant';
 import { API_ENDPOINTS } from '../config';
+import { useScheduleEvents } from './useScheduleEvents';
 
 const CACHE_DURATION = 5 * 60 * 1000; // 5 minutes in milliseconds
 
@@ -64,16 +65,11 @@ export const useWateringSchedule = () => {
     }
   }, [user]);
 
-  // Refresh cache periodically
-  useEffect(() => {
-    if (!user) return;
-
-    const interval = setInterval(() => {
-      fetchSchedule();
-    }, CACHE_DURATION);
-
-    return () => clearInterval(interval);
-  }, [user, fetchSchedule]);
+  // Refetch only when the server reports a change
+  useScheduleEvents(user?.id, () => {
+    delete scheduleCache[`schedule_${user?.id}`];
+    fetchSchedule();
+  });
 
   // Initial fetch
   useEffect(() => {
@@ -0,0 +1,76 @@
+import { addDays, format, parseISO } from 'date-fns';
+
+// Compact (v2) watering schedule overview: plant details are sent once and
+// every day only lists [plant_id, status flags(, original date offset)] per section.
+export interface CompactScheduleResponse {
+  version: number;
+  start_date: string;
+  sections: string[];
+  plants: Record<string, {
+    name: string;
+    image_url?: string | null;
+    section: number;
+    frequency_days: number;
+    depth_mm: number;
+    volume_feet: number;
+  }>;
+  flags: { watered: number; weather_adjusted: number };
+  schedule: Array<{
+    date: string;
+    weather: [number, number, number] | null;
+    sections: Array<[number, Array<number[]>]>;
+  }>;
+  last_updated: string;
+}
+
+// Expand the compact format into the nested per-day shape of the v1 overview
+export const expandCompactSchedule = (data: CompactScheduleResponse) => ({
+  schedule: data.schedule.map(day => ({
+    date: day.date,
+    weather: day.weather
+      ? {
+          temperature: day.weather[0],
+          precipitation: day.weather[1],
+          wind_speed: day.weather[2],
+          weather_icons: [] as string[],
+        }
+      : undefined,
+    sections: day.sections.map(([sectionIndex, entries]) => {
+      const plants = entries.map(([plantId, flags, originalOffset]) => {
+        const plant = data.plants[String(plantId)];
+        const isWatered = (flags & data.flags.watered) !== 0;
+        const isAdjusted = (flags & data.flags.weather_adjusted) !== 0;
+        return {
+          plant_id: plantId,
+          plant_name: plant.name,
+          image_url: plant.image_url ?? undefined,
+          watering_info: {
+            frequency_days: plant.frequency_days,
+            depth_mm: plant.depth_mm,
+            volume_feet: plant.volume_feet,
+          },
+          last_watered: isWatered ? day.date : undefined,
+          is_watered: isWatered,
+          weather_adjusted: isAdjusted,
+          weather_info: {
+            is_adjusted: isAdjusted,
+            original_date: isAdjusted && originalOffset !== undefined
+              ? format(addDays(parseISO(day.date), originalOffset), 'yyyy-MM-dd')
+              : null,
+          },
+        };
+      });
+      const watered = plants.filter(p => p.is_watered).length;
+      return {
+        section: data.sections[sectionIndex],
+        groups: [{ plants }],
+        watering_stats: {
+          total_plants: plants.length,
+          watered_plants: watered,
+          percentage: plants.length > 0 ? (watered / plants.length) * 100 : 0,
+        },
+      };
+    }),
+  })),
+  last_updated: data.last_updated,
+});